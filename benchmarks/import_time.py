@@ -0,0 +1,90 @@
+# coding: utf-8
+"""Check that importing mfoutparser stays within a time budget.
+
+   Importing the package only imports numpy, pandas and the submodules
+   when they are first used (on python >= 3.7), so short-lived processes
+   that need little of the library start quickly. This measures the
+   import in fresh interpreters, checks that numpy and pandas weren't
+   imported and exits with an error if either check fails:
+
+   python import_time.py --budget 0.05 --output import_time.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from collections import OrderedDict
+
+
+# Modules that should not be imported by `import mfoutparser`
+_HEAVY_MODULES = [u'numpy', u'pandas']
+
+_SCRIPT = u"""
+import sys, json, time
+start = getattr(time, 'perf_counter', time.time)()
+import mfoutparser
+stop = getattr(time, 'perf_counter', time.time)()
+print(json.dumps({'seconds': stop - start,
+                  'imported': [x for x in %r if x in sys.modules]}))
+""" % (_HEAVY_MODULES,)
+
+
+def measure_import_time(repeat=10):
+    """Import mfoutparser in `repeat` fresh interpreters
+
+       Output: list of import times in seconds and the heavy
+               modules that were imported
+    """
+
+    # Measure the mfoutparser in this tree rather than an installed one
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env[u'PYTHONPATH'] = os.pathsep.join([root] + [x for x in [env.get(u'PYTHONPATH')] if x])
+
+    times = list()
+    imported = set()
+
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, u'-c', _SCRIPT], env=env)
+        result = json.loads(output.decode(u'utf-8').strip().splitlines()[-1])
+        times.append(result[u'seconds'])
+        imported.update(result[u'imported'])
+
+    return times, sorted(imported)
+
+
+if __name__ == u'__main__':
+
+    parser = argparse.ArgumentParser(description=u'Check the import time of mfoutparser.')
+    parser.add_argument(u'--budget', type=float, default=0.05,
+                        help=u'maximum median import time in seconds')
+    parser.add_argument(u'--repeat', type=int, default=10)
+    parser.add_argument(u'--output', help=u'JSON file for the results (default is standard output)')
+    args = parser.parse_args()
+
+    times, imported = measure_import_time(args.repeat)
+    median = sorted(times)[len(times) // 2]
+
+    # Dependencies can only be imported lazily on python >= 3.7
+    lazy = sys.version_info >= (3, 7)
+
+    results = OrderedDict([(u'python', platform.python_version()),
+                           (u'repeat', args.repeat),
+                           (u'min_seconds', min(times)),
+                           (u'median_seconds', median),
+                           (u'budget_seconds', args.budget),
+                           (u'heavy_modules_imported', imported),
+                           (u'within_budget', (median <= args.budget) and not (lazy and imported))])
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write(u'\n')
+    else:
+        with open(args.output, 'w') as outputfile:
+            json.dump(results, outputfile, indent=2)
+
+    if not results[u'within_budget']:
+        sys.exit(1)
@@ -0,0 +1,250 @@
+# coding: utf-8
+"""Time and memory-profile mfoutparser on synthetic ModelFree output files.
+
+   Files of increasing size are written with `synthetic.py` and the
+   main parsing, formatting and selection steps are measured on each.
+   The results are written as JSON, so they can be kept for each version
+   and compared to find regressions:
+
+   python run.py --output results_1.4.1.json
+   python run.py --output results_new.json --compare results_1.4.1.json
+
+   Memory is the peak size of the python allocations made by each step,
+   as measured by tracemalloc, and is not recorded on python 2.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Measure the mfoutparser in this tree rather than an installed one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mfoutparser as mf
+from mfoutparser import read
+from synthetic import write_synthetic_mfout
+
+
+# Sizes of the synthetic files as (residues, fields, models, simulations, correlation parameters)
+_DEFAULT_SIZES = [(100, 1, 1, 20, 3),
+                  (1000, 1, 1, 20, 3),
+                  (1000, 3, 2, 20, 5),
+                  (10000, 3, 2, 20, 5)]
+
+
+### The steps that are measured
+
+
+def _parse_text_tables(mfoutfilename):
+    """Parse a file up to, but not including, the type coercion
+       so that it can be measured on its own
+
+       Output: dictionary of dataframes containing strings
+    """
+
+    text_dict = OrderedDict()
+
+    for key, text in read._parse_mfoutfile(mfoutfilename).items():
+        tags, loops = read._classify_lines(text)
+        if len(loops) > 0:
+            loop_dict = OrderedDict([(key, read._convert_loops_to_df(loops))])
+            loop_dict = read._clean_up_table_column_names(read._clean_up_loop_dict(loop_dict))
+            text_dict.update(loop_dict)
+
+    return text_dict
+
+
+def _make_benchmarks(mfoutfilename, workdir):
+    """Set up each measured step for a file
+
+       Output: list of (name, function) where each function performs the step once
+    """
+
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    text_dict = _parse_text_tables(mfoutfilename)
+    csvfilename = os.path.join(workdir, u'benchmark.tsv')
+
+    benchmarks = [(u'parse_mfout', lambda: mf.parse_mfout(mfoutfilename)),
+                  (u'_coerce_and_store_data_types',
+                   lambda: read._coerce_and_store_data_types(OrderedDict(text_dict))),
+                  (u'DataFrame.to_csv', lambda: loop_dict[u'relaxation'].to_csv(csvfilename, sep='\t')),
+                  (u'get_data_selection',
+                   lambda: mf.get_data_selection(loop_dict[u'model_1'], {u'model_free_name': u'S2'}))]
+
+    if u'correlation_matrix' in loop_dict:
+        benchmarks.append((u'make_correlation_matrices',
+                           lambda: mf.make_correlation_matrices(loop_dict[u'correlation_matrix'])))
+
+    # The overhead of the DataFrame subclass on derived frames and
+    # notebook display, compared with the same operations in Pandas
+    table = loop_dict[u'sse']
+    for prefix, frame in [(u'DataFrame', table), (u'pandas.DataFrame', pd.DataFrame(table))]:
+        benchmarks += [(prefix + u'.copy', lambda frame=frame: frame.copy()),
+                       (prefix + u'.iloc', lambda frame=frame: frame.iloc[::2]),
+                       (prefix + u'.arithmetic', lambda frame=frame: frame[[u'sse']] * 2),
+                       (prefix + u'._repr_html_', lambda frame=frame: frame._repr_html_())]
+
+    return benchmarks
+
+
+### Measurement
+
+
+def _time_function(function, repeat):
+    """Run a function `repeat` times
+
+       Output: list of times in seconds
+    """
+
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter() if hasattr(time, u'perf_counter') else time.time()
+        function()
+        stop = time.perf_counter() if hasattr(time, u'perf_counter') else time.time()
+        times.append(stop - start)
+
+    return times
+
+
+def _peak_memory(function):
+    """Run a function once and measure its peak allocated memory
+
+       Output: peak memory in bytes, or None if it can't be measured
+    """
+
+    if tracemalloc is None:
+        return None
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run_benchmarks(sizes=_DEFAULT_SIZES, repeat=5, workdir=None):
+    """Measure each step on a synthetic file of each size
+
+       Output: dictionary of the results and the environment
+               they were measured in
+    """
+
+    cleanup = workdir is None
+    if cleanup:
+        workdir = tempfile.mkdtemp(prefix=u'mfoutparser_benchmark_')
+
+    results = list()
+
+    try:
+        for residues, fields, models, simulations, correlation_parameters in sizes:
+            mfoutfilename = os.path.join(workdir, u'mfout.synthetic')
+            write_synthetic_mfout(mfoutfilename, residues, fields, models,
+                                  simulations, correlation_parameters)
+
+            size = OrderedDict([(u'residues', residues), (u'fields', fields),
+                                (u'models', models), (u'simulations', simulations),
+                                (u'correlation_parameters', correlation_parameters),
+                                (u'file_bytes', os.path.getsize(mfoutfilename))])
+
+            for name, function in _make_benchmarks(mfoutfilename, workdir):
+                times = _time_function(function, repeat)
+                results.append(OrderedDict([(u'benchmark', name),
+                                            (u'size', size),
+                                            (u'repeat', repeat),
+                                            (u'min_seconds', min(times)),
+                                            (u'median_seconds', float(np.median(times))),
+                                            (u'peak_memory_bytes', _peak_memory(function))]))
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir)
+
+    environment = OrderedDict([(u'mfoutparser', mf.__version__),
+                               (u'python', platform.python_version()),
+                               (u'numpy', np.__version__),
+                               (u'pandas', pd.__version__),
+                               (u'platform', platform.platform()),
+                               (u'time', time.strftime(u'%Y-%m-%dT%H:%M:%S'))])
+
+    return OrderedDict([(u'environment', environment), (u'results', results)])
+
+
+def compare_results(results, baseline, threshold=1.2):
+    """Compare the fastest times of two sets of results
+
+       Input: results, baseline results and the ratio of the times
+              above which a benchmark is considered a regression
+
+       Output: list of (benchmark, size, ratio, is_regression)
+    """
+
+    def result_key(result):
+        return (result[u'benchmark'], json.dumps(result[u'size'], sort_keys=True))
+
+    baseline_times = dict([(result_key(result), result[u'min_seconds'])
+                           for result in baseline[u'results']])
+
+    comparison = list()
+    for result in results[u'results']:
+        baseline_time = baseline_times.get(result_key(result))
+        if baseline_time:
+            ratio = result[u'min_seconds'] / baseline_time
+            comparison.append((result[u'benchmark'], result[u'size'], ratio, ratio > threshold))
+
+    return comparison
+
+
+def _parse_size(text):
+    size = tuple(int(x) for x in text.split(u','))
+    if len(size) != 5:
+        raise argparse.ArgumentTypeError(u'A size is residues,fields,models,simulations,correlation_parameters')
+    return size
+
+
+if __name__ == u'__main__':
+
+    parser = argparse.ArgumentParser(description=u'Benchmark mfoutparser on synthetic ModelFree output.')
+    parser.add_argument(u'--size', type=_parse_size, action=u'append', dest=u'sizes',
+                        help=u'residues,fields,models,simulations,correlation_parameters '
+                             u'(may be repeated, default is a range of sizes)')
+    parser.add_argument(u'--repeat', type=int, default=5)
+    parser.add_argument(u'--output', help=u'JSON file for the results (default is standard output)')
+    parser.add_argument(u'--compare', help=u'JSON file of baseline results to compare with')
+    parser.add_argument(u'--threshold', type=float, default=1.2,
+                        help=u'ratio of the fastest times that is reported as a regression')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes or _DEFAULT_SIZES, args.repeat)
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write(u'\n')
+    else:
+        with open(args.output, 'w') as outputfile:
+            json.dump(results, outputfile, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as comparefile:
+            comparison = compare_results(results, json.load(comparefile), args.threshold)
+
+        for name, size, ratio, is_regression in comparison:
+            sys.stderr.write(u'{:<30s} {:>6d} residues {:>6.2f}x{}\n'.format(
+                name, size[u'residues'], ratio, u'  REGRESSION' if is_regression else u''))
+
+        if any(is_regression for _, _, _, is_regression in comparison):
+            sys.exit(1)
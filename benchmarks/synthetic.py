@@ -0,0 +1,262 @@
+# coding: utf-8
+"""Write synthetic ModelFree STAR output files of any size.
+
+   The files have the same layout as those written by ModelFree (see
+   mfoutparser/examples/input_data) and contain random values, so they
+   can be used to measure how mfoutparser scales with the number of
+   residues, fields, models, simulations and correlated parameters.
+
+   python synthetic.py mfout.synthetic --residues 1000 --fields 3
+"""
+
+import argparse
+import numpy as np
+
+
+# Names of the model free parameters in the order ModelFree uses them
+_PARAMETER_NAMES = [u'S2', u'S2f', u'S2s', u'te', u'Rex', u'Theta', u'Phi']
+
+# Names and units of the relaxation rates measured at each field
+_RATE_NAMES = [(u'R1', u'(1/s)'), (u'R2', u'(1/s)'), (u'NOE', u'()')]
+
+_FIELDS = [500.130, 600.130, 799.800, 899.900, 950.000, 1000.000]
+
+
+def write_synthetic_mfout(mfoutfilename, residues=100, fields=1, models=1,
+                          simulations=20, correlation_parameters=3, seed=0):
+    """Write a synthetic ModelFree output file
+
+       Input: file name, number of residues, magnetic fields, models,
+              simulated percentiles and correlated parameters, and the
+              seed for the random values
+
+              simulations is the number of percentiles listed for each
+              simulated distribution (ModelFree writes 20)
+
+              If correlation_parameters is 0, there is no correlation
+              matrix and if models is more than 1, F-test distributions
+              are included as they are when ModelFree compares models
+
+       Output: ModelFree output file
+    """
+
+    random = np.random.RandomState(seed)
+    residue_list = np.arange(2, residues + 2)
+    field_list = [_FIELDS[i % len(_FIELDS)] + 0.01 * (i // len(_FIELDS)) for i in range(fields)]
+    percentiles = np.arange(1, simulations + 1) / float(max(simulations, 1))
+
+    with open(mfoutfilename, 'w') as mfoutfile:
+        mfoutfile.write(u'# Modelfree STAR Format Output File\n\n')
+
+        for block in [_header(residue_list, field_list),
+                      _title(residue_list),
+                      _chi_square(random, percentiles),
+                      _diffusion_tensor(),
+                      _spin_parameters(residue_list),
+                      _relaxation(random, residue_list, field_list)]:
+            mfoutfile.write(block)
+
+        for model in range(1, models + 1):
+            mfoutfile.write(_model(random, residue_list, model))
+
+            if model == 1:
+                mfoutfile.write(_sse(random, residue_list, percentiles))
+                if correlation_parameters > 0:
+                    mfoutfile.write(_correlation_matrix(random, residue_list,
+                                                        correlation_parameters))
+
+        if models > 1:
+            mfoutfile.write(_f_dist(random, residue_list, percentiles))
+
+    return
+
+
+### Each of the data blocks in the file
+
+
+def _header(residue_list, field_list):
+    lines = [u'data_header',
+             u'     _modelfree_version 4.20',
+             u'     _date Tue Jun  2 16:27:22 2015      ',
+             u'',
+             u'     _Input_file          mfinput',
+             u'     _Model_file          mfmodel',
+             u'     _Data_file           synthetic.MFDATA',
+             u'     _Parameter_file      synthetic.MFPAR',
+             u'     _Simulation_file     none',
+             u'',
+             u'     _optimization                  tval',
+             u'     _seed                         -1985',
+             u'     _search                        grid',
+             u'     _diffusion                isotropic',
+             u'     _algorithm               fix       ',
+             u'     _simulations                   pred',
+             u'     _iterations                300',
+             u'     _trim_level              0.000',
+             u'     _selection                    ftest',
+             u'     _sim_algorithm           fix       ',
+             u'     _total_spins            {:>10d}'.format(len(residue_list)),
+             u'     _number_of_fields       {:>10d}'.format(len(field_list)),
+             u'     loop_',
+             u'          _1H_fields']
+    lines += [u'             {:.3f}'.format(field) for field in field_list]
+
+    return u'\n'.join(lines) + u'\n'
+
+
+def _title(residue_list):
+    lines = [u'data_title', u'loop_', u'         _Title  _Residue']
+    lines += [u'     {:<10d}{:>8d}'.format(residue, residue) for residue in residue_list]
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+def _chi_square(random, percentiles):
+    values = np.sort(random.uniform(20.0, 70.0, len(percentiles)))
+
+    lines = [u'data_chi_square',
+             u'           _Total_X2      {:.4f}'.format(random.uniform(1000.0, 3000.0)),
+             u'     loop_',
+             u'              _Percentile  _simulated_X2']
+    lines += [u'{:>25.4f}{:>15.4f}'.format(p, v) for p, v in zip(percentiles, values)]
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+def _diffusion_tensor():
+    lines = [u'data_diffusion_tensor',
+             u'loop_',
+             u'     _Diffusion_name     _Units         _Fit_value     _Fit_error _Flag'
+             u'     _Sim_value     _Sim_error       _Sim_abs       _Geary-Z',
+             u'     tm        (ns)                4.214          0.000    1'
+             u'          0.000          0.000          0.000          0.000']
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+def _spin_parameters(residue_list):
+    lines = [u'data_spin_parameters',
+             u'loop_',
+             u'            _Residue         _Model       _Nucleus         _Gamma'
+             u'           _Rxh           _CSA     _CSA_sigma']
+    lines += [u'{:>20d}        0000100            N15        -2.7100         1.0200'
+              u'      -160.0000         0.0000'.format(residue) for residue in residue_list]
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+def _relaxation(random, residue_list, field_list):
+    lines = [u'data_relaxation',
+             u'loop_',
+             u'     _relaxation_rate_name _relaxation_rate_unit _field',
+             u'     loop_',
+             u'            _Residue         _Value   _Uncertainty _Flag  _Fit_value       _t-value',
+             u'']
+
+    for field in field_list:
+        for name, unit in _RATE_NAMES:
+            values = random.uniform(0.5, 10.0, len(residue_list))
+            errors = random.uniform(0.01, 0.5, len(residue_list))
+            fits = values + random.normal(0.0, 0.1, len(residue_list))
+            tvalues = (values - fits) / errors
+
+            lines.append(u'     {:<12s}{:<14s}{:.3f}'.format(name, unit, field))
+            lines += [u'{:>20d}{:>14.3f}{:>12.3f}    1{:>12.3f}{:>15.3E}'.format(*row)
+                      for row in zip(residue_list, values, errors, fits, tvalues)]
+            lines += [u'     stop_', u'']
+
+    return u'\n'.join(lines)
+
+
+def _model(random, residue_list, model):
+    lines = [u'data_model_{}'.format(model),
+             u'loop_',
+             u'         _Model_free_name    _Model_free_unit',
+             u'     loop_',
+             u'            _Residue          _Fit_value     _Fit_error _Flag'
+             u'     _Sim_value     _Sim_error       _Sim_abs       _Geary-Z',
+             u'']
+
+    for name in _PARAMETER_NAMES[:5]:
+        values = random.uniform(0.0, 1.0, (len(residue_list), 6))
+
+        lines.append(u'     {:<10s}(){:8s}'.format(name, u''))
+        lines += [u'{:>20d}{:>15.3f}{:>15.3f}    1{:>15.3f}{:>15.3f}{:>15.3f}{:>15.3f}'.format(residue, *row)
+                  for residue, row in zip(residue_list, values)]
+        lines += [u'     stop_', u'']
+
+    return u'\n'.join(lines)
+
+
+def _sse(random, residue_list, percentiles):
+    lines = [u'data_sse',
+             u'loop_',
+             u'            _Residue           _SSE',
+             u'     loop_',
+             u'              _Percentile _simulated_SSE']
+
+    for residue in residue_list:
+        values = np.sort(random.uniform(0.0, 20.0, len(percentiles)))
+
+        lines.append(u'{:>15d}     {:.4E}'.format(residue, random.uniform(0.0, 20.0)))
+        lines += [u'{:>25.4f}{:>15.4f}'.format(p, v) for p, v in zip(percentiles, values)]
+        lines.append(u'     stop_')
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+def _correlation_matrix(random, residue_list, correlation_parameters):
+    names = [_PARAMETER_NAMES[i] if i < len(_PARAMETER_NAMES) else u'P{}'.format(i)
+             for i in range(correlation_parameters)]
+    pairs = [(i, j) for i in range(len(names)) for j in range(i, len(names))]
+
+    lines = [u'data_correlation_matrix',
+             u'loop_',
+             u'     _Residue',
+             u'     loop_',
+             u'            _Model_free_name_1  _Model_free_name_2         _Covariance',
+             u'']
+
+    for residue in residue_list:
+        values = random.uniform(-1.0, 1.0, len(pairs))
+
+        lines.append(u'{:>10d}'.format(residue))
+        lines += [u'               {:<15s}{:<15s}{:>9.4f}'.format(names[i], names[j], 1.0 if i == j else v)
+                  for (i, j), v in zip(pairs, values)]
+        lines += [u'     stop_', u'']
+
+    return u'\n'.join(lines)
+
+
+def _f_dist(random, residue_list, percentiles):
+    lines = [u'data_F_dist',
+             u'loop_',
+             u'            _Residue        _F-stat      _F-simulations',
+             u'     loop_',
+             u'                   _Percentile   _simulated_F_dist']
+
+    for residue in residue_list:
+        values = np.sort(random.uniform(0.0, 10.0, len(percentiles)))
+
+        lines.append(u'{:>15d}{:>20.8f}{:>20d}'.format(residue, random.uniform(0.0, 50.0),
+                                                       len(percentiles)))
+        lines += [u'{:>20.4f}{:>25.8f}'.format(p, v) for p, v in zip(percentiles, values)]
+        lines.append(u'     stop_')
+
+    return u'\n'.join(lines) + u'\n\n'
+
+
+if __name__ == u'__main__':
+
+    parser = argparse.ArgumentParser(description=u'Write a synthetic ModelFree output file.')
+    parser.add_argument(u'mfoutfilename')
+    parser.add_argument(u'--residues', type=int, default=100)
+    parser.add_argument(u'--fields', type=int, default=1)
+    parser.add_argument(u'--models', type=int, default=1)
+    parser.add_argument(u'--simulations', type=int, default=20)
+    parser.add_argument(u'--correlation-parameters', type=int, default=3)
+    parser.add_argument(u'--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_mfout(args.mfoutfilename, args.residues, args.fields, args.models,
+                          args.simulations, args.correlation_parameters, args.seed)
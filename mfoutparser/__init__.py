@@ -1,17 +1,72 @@
 # coding: utf-8
-__all__ = [u"parse_mfout", u"write_all_to_file", u"write_correlation_matrix_to_file",
-           u"make_correlation_matrices", u"get_data_selection", u"copy_examples"]
+import sys as _sys
+from importlib import import_module as _import_module
 
+__all__ = [u"parse_mfout", u"parse_mfout_many", u"iter_mfout_many", u"index_mfout", u"iter_loop_rows", u"ParseCache",
+           u"SpilledTable",
+           u"ParseStats", u"MfoutFollower",
+           u"write_all_to_file", u"write_correlation_matrix_to_file",
+           u"write_all_to_binary", u"read_all_from_binary",
+           u"make_correlation_matrices", u"make_correlation_tensor",
+           u"correlation_tensor_to_matrices", u"get_data_selection", u"query_data",
+           u"ResidueIndex", u"compact_tables", u"memory_footprint", u"aggregate_runs",
+           u"register_schema", u"copy_examples"]
 
-from .read import parse_mfout, DataFrame
-from .write import write_all_to_file, write_correlation_matrix_to_file
-from .correlation import make_correlation_matrices
-from .selector import get_data_selection
-from .examples import copy_examples
 
-from .docstring import DOCSTRING
+# The submodule containing each attribute, which is only imported
+# (along with numpy and pandas) when the attribute is first used
+_LAZY_ATTRIBUTES = {u"parse_mfout": u"read", u"parse_mfout_many": u"read",
+                    u"iter_mfout_many": u"read",
+                    u"index_mfout": u"read", u"iter_loop_rows": u"read",
+                    u"DataFrame": u"read", u"LazyDict": u"read",
+                    u"write_all_to_file": u"write", u"write_correlation_matrix_to_file": u"write",
+                    u"write_all_to_binary": u"binary", u"read_all_from_binary": u"binary",
+                    u"make_correlation_matrices": u"correlation",
+                    u"make_correlation_tensor": u"correlation",
+                    u"correlation_tensor_to_matrices": u"correlation",
+                    u"get_data_selection": u"selector", u"query_data": u"selector",
+                    u"ResidueIndex": u"selector",
+                    u"copy_examples": u"examples",
+                    u"ParseCache": u"cache",
+                    u"SpilledTable": u"spill",
+                    u"ParseStats": u"stats",
+                    u"MfoutFollower": u"follow",
+                    u"compact_tables": u"memory", u"memory_footprint": u"memory",
+                    u"aggregate_runs": u"aggregate",
+                    u"register_schema": u"schema"}
+
+# The asyncio functions use syntax that is only available on python >= 3.5
+if _sys.version_info >= (3, 5):
+    _LAZY_ATTRIBUTES.update({u"parse_mfout_async": u"aio", u"parse_mfout_many_async": u"aio"})
+    __all__ += [u"parse_mfout_async", u"parse_mfout_many_async"]
+
+
+def _load_attribute(name):
+    # Import the submodule for an attribute and keep the
+    # attribute so it is only looked up once
+    value = getattr(_import_module(u'.' + _LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+# Modules can only define __getattr__ on python >= 3.7,
+# so everything is imported right away on older versions
+if _sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_ATTRIBUTES:
+            return _load_attribute(name)
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+else:
+    for _name in _LAZY_ATTRIBUTES:
+        _load_attribute(_name)
+
+
+from .docstring import DOCSTRING, DATAFRAME_DOCSTRING
 from .version import VERSION
 
 # TODO find a way to fix the docstring indentation for classes
-__doc__ = '\n'.join([DOCSTRING, 'CLASSES', DataFrame.__doc__])
+__doc__ = '\n'.join([DOCSTRING, 'CLASSES', DATAFRAME_DOCSTRING])
 __version__ = VERSION
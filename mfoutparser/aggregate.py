@@ -0,0 +1,154 @@
+# coding: utf-8
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+from .read import DataFrame, _merge_print_formats
+
+
+### Combine the results of many parsed files
+
+
+def aggregate_runs(results, run_name=u'run'):
+    """Combine the tables parsed from many ModelFree output files into
+       a single table for each data tag, e.g. to compare the 'model_1'
+       parameters of several runs:
+
+       results, errors = mf.parse_mfout_many(['mfout.500', 'mfout.600'])
+       tag_dict, loop_dict = mf.aggregate_runs(results)
+       s2 = mf.query_data(loop_dict['model_1'], {'model_free_name': 'S2'})
+       s2.pivot_table(index='residue', columns='run', values='fit_value')
+
+       Each table has a MultiIndex whose first level is the run and whose
+       other levels are the index of the original tables. The tables are
+       allocated once and each parsed table is copied into them once.
+       Columns missing from a run are NaN for that run. The print formats
+       of all runs are merged, using the most decimal places given for
+       each column (and scientific notation if any run uses it).
+
+       Input: dictionary of the (tag_dict, loop_dict) created by parse_mfout
+              for each run, such as the results of parse_mfout_many, or a
+              list of them, and the name of the run level of the index
+
+       Output: two dictionaries containing data and tables,
+               as created by parse_mfout, for all runs
+    """
+
+    if not isinstance(results, dict):
+        results = OrderedDict(enumerate(results))
+
+    run_list = list(results.keys())
+
+    tag_dict = OrderedDict()
+    loop_dict = OrderedDict()
+
+    for position, tag_loop_dict in [(0, tag_dict), (1, loop_dict)]:
+
+        # The tables for each key in the order they are first found
+        table_dict = OrderedDict()
+        for run in run_list:
+            for key, table in results[run][position].items():
+                table_dict.setdefault(key, list()).append((run, table))
+
+        for key, run_table_list in table_dict.items():
+            tag_loop_dict[key] = _aggregate_tables(run_table_list, run_name)
+
+    return tag_dict, loop_dict
+
+
+def _aggregate_tables(run_table_list, run_name):
+    """Combine the same table from several runs
+       This is a private function, not meant for general use.
+
+       Input: list of (run, dataframe) and name of the run index level
+
+       Output: dataframe
+    """
+
+    length_list = [len(table) for _, table in run_table_list]
+    total_length = sum(length_list)
+    offset_list = np.cumsum([0] + length_list)
+
+    # The columns in the order they are first found
+    columns = list(OrderedDict.fromkeys(col for _, table in run_table_list
+                                        for col in table.columns))
+
+    # Allocate each column for all runs and copy each run into it
+    column_dict = OrderedDict()
+    for col in columns:
+        present = [table[col].dtype for _, table in run_table_list if col in table.columns]
+        values = np.empty(total_length, dtype=_aggregate_dtype(present, len(present) < len(run_table_list)))
+
+        for (_, table), start, stop in zip(run_table_list, offset_list[:-1], offset_list[1:]):
+            if col in table.columns:
+                values[start:stop] = np.asarray(table[col])
+            else:
+                values[start:stop] = np.nan
+
+        column_dict[col] = values
+
+    dataframe = DataFrame(column_dict, columns=columns, index=_aggregate_index(run_table_list, run_name))
+
+    # Merge the print formats of all runs
+    format_dict = OrderedDict()
+    for _, table in run_table_list:
+        for col, print_format in getattr(table, u'_print_format', dict()).items():
+            format_dict.setdefault(col, list()).append(print_format)
+
+    dataframe._print_format = dict([(col, _merge_print_formats(format_list))
+                                    for col, format_list in format_dict.items()])
+
+    return dataframe
+
+
+def _aggregate_dtype(dtype_list, has_missing):
+    """Find a type that can hold the values of a column from all runs
+       This is a private function, not meant for general use.
+
+       Input: list of the types of the column in each run that has it and
+              whether some runs are missing the column
+
+       Output: numpy dtype
+    """
+
+    # Strings and categoricals are combined as objects
+    if any((not isinstance(x, np.dtype)) or (x.kind not in u'biuf') for x in dtype_list):
+        return np.dtype(object)
+
+    dtype = np.result_type(*dtype_list)
+
+    # Missing values need a type that holds NaN
+    if has_missing:
+        if dtype.kind == u'b':
+            return np.dtype(object)
+        dtype = np.result_type(dtype, np.float32)
+
+    return dtype
+
+
+def _aggregate_index(run_table_list, run_name):
+    """Make the index of the combined table
+       This is a private function, not meant for general use.
+
+       Input: list of (run, dataframe) and name of the run index level
+
+       Output: Pandas MultiIndex
+    """
+
+    names = list(run_table_list[0][1].index.names)
+    for _, table in run_table_list:
+        if list(table.index.names) != names:
+            raise ValueError("The tables of every run must have the same index levels, "
+                             "but {} differs from {}".format(list(table.index.names), names))
+
+    run_array = np.empty(len(run_table_list), dtype=object)
+    run_array[:] = [run for run, _ in run_table_list]
+
+    run_codes = np.repeat(np.arange(len(run_table_list)), [len(table) for _, table in run_table_list])
+
+    level_arrays = [run_array[run_codes]]
+    for level in range(len(names)):
+        level_arrays.append(np.concatenate([np.asarray(table.index.get_level_values(level))
+                                            for _, table in run_table_list]))
+
+    return pd.MultiIndex.from_arrays(level_arrays, names=[run_name] + names)
@@ -0,0 +1,115 @@
+# coding: utf-8
+import asyncio
+from collections import OrderedDict
+
+from .read import _parse_mfoutfile, _convert_data_tags
+
+
+### Parse files from asyncio code without blocking the event loop
+
+
+async def parse_mfout_async(mfoutfilename, executor=None, cache=None):
+    """Parse a ModelFree output file without blocking the event loop
+
+       Input: path to ModelFree output file, an optional executor
+              and an optional cache
+
+              executor is None (default) to convert the data in the event
+              loop's default thread pool or a concurrent.futures executor,
+              e.g. a ProcessPoolExecutor so that conversions don't compete
+              for the interpreter lock. The file is always read in the
+              default thread pool.
+
+              cache is None (default) or a ParseCache, as for parse_mfout
+
+       Output: two dictionaries containing data and tables,
+               as created by parse_mfout
+    """
+
+    loop = asyncio.get_event_loop()
+
+    if cache is not None:
+        key = await loop.run_in_executor(None, cache.key, mfoutfilename)
+        cached = await loop.run_in_executor(None, cache.get, mfoutfilename, key)
+        if cached is not None:
+            return cached
+
+    tag_data_dict = await loop.run_in_executor(None, _parse_mfoutfile, mfoutfilename)
+    tag_dict, loop_dict = await loop.run_in_executor(executor, _convert_data_tags, tag_data_dict)
+
+    if cache is not None:
+        await loop.run_in_executor(None, cache.put, mfoutfilename, tag_dict, loop_dict, key)
+
+    return tag_dict, loop_dict
+
+
+async def parse_mfout_many_async(mfoutfilenames, concurrency=4, executor=None,
+                                 ordered=True, cache=None):
+    """Parse many ModelFree output files without blocking the event loop
+
+       Input: list of paths to ModelFree output files, the maximum number
+              of files parsed at once, an optional executor, whether results
+              should be ordered and an optional cache
+
+              executor and cache are used as for parse_mfout_async
+
+              ordered is True (default) to return the results in the order
+              of the input files or False to return them in the order they
+              are completed
+
+              If this is cancelled, the files that haven't been parsed are
+              cancelled and it only returns once all of them have stopped.
+              Conversions that have already been handed to the executor
+              are finished by the executor but their results are discarded.
+
+       Output: two dictionaries whose keys are the file names. The first
+               contains the (tag_dict, loop_dict) created by parse_mfout for
+               each file that was parsed successfully and the second contains
+               the error raised for each file that could not be parsed
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Each file is only parsed once
+    mfoutfilenames = list(OrderedDict.fromkeys(mfoutfilenames))
+
+    completed_list = list()
+
+    async def parse_one(mfoutfilename):
+        async with semaphore:
+            try:
+                result = await parse_mfout_async(mfoutfilename, executor, cache)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                completed_list.append((mfoutfilename, None, error))
+            else:
+                completed_list.append((mfoutfilename, result, None))
+        return
+
+    task_list = [asyncio.ensure_future(parse_one(mfoutfilename))
+                 for mfoutfilename in mfoutfilenames]
+
+    try:
+        await asyncio.gather(*task_list)
+    except asyncio.CancelledError:
+        # Wait for every task to finish cancelling before giving up
+        for task in task_list:
+            task.cancel()
+        await asyncio.gather(*task_list, return_exceptions=True)
+        raise
+
+    if ordered:
+        position = dict([(mfoutfilename, i) for i, mfoutfilename in enumerate(mfoutfilenames)])
+        completed_list.sort(key=lambda x: position[x[0]])
+
+    results = OrderedDict()
+    errors = OrderedDict()
+
+    for mfoutfilename, result, error in completed_list:
+        if error is None:
+            results[mfoutfilename] = result
+        else:
+            errors[mfoutfilename] = error
+
+    return results, errors
@@ -0,0 +1,294 @@
+# coding: utf-8
+import os
+import json
+import pandas as pd
+from collections import OrderedDict
+
+from .read import DataFrame
+from .write import _table_filenames
+from .spill import SpilledTable
+
+
+# Name of the metadata entry holding the key, position and print format of each table
+_METADATA_NAME = u'mfoutparser'
+
+_FILE_FORMATS = [u'hdf5', u'parquet']
+
+
+### Export data to binary files which preserve the print format
+
+
+def write_all_to_binary(tag_dict, loop_dict, filename_prefix=u'mfout', file_format=u'hdf5'):
+    """Write ModelFree parsed data to binary files which store the print
+       format of each table, so the data can be loaded again quickly
+       with `read_all_from_binary`
+
+       Input: dictionaries created by parse_mfout, filename prefix,
+              and file format
+
+              file_format is 'hdf5' (default) to write all tables to a single
+              file named with `filename_prefix` and '.h5' (requires PyTables)
+              or 'parquet' to write each table to a separate file named as
+              `write_all_to_file` would name it, but ending in '.parquet',
+              along with a list of the tables in `filename_prefix` and
+              '_tables.json' (requires pyarrow)
+
+              Tables spilled to disk by `parse_mfout` are copied to
+              the Parquet files a chunk at a time, and can't be written
+              to HDF5 without reading them into memory first
+
+       Output: binary file(s)
+    """
+
+    table_list = _binary_table_list(tag_dict, loop_dict, filename_prefix)
+
+    if file_format == u'hdf5':
+        spilled = [metadata[u'key'] for _, metadata, dataframe in table_list
+                   if isinstance(dataframe, SpilledTable)]
+        if len(spilled) > 0:
+            raise TypeError(u'The spilled tables {} can only be written with the parquet '
+                            u'file_format, or after reading them with read()'.format(spilled))
+
+        _write_hdf5(table_list, filename_prefix + u'.h5')
+    elif file_format == u'parquet':
+        _write_parquet(table_list, _manifest_filename(filename_prefix))
+    else:
+        raise ValueError("The file_format must be one of the following: {}".format(_FILE_FORMATS))
+
+    return
+
+
+def read_all_from_binary(filename_prefix=u'mfout', file_format=u'hdf5'):
+    """Read ModelFree parsed data written by `write_all_to_binary`
+
+       Input: filename prefix and file format, which are the same
+              as those used to write the data
+
+       Output: two dictionaries containing data and tables, as
+               created by parse_mfout, with the print format of
+               each table restored
+    """
+
+    if file_format == u'hdf5':
+        table_list = _read_hdf5(filename_prefix + u'.h5')
+    elif file_format == u'parquet':
+        table_list = _read_parquet(_manifest_filename(filename_prefix))
+    else:
+        raise ValueError("The file_format must be one of the following: {}".format(_FILE_FORMATS))
+
+    tag_dict = OrderedDict()
+    loop_dict = OrderedDict()
+
+    # Restore the tables in their original order
+    for metadata, dataframe in sorted(table_list, key=lambda x: x[0][u'position']):
+        dataframe = DataFrame(dataframe)
+        dataframe._print_format = metadata[u'print_format']
+
+        if metadata[u'kind'] == u'tag':
+            tag_dict[metadata[u'key']] = dataframe
+        else:
+            loop_dict[metadata[u'key']] = dataframe
+
+    return tag_dict, loop_dict
+
+
+def _binary_table_list(tag_dict, loop_dict, filename_prefix):
+    """Collect the tables to be written along with their metadata
+       This is a private function, not meant for general use.
+
+       Input: dictionaries created by parse_mfout, filename prefix
+
+       Output: list of (file name, metadata, dataframe)
+    """
+
+    table_list = list()
+
+    for kind, tag_loop_dict in [(u'tag', tag_dict), (u'loop', loop_dict)]:
+
+        kind_prefix = kind
+        if filename_prefix != u'':
+            kind_prefix = u'_'.join([filename_prefix, kind])
+
+        for filename, key in _table_filenames(tag_loop_dict, kind_prefix):
+            dataframe = tag_loop_dict[key]
+            metadata = {u'kind': kind, u'key': key, u'position': len(table_list),
+                        u'print_format': getattr(dataframe, u'_print_format', dict())}
+
+            filename = filename[:-len(u'.tsv')]
+            table_list.append((filename, metadata, dataframe))
+
+    return table_list
+
+
+### HDF5 files: a single file with a node for each table
+
+
+def _write_hdf5(table_list, filename):
+    """Write all tables to an HDF5 file
+       This is a private function, not meant for general use.
+
+       Input: list of tables and metadata, file name
+
+       Output: HDF5 file
+    """
+
+    with pd.HDFStore(filename, mode=u'w') as store:
+        for _, metadata, dataframe in table_list:
+            node = u'/'.join([metadata[u'kind'], metadata[u'key']])
+
+            # Categorical columns, e.g. of compacted tables, can't be stored in
+            # the fixed format, so they are stored as strings and listed to be
+            # converted back when read
+            categorical = [col for col in dataframe.columns
+                           if dataframe[col].dtype.name == u'category']
+            metadata = dict(metadata, categorical=categorical)
+
+            # The caller's table is left unchanged
+            dataframe = pd.DataFrame(dataframe).astype(dict([(col, object) for col in categorical]))
+
+            store.put(node, dataframe, format=u'fixed')
+            store.get_storer(node).attrs[_METADATA_NAME] = json.dumps(metadata)
+
+    return
+
+
+def _read_hdf5(filename):
+    """Read all tables from an HDF5 file
+       This is a private function, not meant for general use.
+
+       Input: file name
+
+       Output: list of (metadata, dataframe)
+    """
+
+    table_list = list()
+
+    with pd.HDFStore(filename, mode=u'r') as store:
+        for node in store.keys():
+            metadata = json.loads(store.get_storer(node).attrs[_METADATA_NAME])
+            dataframe = store.get(node)
+
+            for col in metadata.get(u'categorical', list()):
+                dataframe[col] = dataframe[col].astype(u'category')
+
+            table_list.append((metadata, dataframe))
+
+    return table_list
+
+
+### Parquet files: a file for each table
+
+
+def _manifest_filename(filename_prefix):
+    """Make the name of the file listing the Parquet files written together
+       This is a private function, not meant for general use.
+
+       Input: filename prefix
+
+       Output: file name
+    """
+
+    if filename_prefix != u'':
+        return u'_'.join([filename_prefix, u'tables.json'])
+
+    return u'tables.json'
+
+
+def _write_parquet(table_list, manifest_filename):
+    """Write each table to a Parquet file and list the files
+       This is a private function, not meant for general use.
+
+       Input: list of tables and metadata, name of the list of files
+
+       Output: Parquet files and a JSON list of them
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    for filename, metadata, dataframe in table_list:
+        if isinstance(dataframe, SpilledTable):
+            _write_spilled_parquet(dataframe, metadata, filename + u'.parquet')
+            continue
+
+        table = _add_parquet_metadata(pa.Table.from_pandas(dataframe), metadata)
+        pq.write_table(table, filename + u'.parquet')
+
+    # The list is written last, so it only names the complete files of this write
+    # and any other files with the same prefix (e.g. from an earlier write) are ignored
+    with open(manifest_filename, 'w') as manifest_file:
+        json.dump([os.path.basename(filename) + u'.parquet' for filename, _, _ in table_list],
+                  manifest_file)
+
+    return
+
+
+def _add_parquet_metadata(table, metadata):
+    """Add the metadata of a table to that stored by pyarrow for pandas
+       This is a private function, not meant for general use.
+
+       Input: pyarrow table and metadata
+
+       Output: pyarrow table
+    """
+
+    schema_metadata = dict(table.schema.metadata or dict())
+    schema_metadata[_METADATA_NAME.encode(u'utf-8')] = json.dumps(metadata).encode(u'utf-8')
+
+    return table.replace_schema_metadata(schema_metadata)
+
+
+def _write_spilled_parquet(spilled_table, metadata, filename):
+    """Copy a spilled table to a Parquet file a chunk at a time
+       This is a private function, not meant for general use.
+
+       Input: SpilledTable, metadata and file name
+
+       Output: Parquet file
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        # The index isn't stored, so the table is read back with
+        # the same range index as a table parsed in memory
+        for dataframe in spilled_table.iter_chunks():
+            if writer is None:
+                table = _add_parquet_metadata(pa.Table.from_pandas(pd.DataFrame(dataframe),
+                                                                   preserve_index=False), metadata)
+                writer = pq.ParquetWriter(filename, table.schema)
+            else:
+                table = pa.Table.from_pandas(pd.DataFrame(dataframe), schema=writer.schema,
+                                             preserve_index=False)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return
+
+
+def _read_parquet(manifest_filename):
+    """Read all tables listed as written together to Parquet files
+       This is a private function, not meant for general use.
+
+       Input: name of the list of files
+
+       Output: list of (metadata, dataframe)
+    """
+
+    import pyarrow.parquet as pq
+
+    with open(manifest_filename, 'r') as manifest_file:
+        parquet_filename_list = json.load(manifest_file)
+
+    table_list = list()
+
+    for parquet_filename in parquet_filename_list:
+        table = pq.read_table(os.path.join(os.path.dirname(manifest_filename), parquet_filename))
+        metadata = table.schema.metadata[_METADATA_NAME.encode(u'utf-8')]
+        table_list.append((json.loads(metadata.decode(u'utf-8')), table.to_pandas()))
+
+    return table_list
@@ -0,0 +1,198 @@
+# coding: utf-8
+import os
+import hashlib
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from .version import VERSION
+
+
+### A persistent cache of parsed ModelFree output files
+
+
+class ParseCache(object):
+    """An on-disk cache of the dictionaries created by `parse_mfout`.
+       Pass an instance to `parse_mfout` as `cache` to use it:
+
+       cache = mf.ParseCache('mfout_cache')
+       tag_dict, loop_dict = mf.parse_mfout('mfout', cache=cache)
+
+       Each file is stored under its absolute path along with its size and
+       modification time (and optionally a hash of its contents), so a
+       cached result is only used if the file is unchanged. The parsed data
+       are stored as pickles, which preserve the '_print_format' of each
+       dataframe. When the cache grows beyond `max_size` bytes, the least
+       recently used files are removed.
+    """
+
+    extension = '.mfcache'
+
+    def __init__(self, cache_dir=None, max_size=2**30, use_hash=False):
+        """Input: directory for the cache files (default is
+                  '.mfoutparser_cache' in the home directory),
+                  maximum size of the cache in bytes (None for no limit),
+                  and whether the file contents should be hashed
+
+                  use_hash is False (default) to identify an unchanged file
+                  by its size and modification time only or True to also
+                  compare a hash of its contents, which requires reading
+                  the file
+        """
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.mfoutparser_cache')
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.use_hash = use_hash
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        return
+
+
+    def get(self, mfoutfilename, key=None):
+        """Return the cached (tag_dict, loop_dict) for a file or None
+           if the file is not cached or has changed since it was cached.
+           An entry that can't be loaded, e.g. because it was written with
+           other versions of pandas or numpy, is removed and treated as missing.
+
+           key is None (default) to identify the file as it is now, or
+           the key returned by `key` for the file
+        """
+
+        entry = self._entry_path(mfoutfilename)
+        if not os.path.exists(entry):
+            return None
+
+        if key is None:
+            key = self.key(mfoutfilename)
+
+        try:
+            with open(entry, 'rb') as entryfile:
+                # The key is stored first so the data are only
+                # loaded if they are still valid
+                if pickle.load(entryfile) != key:
+                    return None
+                tag_dict, loop_dict = pickle.load(entryfile)
+        except Exception:
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+
+        return tag_dict, loop_dict
+
+
+    def put(self, mfoutfilename, tag_dict, loop_dict, key=None):
+        """Store the parsed dictionaries for a file and
+           remove old entries if the cache is too large
+
+           key is None (default) to identify the file as it is now, or
+           the key returned by `key` before the file was parsed, so that
+           data parsed from a file that changed during parsing are never
+           used
+        """
+
+        entry = self._entry_path(mfoutfilename)
+        if key is None:
+            key = self.key(mfoutfilename)
+
+        # Write to a temporary file first so a partially
+        # written entry is never read
+        handle, tmpname = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(handle, 'wb') as entryfile:
+                pickle.dump(key, entryfile, pickle.HIGHEST_PROTOCOL)
+                pickle.dump((tag_dict, loop_dict), entryfile, pickle.HIGHEST_PROTOCOL)
+            getattr(os, 'replace', os.rename)(tmpname, entry)
+        except Exception:
+            os.remove(tmpname)
+            raise
+
+        self._evict()
+
+        return
+
+
+    def invalidate(self, mfoutfilename=None):
+        """Remove the cached data for a file, or for all files if
+           no file name is given
+        """
+
+        if mfoutfilename is None:
+            entry_list = self._entry_list()
+        else:
+            entry_list = [self._entry_path(mfoutfilename)]
+
+        for entry in entry_list:
+            if os.path.exists(entry):
+                os.remove(entry)
+
+        return
+
+
+    def size(self):
+        """Return the total size of the cache files in bytes"""
+
+        return sum(os.path.getsize(entry) for entry in self._entry_list())
+
+
+    def _entry_path(self, mfoutfilename):
+        # There is one entry per file, named after its absolute path
+        path = os.path.abspath(mfoutfilename)
+        name = hashlib.sha1(path.encode(u'utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + self.extension)
+
+
+    def _entry_list(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith(self.extension)]
+
+
+    def key(self, mfoutfilename):
+        """Return everything that must match for cached data to be valid,
+           including the version of mfoutparser that parsed the data
+        """
+
+        stat = os.stat(mfoutfilename)
+        key = (VERSION, os.path.abspath(mfoutfilename), stat.st_size, stat.st_mtime)
+
+        if self.use_hash:
+            content_hash = hashlib.sha1()
+            with open(mfoutfilename, 'rb') as mfoutfile:
+                for chunk in iter(lambda: mfoutfile.read(2**20), b''):
+                    content_hash.update(chunk)
+            key += (content_hash.hexdigest(),)
+
+        return key
+
+
+    def _evict(self):
+        # Remove the least recently used entries until the cache fits
+        if self.max_size is None:
+            return
+
+        entry_list = [(os.path.getmtime(entry), os.path.getsize(entry), entry)
+                      for entry in self._entry_list()]
+        total_size = sum(entry[1] for entry in entry_list)
+
+        for _, size, entry in sorted(entry_list):
+            if total_size <= self.max_size:
+                break
+            os.remove(entry)
+            total_size -= size
+
+        return
@@ -0,0 +1,217 @@
+# coding: utf-8
+import io
+import os
+import sys
+import fnmatch
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .read import parse_mfout
+from .write import write_all_to_file
+from .binary import write_all_to_binary
+
+
+# The extension(s) of the files written for each output format
+_EXTENSIONS = {u'tsv': u'.tsv', u'hdf5': u'.h5', u'parquet': u'.parquet'}
+
+# The extension of the file written once all of the converted files are complete
+_MARKER_EXTENSION = u'.converted'
+
+# Other files written along with the converted files
+_OTHER_ENDINGS = (_MARKER_EXTENSION, u'_tables.json')
+
+
+### Convert a tree of ModelFree output files from the command line
+
+
+def main(argv=None):
+    """Convert ModelFree output files to tab-separated or binary files.
+       This is the `mfoutparser-convert` console script.
+
+       Input: command line arguments (default is sys.argv)
+
+       Output: exit status, which is 1 if any file could not be converted
+    """
+
+    parser = argparse.ArgumentParser(prog=u'mfoutparser-convert',
+                                     description=u'Convert ModelFree output files to tab-separated '
+                                                 u'or binary files, named as write_all_to_file names them.')
+    parser.add_argument(u'paths', nargs=u'+',
+                        help=u'ModelFree output files or directories that are searched for them')
+    parser.add_argument(u'--pattern', default=u'mfout*',
+                        help=u'file name pattern of the output files in directories (default: %(default)s)')
+    parser.add_argument(u'--format', dest=u'file_format', choices=sorted(_EXTENSIONS), default=u'tsv',
+                        help=u'format of the converted files (default: %(default)s)')
+    parser.add_argument(u'--output-dir',
+                        help=u'directory for the converted files, with the same layout as the input '
+                             u'directories (default is the directory of each input file)')
+    parser.add_argument(u'--workers', type=int, default=1,
+                        help=u'number of files converted at once (default: %(default)s)')
+    parser.add_argument(u'--force', action=u'store_true',
+                        help=u'convert files even if they have been converted since they last changed')
+    args = parser.parse_args(argv)
+
+    job_list = list()
+    for mfoutfilename, relative_dir in find_mfout_files(args.paths, args.pattern):
+        if args.output_dir is None:
+            output_dir = os.path.dirname(mfoutfilename)
+        else:
+            output_dir = os.path.join(args.output_dir, relative_dir)
+
+        filename_prefix = os.path.join(output_dir, os.path.basename(mfoutfilename))
+
+        if args.force or not is_converted(mfoutfilename, filename_prefix, args.file_format):
+            job_list.append((mfoutfilename, filename_prefix, args.file_format))
+        else:
+            _report(mfoutfilename, u'skipped (unchanged)')
+
+    errors = convert_files(job_list, args.workers)
+
+    return 1 if len(errors) > 0 else 0
+
+
+def find_mfout_files(paths, pattern=u'mfout*'):
+    """Find ModelFree output files
+
+       Input: list of files and directories, and the file name
+              pattern of output files in the directories
+
+       Output: list of (file name, directory relative to the
+               searched directory) for each file found
+    """
+
+    mfoutfilenames = list()
+
+    for path in paths:
+        if not os.path.isdir(path):
+            mfoutfilenames.append((path, u''))
+            continue
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(fnmatch.filter(filenames, pattern)):
+                mfoutfilenames.append((os.path.join(dirpath, filename),
+                                       os.path.relpath(dirpath, path)))
+
+    # Converted files that match the pattern are not inputs
+    extensions = tuple(_EXTENSIONS.values()) + _OTHER_ENDINGS
+    return [x for x in OrderedDict.fromkeys(mfoutfilenames) if not x[0].endswith(extensions)]
+
+
+def is_converted(mfoutfilename, filename_prefix, file_format=u'tsv'):
+    """Check if a file has been converted since it last changed
+
+       Input: ModelFree output file name, prefix of the converted
+              files and their format
+
+       Output: True if a conversion was completed and is not
+               older than the ModelFree output file
+    """
+
+    # The files of a conversion that didn't finish have no marker
+    marker_filename = _marker_filename(filename_prefix, file_format)
+
+    if not os.path.exists(marker_filename):
+        return False
+
+    return os.path.getmtime(marker_filename) >= os.path.getmtime(mfoutfilename)
+
+
+def convert_file(mfoutfilename, filename_prefix, file_format=u'tsv'):
+    """Parse a ModelFree output file and write all of its tables
+
+       Input: ModelFree output file name, prefix of the
+              converted files and their format
+
+       Output: tab-separated or binary files, and a marker
+               file written once they are all complete
+    """
+
+    output_dir = os.path.dirname(filename_prefix)
+    if output_dir and not os.path.isdir(output_dir):
+        try:
+            os.makedirs(output_dir)
+        except OSError:
+            # Another worker may have made it
+            if not os.path.isdir(output_dir):
+                raise
+
+    # Any earlier conversion is no longer complete once it starts to be overwritten
+    marker_filename = _marker_filename(filename_prefix, file_format)
+    if os.path.exists(marker_filename):
+        os.remove(marker_filename)
+
+    mfout_mtime = os.path.getmtime(mfoutfilename)
+    tag_dict, loop_dict = parse_mfout(mfoutfilename)
+
+    # Otherwise nothing would be written and the file would be converted again every time
+    if (len(tag_dict) == 0) and (len(loop_dict) == 0):
+        raise ValueError(u'no data tags were found')
+
+    if file_format == u'tsv':
+        write_all_to_file(tag_dict, loop_dict, filename_prefix)
+    else:
+        write_all_to_binary(tag_dict, loop_dict, filename_prefix, file_format)
+
+    with io.open(marker_filename, 'w', encoding=u'utf-8') as marker_file:
+        marker_file.write(u'{}\n'.format(os.path.abspath(mfoutfilename)))
+
+    # The marker has the time of the file that was parsed, so
+    # changes made while it was being converted aren't missed
+    os.utime(marker_filename, (mfout_mtime, mfout_mtime))
+
+    return
+
+
+def convert_files(job_list, workers=1):
+    """Convert many ModelFree output files, reporting each one as it finishes
+
+       Input: list of (file name, prefix, format) and number of processes
+
+       Output: dictionary of the error raised for each file that
+               could not be converted
+    """
+
+    errors = OrderedDict()
+
+    if workers == 1:
+        for job in job_list:
+            try:
+                convert_file(*job)
+                _report(job[0], u'converted')
+            except Exception as error:
+                errors[job[0]] = error
+                _report(job[0], u'failed ({})'.format(error))
+
+        return errors
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        future_dict = dict([(executor.submit(convert_file, *job), job[0]) for job in job_list])
+
+        for future in as_completed(future_dict):
+            mfoutfilename = future_dict[future]
+            try:
+                future.result()
+                _report(mfoutfilename, u'converted')
+            except Exception as error:
+                errors[mfoutfilename] = error
+                _report(mfoutfilename, u'failed ({})'.format(error))
+
+    return errors
+
+
+def _marker_filename(filename_prefix, file_format):
+    # e.g. mfout.tsv.converted, so each format is marked separately
+    return u''.join([filename_prefix, u'.', file_format, _MARKER_EXTENSION])
+
+
+def _report(mfoutfilename, status):
+    # One line per file, so the output can be followed or filtered
+    sys.stdout.write(u'{}: {}\n'.format(mfoutfilename, status))
+    sys.stdout.flush()
+    return
+
+
+if __name__ == u'__main__':
+    sys.exit(main())
@@ -1,38 +1,103 @@
 # coding: utf-8
+import numpy as np
+import pandas as pd
 from .read import DataFrame
 
 
+# Print format of the covariances when that of the correlation data is unknown
+_COVARIANCE_PRINT_FORMAT = u'{:.4f}'
+
+
 ### A function to handle creation and display of the correlation matrix
 
 
-def make_correlation_matrices(dataframe):
-    """Convert a dataframe of correlation data into a matrix
+def make_correlation_tensor(dataframe):
+    """Convert a dataframe of correlation data into a dense array
+       containing the correlation matrix for each residue
 
        Input: Pandas dataframe containing correlation data
 
-       Output: Pandas dataframe with data manipulated into matrices
+       Output: numpy array of shape (residue, parameter, parameter),
+               array of residue labels, array of parameter labels and
+               the print format of the covariances. Both sets of labels
+               are sorted and the entries for pairs of parameters that
+               are not in the data are NaN.
     """
 
-    # Group the data by residue then use a pivot table-like function
-    # to create correlation matrices
+    # The print format travels with the array, so the matrices are written as parsed
+    print_format = getattr(dataframe, u'_print_format', dict()).get(u'covariance',
+                                                                     _COVARIANCE_PRINT_FORMAT)
+
     if u'residue' in dataframe.index.names:
-        correlation_group = dataframe.reset_index().groupby(u'residue')
-    else:
-        correlation_group = dataframe.groupby(u'residue')
+        dataframe = dataframe.reset_index()
+
+    name_1 = dataframe[u'model_free_name_1'].values
+    name_2 = dataframe[u'model_free_name_2'].values
+
+    # Integer codes for the residues and parameters of each row
+    residue_codes, residues = pd.factorize(dataframe[u'residue'].values, sort=True)
+    parameters = np.unique(np.concatenate([name_1, name_2]))
+
+    # Scatter all of the covariances into the array at once
+    tensor = np.full((len(residues), len(parameters), len(parameters)), np.nan)
+    tensor[residue_codes,
+           np.searchsorted(parameters, name_1),
+           np.searchsorted(parameters, name_2)] = dataframe[u'covariance'].values
+
+    return tensor, np.asarray(residues), parameters, print_format
+
+
+def correlation_tensor_to_matrices(tensor, residues, parameters,
+                                   print_format=_COVARIANCE_PRINT_FORMAT):
+    """Convert an array of correlation matrices, as created by
+       `make_correlation_tensor`, into a dataframe of matrices
+
+       Input: numpy array of shape (residue, parameter, parameter),
+              array of residue labels, array of parameter labels and the
+              print format for the covariances, as returned together by
+              `make_correlation_tensor`
+
+       Output: Pandas dataframe with data manipulated into matrices
+    """
+
+    index = pd.MultiIndex.from_product([residues, parameters],
+                                       names=[u'residue', u'model_free_name_1'])
+    matrices = tensor.reshape(len(residues) * len(parameters), len(parameters))
+
+    # Only keep the parameters which are present in the data
+    has_row = ~np.isnan(matrices).all(axis=1)
+    has_column = ~np.isnan(matrices).all(axis=0)
+
+    correlation_matrix = DataFrame(matrices[has_row][:, has_column],
+                                   index=index[has_row], columns=parameters[has_column])
+
+    correlation_matrix._print_format = dict([(col, print_format)
+                                             for col in correlation_matrix.columns])
+
+    return correlation_matrix
+
 
-    correlation_matrix = correlation_group.apply(lambda x: x.pivot(index=u'model_free_name_1', 
-                                                                   columns=u'model_free_name_2', 
-                                                                   values=u'covariance'))
-    correlation_matrix = DataFrame(correlation_matrix)
+def make_correlation_matrices(dataframe):
+    """Convert a dataframe of correlation data into a matrix
+
+       Input: Pandas dataframe containing correlation data
+
+       Output: Pandas dataframe with data manipulated into matrices
+    """
 
-    # Pandas groupby doesn't preserve the print formatter
-    correlation_matrix = correlation_matrix.__finalize__(dataframe, 'copy')
+    # Build the dense array of matrices for all residues
+    # and then lay out the matrix for each residue as a table
+    tensor, residues, parameters, covariance_format = make_correlation_tensor(dataframe)
+    correlation_matrix = correlation_tensor_to_matrices(tensor, residues, parameters,
+                                                        covariance_format)
 
-    # Append columns for each of the parameters in 'model_free_name_2'
-    new_col_names = dataframe.model_free_name_2.unique()
+    # Preserve the print formatter of the correlation data
+    # and use the covariance format for each of the parameters
+    print_format = dict(getattr(dataframe, u'_print_format', None) or dict())
+    for col in correlation_matrix.columns:
+        print_format[col] = covariance_format
 
-    for col in new_col_names:
-        correlation_matrix._print_format[col] = correlation_matrix._print_format['covariance']
+    correlation_matrix._print_format = print_format
 
     return correlation_matrix
 
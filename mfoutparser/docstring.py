@@ -14,10 +14,32 @@ a depth of two only).
 Numpy (tested on version 1.10.1) and Pandas (tested on version 0.17.1) 
 libraries. IPython notebook (version >= 3.2.1) is required to run the
 demonstration notebook located in the `examples` directory. Matplotlib 
-is required if plotting of the data is desired.
+is required if plotting of the data is desired. PyTables or pyarrow is 
+required to write and read binary (HDF5 or Parquet) files.
 
 See the `examples` directory in the installation for a demonstration or
 run the following from the command line:
 
 python -c 'import mfoutparser as mf; mf.copy_examples()'
-"""
\ No newline at end of file
+"""
+
+DATAFRAME_DOCSTRING = """`mfoutparser` creates a custom dataframe class, called DataFrame, that is essentially
+       identical to (and based on) Pandas dataframe, with the following minor changes:
+
+       1. The function used to display the dataframe in the html IPython notebook 
+       will filter out the NaN values before displaying the table. It is important to 
+       leave the NaN values in place in the underlying table for mathematical manipulation.
+
+       2. This dataframe also contains a custom attribute called '_print_format' that 
+       contains a dictionary whose keys correspond to the original format 
+       (decimal places) of float columns when read from the Model-Free output files. 
+       This dictionary can be used to ensure the correct float format is preserved when
+       writing the data to tab delimited files. Dataframes derived from one another 
+       (e.g. by selecting rows) share the same dictionary, which is then read-only, so
+       the format of one of them is changed by assigning it a new dictionary:
+       df._print_format = dict(df._print_format, fit_value='{:.3f}'). The formats of
+       concatenated or merged dataframes are combined, using the most decimal places
+       for each column.
+
+       Type 'help(mf.DataFrame)' for more information.
+    """
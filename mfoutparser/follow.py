@@ -0,0 +1,116 @@
+# coding: utf-8
+import os
+from collections import OrderedDict
+
+from .read import _convert_data_tag, _index_data_tags, _read_data_tag
+
+
+### Incremental parsing of a ModelFree output file that is still being written
+
+
+class MfoutFollower(object):
+    """Parse a ModelFree output file as it is written, e.g. during a long
+       simulation run. Each call to `poll` reads only the part of the file
+       that hasn't been parsed yet and adds the data tags that have been
+       completed since the last call to `tag_dict` and `loop_dict`, which
+       are updated in place:
+
+       follower = mf.MfoutFollower('mfout')
+       tag_dict, loop_dict = follower.tag_dict, follower.loop_dict
+       follower.poll()
+
+       A data tag is complete once the next data tag has begun, so the last
+       data tag in the file is only parsed with `poll(final=True)`, after the
+       run has finished. If the file becomes shorter or is replaced, it is
+       parsed again from the beginning.
+    """
+
+    def __init__(self, mfoutfilename):
+        """Input: path to ModelFree output file, which need not exist yet"""
+
+        self.mfoutfilename = mfoutfilename
+        self.tag_dict = OrderedDict()
+        self.loop_dict = OrderedDict()
+        self.data_tags = list()
+        self.offset = 0
+
+        self._file_id = None
+        self._header_keys = list()
+
+        return
+
+
+    def poll(self, final=False):
+        """Parse the data tags completed since the last call
+
+           Input: whether the file is finished, in which case the
+                  last data tag is also parsed
+
+           Output: list of the names of the data tags that were parsed
+        """
+
+        try:
+            stat = os.stat(self.mfoutfilename)
+        except OSError:
+            return list()
+
+        # Start again if the file was replaced or truncated
+        file_id = (stat.st_dev, stat.st_ino)
+        if (file_id != self._file_id) or (stat.st_size < self.offset):
+            self.reset()
+            self._file_id = file_id
+
+        if stat.st_size == self.offset:
+            return list()
+
+        # Only the data after the last parsed data tag are read
+        with open(self.mfoutfilename, 'rb') as mfoutfile:
+            mfoutfile.seek(self.offset)
+            buffer = mfoutfile.read(stat.st_size - self.offset)
+
+        data_tag_index = list(_index_data_tags(buffer).items())
+        if not final:
+            data_tag_index = data_tag_index[:-1]
+
+        parsed_list = list()
+        for key, (start, end) in data_tag_index:
+            self._add_data_tag(key, _read_data_tag(buffer, start, end))
+            parsed_list.append(key)
+
+        # The next read begins with the first data tag that wasn't parsed
+        if len(data_tag_index) > 0:
+            self.offset += data_tag_index[-1][1][1]
+
+        return parsed_list
+
+
+    def reset(self):
+        """Remove all parsed data so the file is parsed again from the beginning"""
+
+        self.tag_dict.clear()
+        self.loop_dict.clear()
+        del self.data_tags[:]
+        self.offset = 0
+        self._file_id = None
+        self._header_keys = list()
+
+        return
+
+
+    def _add_data_tag(self, key, text):
+        # Convert a data tag and add its tables as parse_mfout would
+        block_tag_dict, block_loop_dict = _convert_data_tag(key, text)
+        self.tag_dict.update(block_tag_dict)
+        self.loop_dict.update(block_loop_dict)
+
+        if key not in self.data_tags:
+            self.data_tags.append(key)
+
+        if key == u'data_header':
+            self._header_keys = list(block_loop_dict.keys())
+
+        # The header tables are kept after all other tables
+        for header_key in self._header_keys:
+            self.loop_dict[header_key] = self.loop_dict.pop(header_key)
+
+        return
@@ -0,0 +1,127 @@
+# coding: utf-8
+import sys
+import numpy as np
+import pandas as pd
+
+# General string class is different in Python 2 and 3....
+if sys.version_info[0] == 2:
+    _string_types = basestring
+else:
+    _string_types = str
+
+
+# String columns with at most this fraction of unique values are stored as categoricals
+_CATEGORY_FRACTION = 0.5
+
+
+### Reduce the memory used by parsed data
+
+
+def compact_tables(tag_loop_dict):
+    """Reduce the memory used by the tables in a dictionary created by
+       `parse_mfout`. The tables are changed in place:
+
+       - String columns in which most values are repeated (such as
+         'model_free_name' or 'relaxation_rate_name') become categoricals
+       - Integer columns use the smallest integer type that holds them
+       - Float columns become float32 if every value is still printed
+         the same with the column's print format
+
+       The same is done by `parse_mfout` when `compact=True`. Tables 
+       that were spilled to disk (see `parse_mfout`) are left as they are.
+
+       Input: dictionary of dataframes
+
+       Output: the same dictionary
+    """
+
+    for key in tag_loop_dict.keys():
+        if isinstance(tag_loop_dict[key], pd.DataFrame):
+            _compact_table(tag_loop_dict[key])
+
+    return tag_loop_dict
+
+
+def memory_footprint(tag_loop_dict):
+    """Report the memory used by each table in a dictionary created by
+       `parse_mfout`, including the contents of string columns. Tables
+       that were spilled to disk use no memory.
+
+       Input: dictionary of dataframes
+
+       Output: Pandas dataframe with the number of rows, columns and
+               bytes of each table
+    """
+
+    footprint = pd.DataFrame([(key, table.shape[0], table.shape[1],
+                               int(table.memory_usage(index=True, deep=True).sum())
+                               if isinstance(table, pd.DataFrame) else 0)
+                              for key, table in tag_loop_dict.items()],
+                             columns=[u'table', u'rows', u'columns', u'bytes'])
+
+    return footprint.set_index(u'table')
+
+
+def _compact_table(dataframe):
+    """Convert the columns of a table to smaller types
+       This is a private function, not meant for general use.
+
+       Input: dataframe
+
+       Output: dataframe, changed in place
+    """
+
+    print_format = getattr(dataframe, u'_print_format', dict())
+
+    for col in dataframe.columns:
+        values = dataframe[col]
+
+        if values.dtype == np.object_:
+            if _is_repeated_strings(values):
+                dataframe[col] = values.astype(u'category')
+
+        elif values.dtype.kind in u'iu':
+            dataframe[col] = pd.to_numeric(values, downcast=u'integer')
+
+        elif (values.dtype == np.float64) and (col in print_format):
+            if _prints_same_as_float32(values.values, print_format[col]):
+                dataframe[col] = values.astype(np.float32)
+
+    return dataframe
+
+
+def _is_repeated_strings(values):
+    """Check that a column only contains strings and that
+       few enough are unique to be worth storing as a categorical
+       This is a private function, not meant for general use.
+
+       Input: Pandas series
+
+       Output: boolean
+    """
+
+    number_unique = values.nunique()
+
+    if (len(values) < 2) or (number_unique > _CATEGORY_FRACTION * len(values)):
+        return False
+
+    return all(isinstance(x, _string_types) for x in values.dropna().unique())
+
+
+def _prints_same_as_float32(values, print_format):
+    """Check that every value prints the same after conversion to float32
+       This is a private function, not meant for general use.
+
+       Input: numpy array and print format
+
+       Output: boolean
+    """
+
+    values_32 = values.astype(np.float32).astype(np.float64)
+
+    # Only the values that changed need to be checked
+    changed = (values != values_32) & ~np.isnan(values)
+
+    formatter = print_format.format
+    return all(formatter(x) == formatter(y) for x, y
+               in zip(values[changed].tolist(), values_32[changed].tolist()))
@@ -1,33 +1,86 @@
 # coding: utf-8
+import os
 import re
 import sys
+import mmap
 import pandas as pd
 from pandas import DataFrame as pd_DataFrame
+from pandas import get_option
 import numpy as np
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-### A custom class to handle display and formatting of data during output
+from .memory import compact_tables
+from .schema import get_schema_types, INT, FLOAT, STRING
+from .docstring import DATAFRAME_DOCSTRING
 
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
-class DataFrame(pd_DataFrame):
-    """`mfoutparser` creates a custom dataframe class, called DataFrame, that is essentially
-       identical to (and based on) Pandas dataframe, with the following minor changes:
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+# General string class is different in Python 2 and 3....
+if sys.version_info[0] == 2:
+    _string_types = basestring
+else:
+    _string_types = str
+
+# Number of rows formatted at a time when writing data to file
+_CSV_CHUNKSIZE = 100000
 
-       1. The function used to display the dataframe in the html IPython notebook 
-       will filter out the NaN values before displaying the table. It is important to 
-       leave the NaN values in place in the underlying table for mathematical manipulation.
+# Extensions of the files that Pandas compresses
+_COMPRESSED_EXTENSIONS = (u'.gz', u'.bz2', u'.zip', u'.xz', u'.zst', u'.tar')
 
-       2. This dataframe also contains a custom attribute called '_print_format' that 
-       contains a dictionary whose keys correspond to the original format 
-       (decimal places) of float columns when read from the Model-Free output files. 
-       This dictionary can be used to ensure the correct float format is preserved when
-       writing the data to tab delimited files.
+# The parts of a float print format such as '{:.4f}' or '{:.3E}'
+_FORMAT_REGEX = re.compile(r"""^\{:\.(\d+)([fE])\}$""")
+
+
+### A custom class to handle display and formatting of data during output
 
-       Type 'help(mf.DataFrame)' for more information.
+
+class _SharedPrintFormat(dict):
+    """The print format shared by dataframes derived from one another,
+       which is read-only so that changing the format of one of them
+       can't change the others
+       This is a private class, not meant for general use.
     """
 
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(u'The print format is shared with the dataframes this one was derived '
+                        u'from (or to), so assign a new one instead, e.g. '
+                        u'df._print_format = dict(df._print_format, fit_value=\'{:.3f}\')')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+    def __reduce__(self):
+        # Unpickled without calling the read-only methods
+        return (type(self), (dict(self),))
+
+
+    def __copy__(self):
+        return self
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class DataFrame(pd_DataFrame):
+    # The docstring is kept with the package docstring, 
+    # so it can be shown without importing pandas
+    __doc__ = DATAFRAME_DOCSTRING
+
     # TODO check that docstrigns are correct for the over written methods
 
+    # Attributes that Pandas propagates to the dataframes derived from this one
+    _metadata = ['_print_format']
+
     @property
     def _constructor(self):
         return DataFrame
@@ -38,38 +91,94 @@ class DataFrame(pd_DataFrame):
         # then also add a _print_format property
         super(DataFrame, self).__init__(*args, **kwargs)
 
-        # Create print formatter and append to method list which helps with propagation
+        # Create print formatter, which is replaced when the dataframe
+        # is derived from another one or the data are parsed
         self._print_format = dict()
-        if '_print_format' not in self._metadata:
-            self._metadata.append('_print_format')
 
         return
 
 
     def __finalize__(self, other, method=None, **kwargs):
         # propagate metadata from other to self
-        # other : the object from which to get the attributes that we are going to propagate
-        # method : optional, a passed method name, usually set to 'copy' if used
-
-        if isinstance(other, pd.core.generic.NDFrame):
-            for name in self._metadata:
-                if method is None:
-                    object.__setattr__(self, name, getattr(other, name, None))
-                elif method is 'copy':
-                    object.__setattr__(self, name, getattr(other, name, None).copy())
+        # other : the object from which to get the attributes that we are going to propagate,
+        #         or the object that concatenated or merged several dataframes
+        # method : optional, a passed method name, such as 'concat' or 'merge'
+
+        if method == u'concat':
+            source_list = getattr(other, u'objs', list())
+        elif method == u'merge':
+            source_list = [getattr(other, u'left', None), getattr(other, u'right', None)]
+        else:
+            source_list = [other]
+
+        source_list = [x for x in source_list if isinstance(x, pd.core.generic.NDFrame)]
+
+        for name in self._metadata:
+            source_list = [x for x in source_list if getattr(x, name, None) is not None]
+
+            # A single dataframe's print format is shared rather than copied,
+            # after making it read-only for both dataframes. The formats of
+            # several dataframes are merged, as for the runs combined by
+            # `aggregate_runs`.
+            if len(source_list) == 1:
+                value = getattr(source_list[0], name)
+                if not isinstance(value, _SharedPrintFormat):
+                    value = _SharedPrintFormat(value)
+                    object.__setattr__(source_list[0], name, value)
+                object.__setattr__(self, name, value)
+            elif len(source_list) > 1:
+                format_dict = OrderedDict()
+                for source in source_list:
+                    for col, print_format in getattr(source, name).items():
+                        format_dict.setdefault(col, list()).append(print_format)
+                object.__setattr__(self, name, dict([(col, _merge_print_formats(format_list))
+                                                     for col, format_list in format_dict.items()]))
+            elif getattr(self, name, None) is None:
+                # e.g. results of some Pandas methods that were
+                # made without calling __init__
+                object.__setattr__(self, name, dict())
 
         return self
 
 
     def _repr_html_(self):
-        # Replace all NaN values with '' and then 
-        # run the Pandas dataframe html representation function
-        return super(DataFrame, self.replace(to_replace=u'NaN', value=''))._repr_html_()
+        # Show NaN values as empty cells using the Pandas html representation.
+        # Only the rows and columns that are displayed are formatted,
+        # so neither the values nor the table are copied.
+        if (not get_option(u'display.notebook_repr_html')) or self._info_repr():
+            return super(DataFrame, self)._repr_html_()
+
+        # A truncated table shows min_rows rows, as Pandas shows it
+        # (the option is only available for pandas >= 0.25)
+        max_rows = get_option(u'display.max_rows')
+        try:
+            min_rows = get_option(u'display.min_rows')
+        except KeyError:
+            min_rows = None
+
+        if max_rows and min_rows and (len(self) > max_rows):
+            max_rows = min(min_rows, max_rows)
 
+        return self.to_html(max_rows=max_rows,
+                            max_cols=get_option(u'display.max_columns'),
+                            show_dimensions=get_option(u'display.show_dimensions'),
+                            notebook=True, na_rep=u'')
 
-    def copy(self):
-        # Ensure the _print_format property is duplicated when making a copy
-        return super(DataFrame, self).copy().__finalize__(self, 'copy')
+
+    def copy(self, deep=True):
+        # Ensure a deep copy has its own _print_format property
+        dataframe = super(DataFrame, self).copy(deep=deep)
+        if deep:
+            dataframe._print_format = dict(getattr(self, u'_print_format', None) or dict())
+        return dataframe
+
+
+    def __getstate__(self):
+        # Ensure the _print_format property is pickled along with the data, 
+        # e.g. when the dataframe is returned from a worker process
+        state = super(DataFrame, self).__getstate__()
+        state[u'_print_format'] = getattr(self, u'_print_format', dict())
+        return state
 
 
     def to_csv(self, filename, preserve_format=True, 
@@ -83,80 +192,239 @@ class DataFrame(pd_DataFrame):
             if ((None in self.index.names) and (len(self.index.names) == 1)):
                 index = False
 
+        # Otherwise just use default formatting
+        if not ( preserve_format and hasattr(self, '_print_format') ):
+            return super(DataFrame, self).to_csv(filename, sep=sep, na_rep=na_rep, index=index,
+                                                 *args, **kwargs)
+
+        # The data are formatted and written a chunk of rows at a time, 
+        # so only a single chunk is ever copied and converted to strings
+        chunksize = kwargs.pop(u'chunksize', None) or _CSV_CHUNKSIZE
+        header = kwargs.pop(u'header', True)
+        mode = kwargs.pop(u'mode', u'w')
+
+        # Without a file the formatted table is returned as a string
+        if filename is None:
+            buffer = StringIO()
+            self.to_csv(buffer, preserve_format=preserve_format, sep=sep, na_rep=na_rep, 
+                        index=index, chunksize=chunksize, header=header, *args, **kwargs)
+            return buffer.getvalue()
+
+        # Compressed files must be written in one call
+        if _is_compressed(filename, kwargs.get(u'compression', u'infer')):
+            chunksize = max(len(self), 1)
+
+        # Pandas opens the file (with its encoding, compression and line endings)
+        # to write the first chunk and the other chunks are appended to it
+        for start in range(0, max(len(self), 1), chunksize):
+            dataframe = self._format_chunk(self.iloc[start:start+chunksize], index, na_rep)
+
+            # Call Pandas to_csv function
+            dataframe.to_csv(filename, sep=sep, na_rep=na_rep, index=False, 
+                             header=header if start == 0 else False,
+                             mode=mode if start == 0 else u'a', *args, **kwargs)
 
-        # Function to format significant digits on floats by converting them to strings
-        if ( preserve_format and hasattr(self, '_print_format') ):
+        return
 
-            format_dict = self._print_format.copy()
-            dataframe = self.copy()
 
-            # Move the index to the dataframe if it should be saved
-            if index:
-                dataframe = dataframe.reset_index()
-                index = False
+    def _format_chunk(self, dataframe, index, na_rep):
+        # Format significant digits on floats by converting them to strings
 
-            # If NaN replacement is a number, replace before converting to string
-            if ( isinstance(na_rep, int) or isinstance(na_rep, float) ):
-                dataframe = dataframe.replace(np.NaN, na_rep)
+        # Move the index to the dataframe if it should be saved
+        if index:
+            dataframe = dataframe.reset_index()
 
-            for key in format_dict.keys():
-                format_string = format_dict[key]
+        # If NaN replacement is a number, replace before converting to string
+        if isinstance(na_rep, (int, float)):
+            dataframe = dataframe.fillna(na_rep)
 
-                if key in dataframe.columns:
-                    dataframe[key] = dataframe[key].apply(lambda x: format_string.format(x))
+        column_dict = OrderedDict()
+        for key in dataframe.columns:
+            column_dict[key] = dataframe[key].values
 
-            # If NaN replacement is a string, replace after converting to string
-            # General string class is different in Python 2 and 3....
-            if sys.version_info[0] == 2:
-                if isinstance(na_rep, basestring):
-                    dataframe = dataframe.replace(r"""[Nn][Aa][Nn]""", na_rep, regex=True)
-            elif sys.version_info[0] >= 3:
-                if isinstance(na_rep, str):
-                    dataframe = dataframe.replace(r"""[Nn][Aa][Nn]""", na_rep, regex=True)
+            if key in self._print_format:
+                formatter = self._print_format[key].format
+                values = np.array(list(map(formatter, column_dict[key].tolist())), dtype=object)
 
-        else:
-            # Otherwise just use default formatting
-            dataframe = self
+                # If NaN replacement is a string, replace after converting to string
+                if isinstance(na_rep, _string_types):
+                    values[pd.isnull(column_dict[key])] = na_rep
 
-        # Call Pandas to_csv function
-        super(DataFrame, dataframe).to_csv(filename, sep=sep, na_rep=na_rep, index=index,
-                                           *args, **kwargs)
+                column_dict[key] = values
 
-        return
+        return pd_DataFrame(column_dict, columns=dataframe.columns)
+
+
+def _is_compressed(filename, compression):
+    """Check if Pandas will compress a file it writes
+       This is a private function, not meant for general use.
+
+       Input: file name or handle and the compression passed to to_csv
+
+       Output: True or False
+    """
+
+    if compression not in [None, u'infer']:
+        return True
+
+    # Newer versions of Pandas infer the compression from the extension
+    return (compression == u'infer') and isinstance(filename, _string_types) and \
+           filename.endswith(_COMPRESSED_EXTENSIONS)
 
 
 ### The primary parsing function
 
 
-def parse_mfout(mfoutfilename):
+def parse_mfout(mfoutfilename, lazy=False, cache=None, stats=None, compact=False,
+                memory_budget=None, spill_dir=None):
     """Parse a ModelFree output file
 
-       Input: path to ModelFree output file
+       Input: path to ModelFree output file, whether
+              to convert the data lazily, an optional cache,
+              optional stats, whether to compact the data,
+              an optional memory budget and spill directory
+
+              lazy is False (default) to convert all data immediately
+              or True to only read and convert each data tag the first 
+              time one of its tables is accessed, in which case the
+              file must not change until all tables needed are read
+
+              cache is None (default) or a ParseCache, which returns
+              previously parsed data if the file is unchanged and 
+              otherwise stores the newly parsed data. Data are always
+              converted immediately when a cache is used.
+
+              stats is None (default) or a ParseStats, to which the time
+              spent in each stage of parsing each data tag is added
+
+              compact is False (default) or True to store the tables in 
+              less memory, as done by `compact_tables`
+
+              memory_budget is None (default) or the number of bytes 
+              the parsed tables may use. Each data tag is then read and
+              converted separately and any loop that would exceed the 
+              budget is converted a chunk at a time and written to a 
+              Parquet file in a new directory inside spill_dir (which is
+              made if missing, and is the system's temporary directory by 
+              default), requiring pyarrow. It is returned as a SpilledTable,
+              which reads selected columns or chunks of rows back from 
+              disk. Data tags that aren't a single loop, such as the 
+              header, loops without rows, or loops whose columns change
+              between numbers and text, are always kept in memory. Only
+              some functions accept a SpilledTable (see its documentation).
+              The budget can't be used with lazy or a cache.
 
        Output: two dictionaries containing data
                and tables. The tables are dataframes,
                as created by Pandas.
     """
+
+    if memory_budget is not None:
+        if lazy or (cache is not None):
+            raise ValueError(u'A memory_budget cannot be used with lazy conversion or a cache')
+
+        # Only needed here and the spill module imports this one
+        from .spill import _parse_mfout_bounded
+        return _parse_mfout_bounded(mfoutfilename, memory_budget, spill_dir, stats, compact)
+
+    if cache is not None:
+        # The file is identified before it is parsed, so data parsed
+        # while it changes are stored for its old contents
+        key = cache.key(mfoutfilename)
+        cached = cache.get(mfoutfilename, key)
+        if cached is None:
+            cached = parse_mfout(mfoutfilename, stats=stats)
+            cache.put(mfoutfilename, *cached, key=key)
+        if compact:
+            cached = tuple(compact_tables(x) for x in cached)
+        return cached
     
-    tag_data_dict = _parse_mfoutfile(mfoutfilename)
+    if lazy:
+        return _make_lazy_dicts(mfoutfilename, stats, compact)
+
+    tag_data_dict = _parse_mfoutfile(mfoutfilename, stats)
+
+    tag_dict, loop_dict = _convert_data_tags(tag_data_dict, stats)
+
+    if compact:
+        compact_tables(tag_dict)
+        compact_tables(loop_dict)
+
+    return tag_dict, loop_dict
+
+
+def _convert_data_tags(tag_data_dict, stats=None):
+    """Convert the text for all data tags to tag and loop data
+       This is a private function, not meant for general use.
+
+       Input: a dictionary with unparsed data and optional stats
+
+       Output: two dictionaries containing data and tables
+    """
 
     tag_dict = OrderedDict()
     loop_dict = OrderedDict()
+    header_dict = OrderedDict()
 
     for key in tag_data_dict.keys():
-        text_list = tag_data_dict[key]
-        text_loops, text_tags = _split_loop_and_tag_text(text_list)
-
-        # Aggregate all of the data that aren't loops
-        if len(text_tags) > 0:
-            text_dict_tags = _convert_tags_to_dict(text_tags)
-            text_df_tags = _convert_tags_to_df(text_dict_tags)
-            tag_dict[key] = text_df_tags
-
-        # Aggregate the loops    
-        if len(text_loops) > 0:
-            text_df_loops = _convert_loops_to_df(text_loops)
-            loop_dict[key] = text_df_loops
+        block_tag_dict, block_loop_dict = _convert_data_tag(key, tag_data_dict[key], stats)
+        tag_dict.update(block_tag_dict)
+
+        # The header tables are placed after all other tables
+        if key == u'data_header':
+            header_dict.update(block_loop_dict)
+        else:
+            loop_dict.update(block_loop_dict)
+
+    loop_dict.update(header_dict)
+            
+    return tag_dict, loop_dict
+
+
+def _convert_data_tag(key, text_list, stats=None):
+    """Convert the text for a single data tag to tag and loop data
+       This is a private function, not meant for general use.
+
+       Input: data tag name, its unparsed data and optional stats
+
+       Output: dictionaries containing the tag and loop dataframes 
+               for the data tag
+    """
+
+    tag_dict = OrderedDict()
+    loop_dict = OrderedDict()
+
+    # Each stage is only timed if stats are being recorded
+    if stats is not None:
+        start = stats.start()
+
+    # Loops laid out as their schema are read without classifying each line,
+    # so the time taken is all spent extracting the loop
+    schema_df = _extract_schema_loop(key, text_list)
+
+    if schema_df is None:
+        text_tags, text_loops = _classify_lines(text_list)
+
+        if stats is not None:
+            start = stats.record(u'classify', key, start, lines=text_list.count(u'\n'))
+    else:
+        text_tags, text_loops = list(), list()
+        loop_dict[key] = schema_df
+
+    # Aggregate all of the data that aren't loops
+    if len(text_tags) > 0:
+        text_dict_tags = _convert_tags_to_dict(text_tags)
+        text_df_tags = _convert_tags_to_df(text_dict_tags)
+        tag_dict[key] = text_df_tags
+
+    # Aggregate the loops    
+    if len(text_loops) > 0:
+        text_df_loops = _convert_loops_to_df(text_loops)
+        loop_dict[key] = text_df_loops
+
+    if key in loop_dict:
+        if stats is not None:
+            start = stats.record(u'extract', key, start, **_table_counts(loop_dict))
             
     # Clean up the data_header tag in loop_dict
     # which sometimes has multiple entries
@@ -167,10 +435,19 @@ def parse_mfout(mfoutfilename):
     tag_dict = _clean_up_tag_dict_tags(tag_dict)
     loop_dict = _clean_up_table_column_names(loop_dict)
 
+    if stats is not None:
+        start = stats.record(u'clean_up', key, start)
+
     # Coerce column types to integers and numeric when possible
     tag_dict = _coerce_and_store_data_types(tag_dict)
     loop_dict = _coerce_and_store_data_types(loop_dict)
 
+    if stats is not None:
+        counts = _table_counts(tag_dict)
+        for name, count in _table_counts(loop_dict).items():
+            counts[name] += count
+        stats.record(u'coerce', key, start, **counts)
+
     # Remove the 'data_' portion of the key name since it's unnecessary
     for _ in range(len(tag_dict)):
         key, value = tag_dict.popitem(False)
@@ -179,112 +456,797 @@ def parse_mfout(mfoutfilename):
     for _ in range(len(loop_dict)):
         key, value = loop_dict.popitem(False)
         loop_dict[key.replace(u'data_', u'')] = value
-            
+
     return tag_dict, loop_dict
 
 
+def _table_counts(tag_loop_dict):
+    """Count the rows and columns of all tables in a dictionary
+       This is a private function, not meant for general use.
+
+       Input: dictionary of dataframes or lists of dataframes
+
+       Output: dictionary of the number of rows and columns
+    """
+
+    counts = {u'rows': 0, u'columns': 0}
+
+    for tables in tag_loop_dict.values():
+        if not isinstance(tables, list):
+            tables = [tables]
+        for table in tables:
+            counts[u'rows'] += table.shape[0]
+            counts[u'columns'] += table.shape[1]
+
+    return counts
+
+
+### Lazy conversion of data tags
+
+
+class LazyDict(MutableMapping):
+    """A dictionary of dataframes returned by `parse_mfout` when `lazy=True`.
+       The keys are the same and in the same order as for the dictionaries 
+       returned by `parse_mfout`, but each data tag is only read from the
+       file and converted to dataframes the first time one of its tables is
+       accessed. The converted tables are then stored, so each data tag is 
+       converted only once. An IOError is raised if the file has changed
+       since it was opened.
+    """
+
+    def __init__(self, data_tags, key_list):
+        # data_tags is shared between the tag and loop dictionaries
+        # so a data tag is converted once for both of them
+        self._data_tags = data_tags
+        self._keys = OrderedDict(key_list)
+        self._values = dict()
+        return
+
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = self._data_tags.get_table(*self._keys[key])
+        return self._values[key]
+
+
+    def __setitem__(self, key, value):
+        self._keys.setdefault(key, None)
+        self._values[key] = value
+        return
+
+
+    def __delitem__(self, key):
+        del self._keys[key]
+        self._values.pop(key, None)
+        return
+
+
+    def __iter__(self):
+        return iter(self._keys)
+
+
+    def __len__(self):
+        return len(self._keys)
+
+
+    def __repr__(self):
+        return '{:s}({!r})'.format(type(self).__name__, list(self._keys))
+
+
+class _LazyDataTags(object):
+    """The location of the data for each data tag, which are
+       only read from the file and converted on demand
+       This is a private class, not meant for general use.
+    """
+
+    def __init__(self, mfoutfilename, data_tag_index, stats=None, compact=False):
+        self._filename = mfoutfilename
+        self._index = data_tag_index
+        self._file_id = _file_id(mfoutfilename)
+        self._tables = dict()
+        self._stats = stats
+        self._compact = compact
+        return
+
+
+    def read(self, data_key):
+        # Read the data for a data tag from the file, which
+        # must not have changed since it was indexed
+        if _file_id(self._filename) != self._file_id:
+            raise IOError(u'{} has changed since it was opened'.format(self._filename))
+
+        if self._stats is not None:
+            start = self._stats.start()
+
+        begin, end = self._index[data_key]
+        with open(self._filename, 'rb') as mfoutfile:
+            mfoutfile.seek(begin)
+            data = mfoutfile.read(end - begin)
+
+        text = _read_data_tag(data, 0, len(data))
+
+        if self._stats is not None:
+            self._stats.record(u'read', data_key, start, bytes=end - begin)
+
+        return text
+
+
+    def convert(self, data_key):
+        # Convert a data tag and store its tables
+        tag_dict, loop_dict = _convert_data_tag(data_key, self.read(data_key), self._stats)
+
+        if self._compact:
+            compact_tables(tag_dict)
+            compact_tables(loop_dict)
+
+        self._tables[data_key] = tag_dict, loop_dict
+        return tag_dict, loop_dict
+
+
+    def get_table(self, data_key, kind, key):
+        # Convert the data tag the first time any of its tables is needed
+        if data_key not in self._tables:
+            self.convert(data_key)
+            
+        tag_dict, loop_dict = self._tables[data_key]
+        if kind == u'tag':
+            return tag_dict[key]
+        else:
+            return loop_dict[key]
+
+
+def _file_id(filename):
+    """Identify the contents of a file by its size and modification time
+       This is a private function, not meant for general use.
+
+       Input: file name
+
+       Output: tuple
+    """
+
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime
+
+
+def _make_lazy_dicts(mfoutfilename, stats=None, compact=False):
+    """Find the tables contained in each data tag without reading or
+       converting their data
+       This is a private function, not meant for general use.
+
+       Input: path to ModelFree output file, optional stats
+              and whether to compact the tables
+
+       Output: tag and loop dictionaries which convert data on first access
+    """
+
+    with open(mfoutfilename, 'rb') as mfoutfile:
+        if stats is not None:
+            clock = stats.start()
+
+        mfoutmap = _map_file(mfoutfile)
+        try:
+            data_tag_index = _index_data_tags(mfoutmap)
+            count_list = [_count_tags_and_loops(mfoutmap, start, end)
+                          for start, end in data_tag_index.values()]
+        finally:
+            mfoutmap.close()
+
+    if stats is not None:
+        stats.record(u'index', None, clock, bytes=os.path.getsize(mfoutfilename))
+
+    data_tags = _LazyDataTags(mfoutfilename, data_tag_index, stats, compact)
+
+    tag_key_list = list()
+    loop_key_list = list()
+    header_key_list = list()
+
+    for data_key, (number_tags, number_loops) in zip(data_tag_index.keys(), count_list):
+        key = data_key.replace(u'data_', u'')
+
+        if number_tags > 0:
+            tag_key_list.append((key, (data_key, u'tag', key)))
+
+        # The tables are named as _clean_up_loop_dict names them, and 
+        # the header tables are placed after all other tables
+        if data_key == u'data_header':
+            header_key_list += [(key+u'_'+str(x+1), (data_key, u'loop', key+u'_'+str(x+1)))
+                                for x in range(number_loops)]
+        elif number_loops == 1:
+            loop_key_list.append((key, (data_key, u'loop', key)))
+        else:
+            loop_key_list += [(key+u'_'+str(x+1), (data_key, u'loop', key+u'_'+str(x+1)))
+                              for x in range(number_loops)]
+
+    return LazyDict(data_tags, tag_key_list), LazyDict(data_tags, loop_key_list + header_key_list)
+
+
+# A byte that is not whitespace
+_REGEX_NOT_SPACE = re.compile(br"""[^ \t\r\n\f\v]""")
+
+
+def _count_tags_and_loops(buffer, start, end):
+    """Count the tags and the (outermost) loops in the data for a data tag 
+       as `_iter_line_records` would, without reading all of its lines.
+       Only the lines containing an underscore (tags, labels, loop_ and stop_)
+       are looked at, so long runs of values are skipped at the speed of 
+       searching memory.
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file and 
+              the byte offsets of the data
+
+       Output: number of tags and number of loops
+    """
+
+    number_tags = 0
+    number_loops = 0
+
+    in_loop = False
+    in_header = False
+    expect_label = False
+
+    position = start
+    while position < end:
+        underscore = buffer.find(b'_', position, end)
+        if underscore < 0:
+            underscore = end
+
+        line_start = buffer.rfind(b'\n', position, underscore) + 1 if underscore < end else end
+        line_start = max(line_start, position)
+
+        # Any values before this line end the header of the current loop
+        if _has_value_line(buffer, position, line_start):
+            if expect_label:
+                # Labels without underscores are left to the line classifier
+                return _count_records(_iter_line_records(
+                    _read_data_tag(buffer, start, end).split(u'\n')))
+            in_header = False
+
+        if underscore == end:
+            break
+
+        line_end = buffer.find(b'\n', underscore, end)
+        if line_end < 0:
+            line_end = end
+        line = buffer[line_start:line_end].strip()
+        position = line_end + 1
+
+        if (not line) or line.startswith(b'#'):
+            continue
+        elif line == b'loop_':
+            if not in_header:
+                number_loops += 1
+                in_loop = True
+                in_header = True
+            expect_label = True
+        elif expect_label:
+            expect_label = False
+        elif line == b'stop_':
+            continue
+        elif line.startswith(b'_'):
+            number_tags += 1
+            in_loop = False
+            in_header = False
+        elif in_loop:
+            in_header = False
+
+    return number_tags, number_loops
+
+
+def _has_value_line(buffer, start, end):
+    """Check for a line that isn't blank or a comment in part of a buffer
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file and byte offsets
+
+       Output: True or False
+    """
+
+    position = start
+    while position < end:
+        match = _REGEX_NOT_SPACE.search(buffer, position, end)
+        if match is None:
+            return False
+        if buffer[match.start():match.start()+1] != b'#':
+            return True
+
+        # Skip the rest of a comment line
+        position = buffer.find(b'\n', match.start(), end)
+        if position < 0:
+            return False
+
+    return False
+
+
+def _count_records(records):
+    """Count the tags and loops in classified records
+       This is a private function, not meant for general use.
+
+       Input: iterable of (kind, level, tokens) records
+
+       Output: number of tags and number of loops
+    """
+
+    number_tags = 0
+    number_loops = 0
+
+    for kind, _, _ in records:
+        if kind == _TAG:
+            number_tags += 1
+        elif kind == _LOOP:
+            number_loops += 1
+
+    return number_tags, number_loops
+
+
+### Parse many files using a pool of processes
+
+
+def parse_mfout_many(mfoutfilenames, workers=None, ordered=True):
+    """Parse many ModelFree output files in parallel
+
+       Input: list of paths to ModelFree output files, the number of
+              worker processes and whether results should be ordered
+              
+              workers is the number of processes used for parsing, the
+              default (None) is the number of processors on the machine
+              and 1 parses the files serially without a process pool
+
+              ordered is True (default) to return the results in the order 
+              of the input files or False to return them in the order they
+              are completed. Use `iter_mfout_many` to use each result as
+              soon as it is completed.
+
+       Output: two dictionaries whose keys are the file names. The first 
+               contains the (tag_dict, loop_dict) created by parse_mfout for 
+               each file that was parsed successfully and the second contains 
+               the error raised for each file that could not be parsed
+    """
+
+    results = OrderedDict()
+    errors = OrderedDict()
+
+    for mfoutfilename, result, error in iter_mfout_many(mfoutfilenames, workers):
+        if error is None:
+            results[mfoutfilename] = result
+        else:
+            errors[mfoutfilename] = error
+
+    if ordered:
+        mfoutfilenames = list(OrderedDict.fromkeys(mfoutfilenames))
+        results = OrderedDict([(x, results[x]) for x in mfoutfilenames if x in results])
+        errors = OrderedDict([(x, errors[x]) for x in mfoutfilenames if x in errors])
+
+    return results, errors
+
+
+def iter_mfout_many(mfoutfilenames, workers=None):
+    """Parse many ModelFree output files in parallel, returning each
+       result as soon as it is completed
+
+       Input: list of paths to ModelFree output files and the number of
+              worker processes, as for `parse_mfout_many`
+
+       Output: generator of (file name, result, error) in the order the
+               files are completed. The result is the (tag_dict, loop_dict)
+               created by parse_mfout and the error is None, or the result
+               is None and the error is the one raised parsing the file.
+               Files that haven't started parsing are cancelled if the
+               generator is closed early.
+    """
+
+    # Each file is only parsed once
+    mfoutfilenames = list(OrderedDict.fromkeys(mfoutfilenames))
+
+    if workers == 1:
+        for mfoutfilename in mfoutfilenames:
+            result, error = None, None
+            try:
+                result = parse_mfout(mfoutfilename)
+            except Exception as parse_error:
+                error = parse_error
+
+            yield mfoutfilename, result, error
+
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        future_dict = OrderedDict([(executor.submit(parse_mfout, mfoutfilename), mfoutfilename)
+                                   for mfoutfilename in mfoutfilenames])
+
+        try:
+            for future in as_completed(future_dict.keys()):
+                result, error = None, None
+                try:
+                    result = future.result()
+                except Exception as parse_error:
+                    error = parse_error
+
+                yield future_dict[future], result, error
+        finally:
+            for future in future_dict.keys():
+                future.cancel()
+
+    return
+
+
+### Stream the rows of a large loop in chunks
+
+
+def iter_loop_rows(mfoutfilename, data_tag, chunksize=100000, as_numpy=False):
+    """Read the rows of the loop in a single data tag a chunk at a time,
+       so the full table is never held in memory, e.g. to compute
+       aggregates over the simulations in 'data_sse'
+
+       Input: path to ModelFree output file, data tag name (with or 
+              without 'data_'), number of rows per chunk and whether
+              to return numpy arrays
+
+              Only the first loop in the data tag is read. The columns
+              of each chunk are the same as those of the table created
+              by parse_mfout, including the values of any outer loops,
+              and their types are converted separately for each chunk.
+
+              as_numpy is False (default) to return dataframes or True
+              to return numpy record arrays
+
+       Output: generator of dataframes (or record arrays) of at most
+               `chunksize` rows
+    """
+
+    if not data_tag.startswith(u'data_'):
+        data_tag = u'data_' + data_tag
+
+    data_tag_index = index_mfout(mfoutfilename)
+    if data_tag not in data_tag_index:
+        raise KeyError(data_tag)
+
+    start, end = data_tag_index[data_tag]
+
+    with open(mfoutfilename, 'rb') as mfoutfile:
+        for chunk in _iter_data_tag_chunks(mfoutfile, data_tag, start, end, chunksize):
+            if as_numpy:
+                yield chunk.to_records(index=False)
+            else:
+                yield chunk
+
+    return
+
+
+def _iter_data_tag_chunks(mfoutfile, data_tag, start, end, chunksize):
+    """Read the first loop of a data tag from a file in chunks of rows
+       with clean column names and converted types
+       This is a private function, not meant for general use.
+
+       Input: file opened in binary mode, data tag name, the byte
+              offsets of its data and number of rows per chunk
+
+       Output: generator of dataframes
+    """
+
+    mfoutfile.seek(start)
+
+    for chunk in _iter_loop_chunks(_iter_file_lines(mfoutfile, end - start), chunksize):
+        chunk_dict = OrderedDict([(data_tag, chunk)])
+        chunk_dict = _clean_up_table_column_names(chunk_dict)
+        yield _coerce_and_store_data_types(chunk_dict)[data_tag]
+
+    return
+
+
+def _iter_file_lines(mfoutfile, size):
+    """Read lines from the current position of a file
+       This is a private function, not meant for general use.
+
+       Input: file opened in binary mode and number of bytes to read
+
+       Output: generator of lines with normalized line endings
+    """
+
+    for line in mfoutfile:
+        size -= len(line)
+        if size < 0:
+            line = line[:size]
+
+        yield line.decode(u'utf-8').rstrip(u'\r\n')
+
+        if size <= 0:
+            break
+
+    return
+
+
+def _iter_loop_chunks(lines, chunksize):
+    """Build the rows of the first loop in the lines of a data tag
+       in chunks, as done for the whole loop by `_extract_loop_data`
+       This is a private function, not meant for general use.
+
+       Input: iterable of lines and number of rows per chunk
+
+       Output: generator of dataframes
+    """
+
+    label_list = list()
+    columns = list()
+    row_list = list()
+
+    # The current values of the outer loops, which are the 
+    # same for all the inner rows that follow them
+    outer_values = list()
+
+    for kind, level, tokens in _iter_line_records(lines):
+
+        if kind == _LABEL:
+            label_list.append(tokens)
+            columns += tokens
+            outer_values.append([np.nan] * len(tokens))
+
+        elif kind == _VALUE:
+            width = len(label_list[level])
+            values = tokens + [np.nan] * (width - len(tokens))
+
+            if level < len(label_list) - 1:
+                outer_values[level] = values
+            else:
+                row_list.append([value for outer in outer_values[:-1] for value in outer] + values)
+
+                if len(row_list) == chunksize:
+                    yield DataFrame(_stack_values(row_list, len(columns)), columns=columns)
+                    row_list = list()
+
+        elif (kind == _TAG and len(label_list) > 0) or (kind == _LOOP and len(columns) > 0):
+            # The first loop has ended
+            break
+
+    if len(row_list) > 0:
+        yield DataFrame(_stack_values(row_list, len(columns)), columns=columns)
+
+    return
+
+
 ### Initial string parsing function
 
 
-def _parse_mfoutfile(mfoutfilename):
-    """Read in the file and split the data tags into a dictionary.
+def index_mfout(mfoutfilename):
+    """Find the location of each data tag in a ModelFree output file
+       without reading the file into memory
+
+       Input: path to ModelFree output file
+
+       Output: a dictionary whose keys are the data tag names (e.g. 
+               'data_relaxation') and whose values are the (start, end) 
+               byte offsets of the data for each tag. The data begin on 
+               the line after the data tag and may be read by seeking 
+               to start and reading end - start bytes.
+    """
+
+    with open(mfoutfilename, 'rb') as mfoutfile:
+        mfoutmap = _map_file(mfoutfile)
+        try:
+            return _index_data_tags(mfoutmap)
+        finally:
+            mfoutmap.close()
+
+
+def _map_file(mfoutfile):
+    """Memory map an open file for reading
        This is a private function, not meant for general use.
 
-       Input: path to ModelFree file
+       Input: file opened in binary mode
 
-       Output: a dictionary with unparsed data
+       Output: memory map of the file, or an empty bytes-like
+               object if the file is empty (which cannot be mapped)
     """
-    
-    # Read the file
-    file_string = open(mfoutfilename, 'r').read()
+
+    if os.fstat(mfoutfile.fileno()).st_size == 0:
+        return _EmptyMap()
+
+    return mmap.mmap(mfoutfile.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _EmptyMap(bytes):
+    """An empty buffer that can be closed like a memory map
+       This is a private class, not meant for general use.
+    """
+
+    def close(self):
+        return
+
+
+def _index_data_tags(buffer):
+    """Find the byte offsets of each data tag in a buffer
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file
+
+       Output: a dictionary with the (start, end) offsets of each data tag
+    """
+
+    regex_data_tag = re.compile(br"""^(data_[^\r\n]+)[^\n]*(?:\n|$)""", flags=re.MULTILINE)
+
+    name_list = list()
+    start_list = list()
+    end_list = list()
+
+    # The data for each tag end where the next data tag begins
+    for match in regex_data_tag.finditer(buffer):
+        name_list.append(match.group(1).strip().decode(u'utf-8'))
+        start_list.append(match.end())
+        end_list.append(match.start())
+
+    end_list = end_list[1:] + [len(buffer)]
+
+    return OrderedDict(zip(name_list, zip(start_list, end_list)))
+
+
+def _read_data_tag(buffer, start, end):
+    """Read the data for a single data tag
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file and 
+              the byte offsets of the data
+
+       Output: unparsed data with normalized line endings
+    """
+
+    text = buffer[start:end].decode(u'utf-8')
 
     # Remove any Windows linefeed characters (courtesy of Microsoft Exchange/Outlook)
-    regex_microsoftsucks = re.compile(r"""\r\n""")
-    file_string = re.sub(regex_microsoftsucks, '\n', file_string)
-    
-    # Remove comments from the text
-    regex_comment = re.compile(r"""(^\s?#.+|^\s?)\n""")
-    file_string = re.sub(regex_comment, '', file_string)
-    
-    # Remove internal double returns from the data
-    regex_returns = re.compile(r"""\n{2,}""")
-    file_string = re.sub(regex_returns, '\n', file_string)
-    
-    # Strip whitespace from the beginning and end of the data
-    file_string = file_string.strip()
+    # Comments and blank lines are skipped when the lines are classified
+    if u'\r' in text:
+        text = text.replace(u'\r\n', u'\n').replace(u'\r', u'\n')
 
-    # Split the data into a list based on the data_x tags
-    regex_data_tag_split = re.compile(r"""\n(?=data_.+?\n)""")
-    split_list = re.split(r"""\n(?=data_.+?\n)""", file_string, flags=re.MULTILINE|re.DOTALL)
-    
-    # Separate the data tags from the corresponding data
-    regex_data_tag_name = re.compile(r"""(data_.+?)\n(.+)""")
-    tag_data_list = [re.search(r"""(data_.+?)\n(.+)""", x, flags=re.MULTILINE|re.DOTALL) 
-                     for x in split_list]
+    return text
+
+
+def _parse_mfoutfile(mfoutfilename, stats=None):
+    """Read in the file and split the data tags into a dictionary.
+       This is a private function, not meant for general use.
+
+       Input: path to ModelFree file and optional stats
+
+       Output: a dictionary with unparsed data
+    """
     
-    # Put the list into an ordered dictionary with the tag as a key
-    tag_data_dict = OrderedDict([(x.group(1).strip(), x.group(2)) 
-                                  for x in tag_data_list])
+    # Map the file and read the data for each tag one at a time
+    # so the whole file is never copied in memory
+    with open(mfoutfilename, 'rb') as mfoutfile:
+        if stats is not None:
+            clock = stats.start()
+
+        mfoutmap = _map_file(mfoutfile)
+        try:
+            data_tag_index = _index_data_tags(mfoutmap)
+
+            # Finding the data tags is recorded once for the whole file
+            if stats is not None:
+                clock = stats.record(u'index', None, clock, bytes=len(mfoutmap))
+
+            tag_data_dict = OrderedDict()
+            for key, (start, end) in data_tag_index.items():
+                tag_data_dict[key] = _read_data_tag(mfoutmap, start, end)
+
+                if stats is not None:
+                    clock = stats.record(u'read', key, clock, bytes=end - start)
+        finally:
+            mfoutmap.close()
     
     return tag_data_dict
 
 
-### Split string into loop and tag data
+### Single-pass classification of the lines in a data block
+
 
+# Kinds of records emitted by the line classifier
+_TAG = u'tag'
+_LOOP = u'loop'
+_LABEL = u'label'
+_VALUE = u'value'
+_STOP = u'stop'
 
-def _split_loop_and_tag_text(text_list):
-    """Split the text corresponding to a single label and create table.
+
+def _classify_lines(text):
+    """Walk the lines of a single data tag once and classify each line as
+       a tag, a loop label, a loop value, or a loop stop.
        This is a private function, not meant for general use.
 
-       Input: data for a single tab
+       Input: text for a single data tag
 
-       Output: dataframes corresponding to single data and tables
+       Output: list of (tag, value) pairs and a list of loops, where each
+               loop is a list of (kind, level, tokens) records and level
+               counts nested loops from the outermost (0)
     """
 
-    # Split into separate lines and put into a
-    # pandas dataframe so data selection is easier
-    text_list = text_list.split('\n')
-    text_df = pd.DataFrame(text_list, columns=[u'text'])
-    
-    # Strip the whitespace off the beginning and end
-    text_df[u'text'] = text_df.text.str.strip()
-    
-    # This column determines if text contains a _tag
-    text_df[u'tag'] = False
-    text_df.ix[text_df.text.str.contains('_\w+',regex=True),u'tag'] = True
+    tag_list = list()
+    loop_list = list()
 
-    # This column determines if text contains a loop tag (loop_)
-    text_df[u'loop'] = False
-    text_df.ix[text_df.text.str.contains('loop_'),u'loop'] = True
-    
-    # The line below the tag is always part of the tag group
-    text_df.ix[text_df.ix[text_df.loop].index+1, u'loop'] = True
+    for kind, level, tokens in _iter_line_records(text.split(u'\n')):
+        if kind == _TAG:
+            tag_list.append(tokens)
+        elif kind == _LOOP:
+            records = list()
+            loop_list.append(records)
+        else:
+            records.append((kind, level, tokens))
 
-    # Any row that doesn't contain a tag and is not currently part of a loop
-    # must also be part of a loop
-    text_df.ix[(text_df.tag==False)&(text_df.loop!=True),u'loop'] = True
-    
-    # Separate the data that is not part of a loop
-    text_df_tags = text_df.ix[text_df.loop==False, u'text'].tolist()
-    
-    # Separate the data that is part of a loop
-    text_df_loop = text_df.ix[text_df.loop==True, u'text'].tolist()
+    return tag_list, loop_list
+
+
+def _iter_line_records(lines):
+    """Classify each of a sequence of lines as a tag, the start of a loop,
+       a loop label, a loop value, or a loop stop.
+       This is a private function, not meant for general use.
+
+       Input: iterable of the lines for a single data tag
+
+       Output: generator of (kind, level, tokens) records, where tokens
+               is a (tag, value) pair for tags, and the records for each 
+               loop follow the record that starts it
+    """
 
-    return text_df_loop, text_df_tags
+    in_loop = False      # True while the records belong to a loop
+    depth = 0            # number of nested loop_ tags in the current loop
+    level = 0            # nesting level of the next row of values
+    expect_label = False # the line below a loop_ tag is always its label
+    in_header = False    # True until the first value of the current loop
+
+    for line in lines:
+
+        line = line.strip()
+        if (not line) or line.startswith(u'#'):
+            continue
+
+        if line == u'loop_':
+            # A loop_ tag directly below a label starts a nested loop,
+            # otherwise it starts a new loop
+            if not in_header:
+                yield _LOOP, 0, None
+                in_loop = True
+                depth = 0
+                in_header = True
+            depth += 1
+            expect_label = True
+
+        elif expect_label:
+            yield _LABEL, depth-1, line.split()
+            expect_label = False
+
+        elif line == u'stop_':
+            # The row following a stop belongs to the enclosing loop
+            if in_loop:
+                yield _STOP, level, None
+                level = max(level-1, 0)
+
+        elif line.startswith(u'_'):
+            # Any other underscored line is a tag and closes the current loop
+            in_loop = False
+            in_header = False
+            tag_value = line[1:].split(None, 1)
+            yield _TAG, 0, (tag_value[0], tag_value[1] if len(tag_value) > 1 else u'')
+
+        elif in_loop:
+            # The first rows of each set of values correspond to the outer loops
+            if in_header:
+                in_header = False
+                level = 0
+            yield _VALUE, level, line.split()
+            level = min(level+1, depth-1)
+
+    return
 
 
 ### Convert the tag data to a ModelFree DataFrame
 
 
-def _convert_tags_to_dict(text_list_tags):
+def _convert_tags_to_dict(tag_list):
     """Convert all tag data to a dictionary
        This is a private function, not meant for general use.
 
-       Input: list of text tags
+       Input: list of (tag, value) pairs
 
        Output: dictionary
     """
-    return OrderedDict([re.findall(r"""\s*_(\w+)\s+(.+?)\s*$""", row)[0] for row in text_list_tags])
+    return OrderedDict(tag_list)
 
 
 def _convert_tags_to_df(text_dict_tags):
@@ -321,200 +1283,164 @@ def _clean_up_tag_dict_tags(tag_dict):
 ### Convert the loop data to a _DataFrame_mf
 
 
-def _set_loops(loop_data):
-    """Find limits of loops in data
+def _stack_values(value_list, width):
+    """Stack rows of values into a single two dimensional array
        This is a private function, not meant for general use.
 
-       Input: dataframe
+       Input: list of rows of values and the number of columns
 
-       Output: dataframe
+       Output: numpy array with short rows padded with NaN
     """
-    # Initiate a loop column with 1 for each loop tag
-    loop_data[u'loop'] = 0
-    loop_data.ix[loop_data.text.str.contains(u'loop_'),u'loop'] = 1
 
-    # Ensure the index is linear, but set it up so the original
-    # index can be replaced
-    old_columns = loop_data.columns
-    loop_data = loop_data.reset_index(drop=False)
-    index_column = list(set(loop_data.columns) - set(old_columns))
-    
-    # Get the difference between index positions of the loop tags
-    loop_index = loop_data.ix[loop_data.loop==1].index
-    loop_diff = loop_index[1:] - loop_index[:-1]
-
-    # For nested loops, the difference 
-    depth = 0
-    for idx,diff in zip(loop_index[:-1],loop_diff):
-        if diff <= 2:
-            depth += 1
-            loop_data.ix[idx,u'loop'] += depth
-        else:
-            depth = 0
-            
-    
-    # Reset the index
-    loop_data.set_index(index_column, drop=True)
-    if u'index' in loop_data.columns:
-        loop_data = loop_data.drop([u'index'], axis = 1)
-    
-    return loop_data
+    if all(len(row) == width for row in value_list):
+        return np.array(value_list, dtype=object).reshape(len(value_list), width)
+
+    values = np.full((len(value_list), width), np.nan, dtype=object)
+    for pos, row in enumerate(value_list):
+        values[pos, :len(row)] = row
 
+    return values
 
-def _set_labels(loop_data):
-    """Find labels in data
+
+def _extract_loop_data(loop_records):
+    """Extract the values of a single loop based on its classified records
        This is a private function, not meant for general use.
 
-       Input: dataframe
+       Input: list of records for a loop
 
        Output: dataframe
     """
-    
-    # Ensure the index is linear, but set it up so the original
-    # index can be replaced
-    old_columns = loop_data.columns
-    loop_data = loop_data.reset_index(drop=False)
-    index_column = list(set(loop_data.columns) - set(old_columns))
-    
-    # The non-zero values of the loops and their new index
-    tag_values = loop_data.ix[loop_data.loop !=0,u'loop'].tolist()
-    tag_index = loop_data.ix[loop_data.loop !=0].index + 1
 
-    loop_data[u'tag'] = 0
-    loop_data.ix[tag_index, u'tag'] = tag_values
-    
-    # Reset the index
-    loop_data.set_index(index_column, drop=True)
-    if u'index' in loop_data.columns:
-        loop_data = loop_data.drop([u'index'], axis = 1)
-    
-    return loop_data
+    # The labels for each level, outermost first
+    label_list = [tokens for kind, _, tokens in loop_records if kind == _LABEL]
+    inner_level = len(label_list) - 1
 
+    # The level and values of every row of data
+    value_records = [(level, tokens) for kind, level, tokens in loop_records if kind == _VALUE]
+    value_levels = np.array([level for level, _ in value_records], dtype=int)
 
-def _set_stops(loop_data):
-    """Find stops in data
-       This is a private function, not meant for general use.
+    # Positions of the innermost rows, which become the rows of the table
+    inner_index = np.flatnonzero(value_levels == inner_level)
 
-       Input: dataframe
+    # Allocate the full table once and fill in the columns for each level
+    columns = [tag for tag_list in label_list for tag in tag_list]
+    table = np.empty((len(inner_index), len(columns)), dtype=object)
 
-       Output: dataframe
-    """
+    start = 0
+    for level, tag_list in enumerate(label_list):
 
-    # Set the text that contains stops
-    loop_data[u'stop'] = 0
-    loop_data.ix[loop_data.text.str.contains(u'stop_'),u'stop'] = 1
-    
-    return loop_data
+        level_index = np.flatnonzero(value_levels == level)
+        level_values = _stack_values([value_records[pos][1] for pos in level_index],
+                                     len(tag_list))
 
+        if level < inner_level:
+            # Broadcast each outer row onto the inner rows that follow it
+            # Any inner rows before the first outer row have no outer values
+            first_inner = np.searchsorted(inner_index, level_index)
+            repeats = np.diff(np.concatenate([[0], first_inner, [len(inner_index)]]))
 
-def _set_values(loop_data):
-    """Find rows corresponding to values in data
-       This is a private function, not meant for general use.
+            missing = np.full((1, len(tag_list)), np.nan, dtype=object)
+            level_values = np.repeat(np.vstack([missing, level_values]), repeats, axis=0)
 
-       Input: dataframe
+        table[:, start:start+len(tag_list)] = level_values
+        start += len(tag_list)
 
-       Output: dataframe
-    """
-    
-    # These are the indexes of all the data that are unassigned
-    value_indexes = loop_data.ix[(loop_data.loop==0)&(loop_data.tag==0)&(loop_data.stop==0)].index
-    loop_data[u'value'] = 0
-    loop_data.ix[value_indexes,u'value'] = 1
-    
-    # These are the indexes of data who follow either a loop, label, or stop tag
-    value_indexes_begin = loop_data.ix[(value_indexes-1)].ix[loop_data.value==0].index + 1
-    
-    # The first rows of each data correspond to data for their respective loops
-    loop_max = loop_data.loop.max()
-    loop_range = np.arange(loop_max-1, -1, -1)
-    
-    for idx in value_indexes_begin:
-        loop_data.ix[idx:idx+len(loop_range)-1,u'value'] += loop_range
-    
-    return loop_data
+    return DataFrame(table, columns=columns)
 
 
-def _extract_loop_data(loop_data):
-    """Extract the values based on pre-determined start/stop positions
+def _extract_schema_loop(key, text):
+    """Extract the values of a data tag that is a single loop laid out as
+       its schema, without classifying each line
        This is a private function, not meant for general use.
 
-       Input: dataframe
+       Input: data tag name and its text
 
-       Output: dataframe
+       Output: dataframe, or None if the text doesn't fit the
+               schema for the data tag, if there is one
     """
-    # TODO: handle different max levels for each loop set ?
-    
-    # Get the outer level of the loops
-    max_level = loop_data.loop.max()
 
-    # Arrays of the start and stop indices for the outermost loops
-    loop_index_begin = loop_data.ix[loop_data.loop==max_level].index
-    loop_index_end = np.append(loop_index_begin[1:]-1, [len(loop_data)])
+    # Data tags without a schema are left to the generic parser right away
+    if get_schema_types(key, []) is None:
+        return None
 
-    # Loop through all the outermost loops splitting data and converting into tables for all lower levels
-    outer_df_list = list()
-    for lim in list(zip(loop_index_begin, loop_index_end)):
+    lines = [x for x in (y.strip() for y in text.split(u'\n')) if x and not x.startswith(u'#')]
 
-        # The data for this slice
-        level_data = loop_data.ix[lim[0]:lim[1]]
-        # The indices for the innermost level of data
-        level_data_index = level_data.ix[level_data.value==1].index
+    # The loop_ tags and labels of each level come first
+    label_list = list()
+    while (2*len(label_list)+1 < len(lines)) and (lines[2*len(label_list)] == u'loop_'):
+        label_list.append(lines[2*len(label_list)+1].split())
 
-        # Pull out the tags and values for each level and put into a table
-        inner_df_list = list()
-        inner_df_columns = list()
-        for level in range(max_level, 0, -1):
+    columns = [tag for tag_list in label_list for tag in tag_list]
+    if (len(label_list) == 0) or (len(label_list) > 2) or \
+       (get_schema_types(key, [re.sub(r"""^_""", u'', x.lower()) for x in columns]) is None):
+        return None
 
-            # The tag list and the values
-            tag_list = level_data.ix[level_data.tag==level,u'text'].apply(lambda x: re.split(r"""\s+""",x))
-            value_list = level_data.ix[level_data.value==level,u'text'].apply(lambda x: re.split(r"""\s+""",x))
+    body = np.array(lines[2*len(label_list):], dtype=object)
 
-            # Stuff the tags and values into a table
-            inner_df = pd.DataFrame(value_list.tolist(), columns=tag_list.tolist()[0], index=value_list.index)
-            inner_df_list.append(inner_df)
-            inner_df_columns += tag_list.tolist()[0]
+    # Anything other than values and the stops after each set of inner rows needs the generic parser
+    is_stop = body == u'stop_'
+    if any(x.startswith(u'_') or (x == u'loop_') for x in body):
+        return None
 
-        # Combine all the lower levels into a single table and fill in missing data from outer levels
-        outer_df = pd.concat(inner_df_list).sort_index().fillna(method=u'ffill')
+    if len(label_list) == 1:
+        return _split_rows(body[~is_stop], len(columns), columns)
 
-        # Select just the innermost level data since the outer level data has been filled in
-        outer_df = outer_df.ix[level_data_index]
+    # The first row of each set of values, before and after each stop, is the outer row
+    group = np.cumsum(np.concatenate([[0], is_stop[:-1]]))
+    is_outer = np.concatenate([[True], group[1:] != group[:-1]]) & ~is_stop
+    is_inner = ~is_outer & ~is_stop
 
-        # Reorder the data columns
-        outer_df = DataFrame(outer_df, columns=inner_df_columns).reset_index(drop=True)
+    # Every inner row must follow an outer row
+    if (len(body) == 0) or not is_outer[0]:
+        return None
 
-        # Combine into a list
-        outer_df_list.append(outer_df)
-        
-    if len(outer_df_list) == 1:
-        return outer_df_list[0]
-    else:
-        return outer_df_list
+    outer = _split_rows(body[is_outer], len(label_list[0]), label_list[0])
+    inner = _split_rows(body[is_inner], len(label_list[1]), label_list[1])
+    if (outer is None) or (inner is None):
+        return None
+
+    # Broadcast each outer row onto the inner rows that follow it
+    repeats = np.bincount(group[is_inner], minlength=group[-1]+1)[group[is_outer]]
+    table = np.hstack([np.repeat(outer.values, repeats, axis=0), inner.values])
 
+    return DataFrame(table, columns=columns)
 
-def _convert_loops_to_df(text_loops):
-    """Classify all data and convert to dataframe
+
+def _split_rows(rows, width, columns):
+    """Split rows of text that all have the same number of values
        This is a private function, not meant for general use.
 
-       Input: dataframe
+       Input: array of lines, the number of values in each and their names
 
-       Output: dataframe
+       Output: dataframe, or None if any row has a different number of values
+    """
+
+    # Short or long rows are padded or split differently by the generic parser
+    if any(len(x.split()) != width for x in rows):
+        return None
+
+    # Splitting all rows at once is much faster than splitting them one at a time
+    values = u' '.join(rows).split()
+
+    return DataFrame(np.array(values, dtype=object).reshape(len(rows), width), columns=columns)
+
+
+def _convert_loops_to_df(loop_list):
+    """Convert all classified loops to dataframes
+       This is a private function, not meant for general use.
+
+       Input: list of loops, each a list of records
+
+       Output: dataframe, or a list of dataframes if there are several loops
     """
     
-    # Convert the list to a table
-    df_loop = DataFrame(text_loops, columns=[u'text'])
-    
-    # Append columns which classify each row as a loop tag,
-    # stop tag, label tab, or data values
-    df_loop = _set_loops(df_loop)
-    df_loop = _set_labels(df_loop)
-    df_loop = _set_stops(df_loop)
-    df_loop = _set_values(df_loop)
-    
-    # Extract the data into a table
-    df_list = _extract_loop_data(df_loop)
-    
-    return df_list
+    # Extract the data for each loop into a table
+    df_list = [_extract_loop_data(loop_records) for loop_records in loop_list]
+
+    if len(df_list) == 1:
+        return df_list[0]
+    else:
+        return df_list
 
 
 def _clean_up_loop_dict(loop_dict):
@@ -537,6 +1463,13 @@ def _clean_up_loop_dict(loop_dict):
                 loop_dict[u'data_header_'+str(df[0]+1)] = df[1]
         else:
             loop_dict[u'data_header_1'] = header_df_list
+
+    # Any other data tag with several loops (which may be nested 
+    # to different depths) is split the same way, in order
+    for key in [x for x in loop_dict.keys() if isinstance(loop_dict[x], list)]:
+        df_list = loop_dict.pop(key)
+        for df in enumerate(df_list):
+            loop_dict[key+u'_'+str(df[0]+1)] = df[1]
             
     return loop_dict
 
@@ -562,6 +1495,76 @@ def _clean_up_table_column_names(loop_dict):
 ### Functions that operate on either tag or loop data
 
 
+def _infer_float_formats(text_values):
+    """Determine the print format of float columns from their original text
+       This is a private function, not meant for general use.
+
+       Input: two dimensional array of the original text for the float columns
+
+       Output: list of format strings, one per column
+    """
+
+    text_values = np.asarray(text_values, dtype=object)
+    if text_values.ndim == 1:
+        text_values = text_values[:, np.newaxis]
+
+    format_list = list()
+    for column in range(text_values.shape[1]):
+        text = np.asarray(text_values[:, column], dtype='U')
+
+        # Work on the unicode code points of each value, one row per value,
+        # which is much faster than the numpy.char string functions
+        width = max(text.dtype.itemsize // 4, 1)
+        if text.dtype.itemsize > 0:
+            codes = text.view(np.uint32).reshape(len(text), width)
+        else:
+            codes = np.zeros((len(text), width), dtype=np.uint32)
+
+        # The decimal places are the characters between the decimal point and 
+        # the exponent (or the end of the number), and a column is written in
+        # exponent notation if any of its values has an exponent
+        is_point = codes == ord(u'.')
+        is_exponent = (codes == ord(u'E')) | (codes == ord(u'e'))
+
+        has_point = is_point.any(axis=1)
+        point = np.where(has_point, is_point.argmax(axis=1), -1)
+        exponent = np.where(is_exponent.any(axis=1), is_exponent.argmax(axis=1), -1)
+        end = np.where(exponent > point, exponent, (codes != 0).sum(axis=1))
+
+        decimal = np.where(has_point, end - point - 1, 0).max() if len(text) > 0 else 0
+        has_exponent = (has_point & (exponent > point)).any()
+
+        format_list.append(u'{:.' + str(int(decimal)) + (u'E' if has_exponent else u'f') + u'}')
+
+    return format_list
+
+
+def _merge_print_formats(format_list):
+    """Find a print format that shows the values of several tables (e.g.
+       runs or chunks) with at least the precision of their own formats
+       This is a private function, not meant for general use.
+
+       Input: list of print formats
+
+       Output: print format
+    """
+
+    format_list = list(OrderedDict.fromkeys(format_list))
+    if len(format_list) == 1:
+        return format_list[0]
+
+    match_list = [_FORMAT_REGEX.match(x) for x in format_list]
+
+    # Formats that can't be compared are left as in the first table
+    if not all(match_list):
+        return format_list[0]
+
+    decimals = max(int(match.group(1)) for match in match_list)
+    notation = u'E' if any(match.group(2) == u'E' for match in match_list) else u'f'
+
+    return u'{:.' + str(decimals) + notation + u'}'
+
+
 def _coerce_and_store_data_types(tag_loop_dict):
     """Convert columns to float and integers whenever possible
        This is a private function, not meant for general use.
@@ -571,34 +1574,86 @@ def _coerce_and_store_data_types(tag_loop_dict):
        Output: dataframe
     """
 
-    regex_format = re.compile(r"""\d*\.(?P<decimal>\d+)(?:[Ee]?[+-]?(?P<exponent>\d?))""")
-
     # Attempt to convert data columns from strings to integers or floats whenever possible
     # Skip any table with 'data_header' in its name because these contain mixed data
     for key in tag_loop_dict.keys():
         if u'data_header' not in key:
-            tmp = tag_loop_dict[key].copy()
-            tag_loop_dict[key] = tag_loop_dict[key].apply(lambda x: pd.to_numeric(x, errors=u'ignore'))
-            
-            # Preserve the formatting for all columns that were converted to floats
-            float_cols = [x for x in tag_loop_dict[key].columns if tag_loop_dict[key][x].dtype == np.float]
+            text_df = tag_loop_dict[key]
 
-            decimal_format = dict([(col, tmp[col].apply(lambda x: 
-                                    len(re.search(regex_format, x).group('decimal'))).max())
-                               for col in float_cols])
+            # Tables laid out as their schema are converted directly to its types
+            typed_df = _coerce_schema_types(key, text_df)
+            if typed_df is None:
+                typed_df = text_df.apply(_to_numeric_or_text)
 
-            exponent_format = dict([(col, tmp[col].apply(lambda x: 
-                                    len(re.search(regex_format, x).group('exponent'))).max())
-                               for col in float_cols])
-
-            number_format = dict([(col,'f') if exponent_format[col] == 0 else (col,'E')
-                                  for col in float_cols])
+            tag_loop_dict[key] = typed_df
+            
+            # Preserve the formatting for all columns that were converted to floats
+            float_cols = [x for x in tag_loop_dict[key].columns 
+                          if tag_loop_dict[key][x].dtype == np.float64]
 
-            formatter = dict([(col, '{:.' + str(decimal_format[col]) + number_format[col] + '}') 
-                               for col in float_cols])
+            formatter = dict()
+            if len(float_cols) > 0:
+                formatter = dict(zip(float_cols, _infer_float_formats(text_df[float_cols].values)))
             
             # Save format instructions to dataframe
             tag_loop_dict[key]._print_format = formatter
 
     return tag_loop_dict
 
+
+def _to_numeric_or_text(text):
+    """Convert text to numbers if all of it can be converted,
+       as pd.to_numeric(text, errors='ignore') did before it was removed
+       This is a private function, not meant for general use.
+
+       Input: series or array of text
+
+       Output: the numbers, or the text unchanged
+    """
+
+    try:
+        return pd.to_numeric(text)
+    except (ValueError, TypeError):
+        return text
+
+
+def _coerce_schema_types(key, text_df):
+    """Convert the columns of a table to the types given by its schema,
+       without inferring their types. Only columns whose type isn't given
+       are inferred, and the print formats of float columns are still
+       found from their text afterwards.
+       This is a private function, not meant for general use.
+
+       Input: data tag name and dataframe of text
+
+       Output: dataframe, or None if there is no schema for the table
+               or its text doesn't fit the schema
+    """
+
+    column_types = get_schema_types(key, text_df.columns)
+    if column_types is None:
+        return None
+
+    column_dict = OrderedDict()
+    for col in text_df.columns:
+        text = text_df[col].values
+        column_type = column_types[col]
+
+        # Numbers are parsed as python parses them, which is also how
+        # pandas >= 1.3 parses them (older versions may differ in the last
+        # digit). Text that doesn't fit the type is left to be inferred.
+        try:
+            if column_type == INT:
+                values = text.astype(np.int64)
+            elif column_type == FLOAT:
+                values = text.astype(np.float64)
+            elif column_type == STRING:
+                values = text
+            else:
+                values = _to_numeric_or_text(text)
+        except (ValueError, TypeError, OverflowError):
+            return None
+
+        column_dict[col] = values
+
+    return DataFrame(column_dict, columns=text_df.columns, index=text_df.index)
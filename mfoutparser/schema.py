@@ -0,0 +1,124 @@
+# coding: utf-8
+import re
+from collections import OrderedDict
+
+
+# Types of the columns in a schema. Columns whose type
+# varies between files are None and their type is inferred.
+INT = u'int'
+FLOAT = u'float'
+STRING = u'string'
+
+
+### Schemas of the loop tables in ModelFree output files
+
+
+# The schema for each data tag, in the order they were registered
+_SCHEMAS = OrderedDict()
+
+
+def register_schema(name, levels):
+    """Register the layout of the loop table in a data tag, so that tables
+       matching it are converted directly to the given types rather than
+       having their types inferred by `parse_mfout`. The print formats of
+       float columns are still found from their text, and tables whose text
+       doesn't fit the given types are inferred as before
+
+       Input: regular expression matching the whole data tag name (without
+              'data_', e.g. r'model_\\d+') and a list of the levels of nested
+              loops, outermost first, each a list of (column, type) pairs
+
+              The column names are those of the parsed table (lower case)
+              and the types are INT, FLOAT, STRING, or None if the type varies
+              and must be inferred. A table matches if all of its columns are
+              found, in order, in its levels, so optional columns and inner
+              levels may be missing.
+
+       Output: None
+    """
+
+    _SCHEMAS[name] = (re.compile(name + u'$'), levels)
+
+    return
+
+
+def get_schema_types(key, columns):
+    """Find the type of each column of a table from its schema
+
+       Input: data tag name (with or without 'data_') and column names
+
+       Output: dictionary of the type of each column, or None if no
+               schema is registered for the data tag or the columns
+               don't match it
+    """
+
+    if key.startswith(u'data_'):
+        key = key[len(u'data_'):]
+
+    for regex, levels in _SCHEMAS.values():
+        if regex.match(key):
+            return _match_levels(levels, list(columns))
+
+    return None
+
+
+def _match_levels(levels, columns):
+    """Match columns to the levels of a schema
+       This is a private function, not meant for general use.
+
+       Input: list of levels of (column, type) pairs and column names
+
+       Output: dictionary of the type of each column or None
+    """
+
+    column_types = dict()
+    position = 0
+
+    for level in levels:
+        # Each level's columns must appear in the order of the schema
+        for column, column_type in level:
+            if (position < len(columns)) and (columns[position] == column):
+                column_types[column] = column_type
+                position += 1
+
+    if position < len(columns):
+        return None
+
+    return column_types
+
+
+### ModelFree 4.x output, as in examples/input_data
+
+
+register_schema(u'title', [[(u'title', None), (u'residue', INT)]])
+
+register_schema(u'chi_square', [[(u'percentile', FLOAT), (u'simulated_x2', FLOAT)]])
+
+register_schema(u'diffusion_tensor', [[(u'diffusion_name', STRING), (u'units', STRING),
+                                       (u'fit_value', FLOAT), (u'fit_error', FLOAT), (u'flag', INT),
+                                       (u'sim_value', FLOAT), (u'sim_error', FLOAT),
+                                       (u'sim_abs', FLOAT), (u'geary-z', FLOAT)]])
+
+register_schema(u'spin_parameters', [[(u'residue', INT), (u'model', INT), (u'nucleus', STRING),
+                                      (u'gamma', FLOAT), (u'rxh', FLOAT), (u'csa', FLOAT),
+                                      (u'csa_sigma', FLOAT), (u'atom_1', STRING), (u'atom_2', STRING)]])
+
+register_schema(u'relaxation', [[(u'relaxation_rate_name', STRING), (u'relaxation_rate_unit', STRING),
+                                 (u'field', FLOAT)],
+                                [(u'residue', INT), (u'value', FLOAT), (u'uncertainty', FLOAT),
+                                 (u'flag', INT), (u'fit_value', FLOAT), (u't-value', FLOAT)]])
+
+register_schema(r'model_\d+', [[(u'model_free_name', STRING), (u'model_free_unit', STRING)],
+                               [(u'residue', INT), (u'fit_value', FLOAT), (u'fit_error', FLOAT),
+                                (u'flag', INT), (u'sim_value', FLOAT), (u'sim_error', FLOAT),
+                                (u'sim_abs', FLOAT), (u'geary-z', FLOAT)]])
+
+register_schema(u'sse', [[(u'residue', INT), (u'sse', FLOAT)],
+                         [(u'percentile', FLOAT), (u'simulated_sse', FLOAT)]])
+
+register_schema(u'correlation_matrix', [[(u'residue', INT)],
+                                        [(u'model_free_name_1', STRING), (u'model_free_name_2', STRING),
+                                         (u'covariance', FLOAT)]])
+
+register_schema(u'F_dist', [[(u'residue', INT), (u'f-stat', FLOAT), (u'f-simulations', INT)],
+                            [(u'percentile', FLOAT), (u'simulated_f_dist', FLOAT)]])
@@ -1,7 +1,19 @@
 # coding: utf-8
+import operator
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
 
 
-### Generic data selection function
+# The comparison performed by each selector type
+_COMPARISONS = {'==': operator.eq, '!=': operator.ne,
+                '<': operator.lt, '>': operator.gt,
+                '<=': operator.le, '>=': operator.ge}
+
+_SELECTOR_TYPES = ['==', '!=', '<', '>', '<=', '>=', 'in', 'between']
+
+
+### Generic data selection functions
 
 
 def get_data_selection(dataframe, selector_dict, selector_type='==', copy=True):
@@ -29,26 +41,221 @@ def get_data_selection(dataframe, selector_dict, selector_type='==', copy=True):
     if selector_type not in ['==', '<', '>', '<=', '>=']:
         raise SyntaxError("The selector_type must be a string and it must be one of the following: ['==', '<', '>', '<=', '>=']")
 
-    # Make a copy of the original data
+    # The same comparison is used for every match criterion
+    query_dict = dict([(key, (selector_type, selector_dict[key])) for key in selector_dict.keys()])
+
+    return query_data(dataframe, query_dict, copy=copy)
+
+
+def query_data(dataframe, query_dict, copy=True):
+    """Return a dataframe containing data that matches all the criteria
+       defined by `query_dict`, which is a dictionary whose keys are
+       column (or index) names and whose values are the criteria for
+       that column. All criteria are combined into a single selection,
+       so only the matching rows are copied.
+
+       Each criterion is either a value, which selects rows equal to it,
+       a (selector_type, value) pair, or a list of such pairs which must
+       all be met, e.g.:
+
+       {'residue': ('between', (10, 20)),
+        'model_free_name': ('in', ['S2', 'te']),
+        'fit_value': [('>', 0.5), ('!=', 1.0)]}
+
+       Input: Pandas dataframe, dictionary of criteria, and copy
+
+              selector_type is one of ['==', '!=', '<', '>', '<=', '>=',
+              'in', 'between'], where the value for 'in' is a collection
+              of values and the value for 'between' is an inclusive
+              (low, high) range
+
+              copy is True (default) or False and determines if the selected
+              data are copied, so that changes to them are not reflected in 
+              the original data
+
+       Output: Pandas dataframe for corresponding match
+    """
+
+    mask = np.ones(len(dataframe), dtype=bool)
+
+    for key in query_dict.keys():
+        values = _get_values(dataframe, key)
+
+        for selector_type, value in _get_criteria(query_dict[key]):
+            mask &= _get_mask(values, selector_type, value)
+
+    table = dataframe.iloc[np.flatnonzero(mask)]
+
+    # Only the selected rows are copied
     if copy:
-        table = dataframe.copy()
+        table = table.copy()
+
+        # Clean up the index numbers if appropriate
+        if (None in table.index.names) and (len(table.index.names) == 1):
+            table.reset_index(drop=True, inplace=True)
+
+    return table
+
+
+def _get_values(dataframe, key):
+    """Get the values of a column or index level
+       This is a private function, not meant for general use.
+
+       Input: Pandas dataframe (or SpilledTable), column or index name
+
+       Output: numpy array
+    """
+
+    if isinstance(dataframe, pd.DataFrame) and (key in dataframe.index.names):
+        return np.asarray(dataframe.index.get_level_values(key))
     else:
-        table = dataframe
+        return dataframe[key].values
 
-    # Select the data for each match criterion
-    for key in selector_dict.keys():
 
-        value = selector_dict[key]
-        
-        if key in table.index.names:
-            selector_string = ' '.join(['table.index.get_level_values(key)', selector_type, 'value'])
-        else:
-            selector_string = ' '.join(['table[key]', selector_type, 'value'])
+def _get_criteria(criteria):
+    """Put the criteria for a column in the form of a list
+       This is a private function, not meant for general use.
 
-        table = table.ix[eval(selector_string)]
+       Input: value, (selector_type, value) pair, or list of pairs
 
-    # Clean up the index numbers if appropriate
-    if copy and (None in table.index.names) and (len(table.index.names) == 1):
-        table.reset_index(drop=True, inplace=True)
+       Output: list of (selector_type, value) pairs
+    """
 
-    return table
+    if isinstance(criteria, list):
+        criteria_list = criteria
+    elif isinstance(criteria, tuple) and (len(criteria) == 2) and (criteria[0] in _SELECTOR_TYPES):
+        criteria_list = [criteria]
+    else:
+        criteria_list = [('==', criteria)]
+
+    for selector_type, _ in criteria_list:
+        if selector_type not in _SELECTOR_TYPES:
+            raise SyntaxError("The selector_type must be a string and it must be one of the following: {}".format(_SELECTOR_TYPES))
+
+    return criteria_list
+
+
+def _get_mask(values, selector_type, value):
+    """Find the values that match a single criterion
+       This is a private function, not meant for general use.
+
+       Input: numpy array, selector type and value
+
+       Output: boolean numpy array
+    """
+
+    if selector_type == 'in':
+        return pd.Series(values).isin(list(value)).values
+    elif selector_type == 'between':
+        low, high = value
+        return (values >= low) & (values <= high)
+    else:
+        return np.asarray(_COMPARISONS[selector_type](values, value), dtype=bool)
+
+
+### An index of the rows for each residue across tables
+
+
+class ResidueIndex(object):
+    """An index of the rows belonging to each residue in every table
+       of a loop dictionary created by `parse_mfout`. The index is built
+       once, after which the rows for a residue can be retrieved from all 
+       tables without searching them:
+
+       residue_index = mf.ResidueIndex(loop_dict)
+       residue_5 = residue_index[5]
+       residue_5['relaxation'], residue_5['model_1']
+
+       Tables without a residue column (or index level) are not indexed.
+       Tables spilled to disk by `parse_mfout` are indexed by reading only
+       their residue column, and only the chunks holding a residue's rows
+       are read when it is retrieved.
+    """
+
+    def __init__(self, loop_dict, key=u'residue'):
+        """Input: dictionary of dataframes created by parse_mfout and
+                  the name of the residue column
+        """
+
+        self._loop_dict = loop_dict
+        self._order = dict()
+        self._limits = dict()
+
+        for table in loop_dict.keys():
+            dataframe = loop_dict[table]
+
+            # Spilled tables have no index, only columns
+            index_names = dataframe.index.names if isinstance(dataframe, pd.DataFrame) else list()
+            if (key not in dataframe.columns) and (key not in index_names):
+                continue
+
+            # Sort the row positions by residue, keeping the original 
+            # order within each residue, and find where each residue
+            # starts and stops in the sorted positions
+            values = _get_values(dataframe, key)
+            order = np.argsort(values, kind='mergesort')
+            residues, starts = np.unique(values[order], return_index=True)
+            stops = np.append(starts[1:], len(order))
+
+            self._order[table] = order
+            self._limits[table] = dict(zip(residues.tolist(), zip(starts.tolist(), stops.tolist())))
+
+        return
+
+
+    @property
+    def tables(self):
+        """The names of the indexed tables"""
+        return [table for table in self._loop_dict.keys() if table in self._order]
+
+
+    @property
+    def residues(self):
+        """All residues found in any of the indexed tables, sorted"""
+        return sorted(set().union(*[self._limits[table].keys() for table in self.tables]))
+
+
+    def positions(self, residue, table):
+        """Return the row positions of a residue in a table as an array, 
+           which is empty if the residue is not in the table
+        """
+
+        start, stop = self._limits[table].get(residue, (0, 0))
+        return self._order[table][start:stop]
+
+
+    def get(self, residue, tables=None):
+        """Return a dictionary of dataframes containing the rows of a residue 
+           in each of the indexed tables (or only those in `tables`)
+        """
+
+        if tables is None:
+            tables = self.tables
+
+        return OrderedDict([(table, _take_rows(self._loop_dict[table], self.positions(residue, table)))
+                            for table in tables])
+
+
+    def __getitem__(self, residue):
+        return self.get(residue)
+
+
+    def __contains__(self, residue):
+        return any(residue in self._limits[table] for table in self.tables)
+
+
+def _take_rows(dataframe, positions):
+    """Get the rows of a table at some positions
+       This is a private function, not meant for general use.
+
+       Input: Pandas dataframe or SpilledTable, array of row positions
+
+       Output: dataframe
+    """
+
+    if isinstance(dataframe, pd.DataFrame):
+        return dataframe.iloc[positions]
+
+    # The rows of a residue are in their original order, as a
+    # spilled table must read them
+    return dataframe.take(positions)
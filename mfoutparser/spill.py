@@ -0,0 +1,548 @@
+# coding: utf-8
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+from .read import DataFrame, _convert_data_tag, _index_data_tags, _read_data_tag, \
+                  _map_file, _iter_data_tag_chunks, _merge_print_formats
+from .memory import compact_tables
+
+
+# Approximate peak memory used while converting a data tag, as a multiple
+# of the size of its text (measured on large synthetic files)
+_PARSE_MEMORY_FACTOR = 10
+
+# Range of the number of rows in each chunk of a spilled table
+_MIN_SPILL_CHUNKSIZE = 1000
+_MAX_SPILL_CHUNKSIZE = 1000000
+
+# Lines starting with loop_ or an underscore (a loop label or a tag)
+_REGEX_LOOP_OR_LABEL = re.compile(br"""^[ \t]*(loop_[ \t]*\r?$|_)""", flags=re.MULTILINE)
+
+
+### Out-of-core tables written to disk when parsing with a memory budget
+
+
+class SpilledTable(object):
+    """A loop table returned by `parse_mfout` in place of a dataframe when
+       it was too large for the `memory_budget`. The table is stored on disk
+       in a Parquet file (in `spill_dir`), a chunk of rows at a time, and is
+       only read back as needed:
+
+       tag_dict, loop_dict = mf.parse_mfout('mfout', memory_budget=2*1024**3)
+       sse = loop_dict['sse']
+       sse.read(columns=['residue', 'simulated_sse'])
+       for chunk in sse.iter_chunks(columns=['simulated_sse']):
+           ...
+
+       The values, types and print format of the dataframes it returns
+       are the same as those of the table parsed in memory. The file is
+       kept until `remove` is called, which is also done on leaving a
+       `with` block:
+
+       with loop_dict['sse'] as sse:
+           sse.read(columns=['residue'])
+
+       Spilled tables can be passed to `write_all_to_file`, to
+       `write_all_to_binary` with the 'parquet' file format and to
+       `ResidueIndex`, which read them a chunk at a time. Other functions
+       (e.g. `query_data` and `aggregate_runs`) need a dataframe, which
+       is made with `read`.
+    """
+
+    def __init__(self, filename, columns, chunk_lengths, print_format):
+        self.filename = filename
+        self.columns = list(columns)
+        self.chunk_lengths = list(chunk_lengths)
+        self._print_format = print_format
+        return
+
+
+    @property
+    def shape(self):
+        return sum(self.chunk_lengths), len(self.columns)
+
+
+    def __len__(self):
+        return self.shape[0]
+
+
+    def read(self, columns=None):
+        """Read the table, or only some of its columns, into memory
+
+           Input: list of column names (default is all columns)
+
+           Output: dataframe
+        """
+
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(self.filename, columns=self._check_columns(columns))
+        return self._make_dataframe(table, 0)
+
+
+    def iter_chunks(self, columns=None):
+        """Read the table, or only some of its columns, a chunk of rows at a time
+
+           Input: list of column names (default is all columns)
+
+           Output: generator of dataframes, whose index continues
+                   from one chunk to the next
+        """
+
+        import pyarrow.parquet as pq
+
+        columns = self._check_columns(columns)
+        parquet_file = pq.ParquetFile(self.filename)
+
+        start = 0
+        for chunk in range(parquet_file.num_row_groups):
+            yield self._make_dataframe(parquet_file.read_row_group(chunk, columns=columns), start)
+            start += self.chunk_lengths[chunk]
+
+        return
+
+
+    def take(self, positions, columns=None):
+        """Read only some rows of the table, or of some of its columns,
+           reading only the chunks that contain them
+
+           Input: sorted array of row positions and list of column
+                  names (default is all columns)
+
+           Output: dataframe, indexed by the positions of the rows
+        """
+
+        import pyarrow.parquet as pq
+
+        columns = self._check_columns(columns)
+        parquet_file = pq.ParquetFile(self.filename)
+
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = np.cumsum([0] + self.chunk_lengths)
+
+        dataframe_list = list()
+        for chunk in range(parquet_file.num_row_groups):
+            first, last = np.searchsorted(positions, starts[chunk:chunk + 2])
+
+            # The first chunk is always read, so the result has the types of
+            # the table even if no rows are taken
+            if (first == last) and (chunk > 0):
+                continue
+
+            dataframe = self._make_dataframe(parquet_file.read_row_group(chunk, columns=columns),
+                                             starts[chunk])
+            dataframe_list.append(dataframe.iloc[positions[first:last] - starts[chunk]])
+
+        dataframe = DataFrame(pd.concat(dataframe_list)) if len(dataframe_list) > 1 \
+                    else dataframe_list[0]
+
+        return dataframe
+
+
+    def __getitem__(self, key):
+        # A list of columns is read as a dataframe and a single column as a series
+        if isinstance(key, list):
+            return self.read(columns=key)
+        return self.read(columns=[key])[key]
+
+
+    def to_csv(self, filename, *args, **kwargs):
+        """Write the table to a tab-separated file a chunk at a time,
+           as `DataFrame.to_csv` writes a dataframe, e.g. when it is
+           passed to `write_all_to_file`
+        """
+
+        # Later chunks are appended to the file without a header
+        mode = kwargs.pop(u'mode', u'w')
+        header = kwargs.pop(u'header', True)
+
+        for chunk_number, dataframe in enumerate(self.iter_chunks()):
+            dataframe.to_csv(filename, mode=mode if chunk_number == 0 else u'a',
+                             header=header if chunk_number == 0 else False, *args, **kwargs)
+
+        return
+
+
+    def remove(self):
+        """Delete the file holding the table, and its directory
+           once all tables spilled by the same parse are deleted
+        """
+
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+        # Each parse spills to a directory of its own
+        try:
+            os.rmdir(os.path.dirname(self.filename))
+        except OSError:
+            pass
+
+        return
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.remove()
+        return False
+
+
+    def __repr__(self):
+        return '{:s}({!r}, {:d} rows, {:d} columns)'.format(type(self).__name__, self.filename,
+                                                            *self.shape)
+
+
+    def _check_columns(self, columns):
+        # Unknown columns are reported as Pandas would
+        if columns is None:
+            return None
+
+        missing = [x for x in columns if x not in self.columns]
+        if len(missing) > 0:
+            raise KeyError(u'{} not in the columns of the table'.format(missing))
+
+        return list(columns)
+
+
+    def _make_dataframe(self, table, start):
+        # Convert a pyarrow table to a dataframe like the one parsed in memory
+        dataframe = DataFrame(table.to_pandas())
+        dataframe.index = pd.RangeIndex(start, start + len(dataframe))
+
+        # Missing strings are NaN in parsed tables rather than None
+        for col in dataframe.columns:
+            if dataframe[col].dtype == object:
+                dataframe[col] = dataframe[col].where(dataframe[col].notnull(), np.nan)
+
+        dataframe._print_format = dict([(key, value) for key, value in self._print_format.items()
+                                        if key in dataframe.columns])
+
+        return dataframe
+
+
+def _parse_mfout_bounded(mfoutfilename, memory_budget, spill_dir=None, stats=None, compact=False):
+    """Parse a ModelFree output file, writing large loop tables to disk
+       rather than holding them in memory when they don't fit the budget
+       This is a private function, not meant for general use.
+
+       Input: path to ModelFree output file, memory budget in bytes,
+              directory for the spilled tables, optional stats and
+              whether to compact the data
+
+       Output: two dictionaries containing data and tables, as created
+               by parse_mfout, with a SpilledTable in place of each
+               table that was written to disk
+    """
+
+    tag_dict = OrderedDict()
+    loop_dict = OrderedDict()
+    header_dict = OrderedDict()
+
+    # Memory used by the tables kept so far
+    used_bytes = 0
+
+    # The directory for the tables spilled by this parse, which
+    # is only made once the first table is spilled
+    parse_dir = None
+
+    # Each data tag is read and converted separately, so
+    # the text of the whole file is never held in memory
+    with open(mfoutfilename, 'rb') as mfoutfile:
+        if stats is not None:
+            clock = stats.start()
+
+        mfoutmap = _map_file(mfoutfile)
+        try:
+            data_tag_index = _index_data_tags(mfoutmap)
+
+            if stats is not None:
+                clock = stats.record(u'index', None, clock, bytes=len(mfoutmap))
+
+            for data_key, (start, end) in data_tag_index.items():
+
+                # Data tags that fit in the rest of the budget are parsed in memory
+                # and so are any that aren't a single loop and can't be spilled
+                fits = used_bytes + _PARSE_MEMORY_FACTOR * (end - start) <= memory_budget
+
+                if (not fits) and (data_key != u'data_header') and \
+                   _is_single_loop(mfoutmap, start, end):
+                    if parse_dir is None:
+                        parse_dir = _make_parse_dir(spill_dir)
+
+                    key = data_key.replace(u'data_', u'')
+                    filename = os.path.join(parse_dir, u'_'.join([os.path.basename(mfoutfilename),
+                                                                  u'loop', key]) + u'.parquet')
+
+                    chunksize = _spill_chunksize(mfoutmap, start, end, memory_budget)
+                    table = _spill_data_tag(mfoutfile, data_key, start, end, filename, chunksize)
+
+                    # Otherwise the table is parsed in memory after all
+                    if table is not None:
+                        loop_dict[key] = table
+
+                        if stats is not None:
+                            clock = stats.record(u'spill', data_key, clock, bytes=end - start,
+                                                 rows=table.shape[0], columns=table.shape[1])
+                        continue
+
+                text = _read_data_tag(mfoutmap, start, end)
+
+                if stats is not None:
+                    clock = stats.record(u'read', data_key, clock, bytes=end - start)
+
+                block_tag_dict, block_loop_dict = _convert_data_tag(data_key, text, stats)
+                del text
+
+                if compact:
+                    compact_tables(block_tag_dict)
+                    compact_tables(block_loop_dict)
+
+                for table in list(block_tag_dict.values()) + list(block_loop_dict.values()):
+                    used_bytes += int(table.memory_usage(index=True, deep=True).sum())
+
+                tag_dict.update(block_tag_dict)
+
+                # The header tables are placed after all other tables
+                if data_key == u'data_header':
+                    header_dict.update(block_loop_dict)
+                else:
+                    loop_dict.update(block_loop_dict)
+
+                if stats is not None:
+                    clock = stats.start()
+        except Exception:
+            # The tables spilled before the error are never returned
+            if parse_dir is not None:
+                shutil.rmtree(parse_dir, ignore_errors=True)
+            raise
+        finally:
+            mfoutmap.close()
+
+    loop_dict.update(header_dict)
+
+    # Nothing may have been spilled after all
+    if parse_dir is not None:
+        try:
+            os.rmdir(parse_dir)
+        except OSError:
+            pass
+
+    return tag_dict, loop_dict
+
+
+def _make_parse_dir(spill_dir):
+    """Make a new directory for the tables spilled by one parse, so the
+       files of different parses never overwrite each other
+       This is a private function, not meant for general use.
+
+       Input: directory for the spilled tables, which is made if it is
+              missing, or None for the system's temporary directory
+
+       Output: path of the new directory
+    """
+
+    if (spill_dir is not None) and (not os.path.isdir(spill_dir)):
+        try:
+            os.makedirs(spill_dir)
+        except OSError:
+            # Another parse may have made it
+            if not os.path.isdir(spill_dir):
+                raise
+
+    return tempfile.mkdtemp(prefix=u'mfoutparser_', dir=spill_dir)
+
+
+def _is_single_loop(buffer, start, end):
+    """Check if the data for a data tag are a single (possibly nested) loop
+       without tags, which can be spilled to disk a chunk at a time
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file and
+              the byte offsets of the data
+
+       Output: True or False
+    """
+
+    # The loop_ tags and labels must all come first, one after
+    # the other, with nothing but blank lines or comments between them
+    position = start
+    expect_loop = True
+    number_loops = 0
+
+    for match in _REGEX_LOOP_OR_LABEL.finditer(buffer, start, end):
+        between = buffer[position:match.start()].decode(u'utf-8')
+        if any(x.strip() and not x.strip().startswith(u'#') for x in between.split(u'\n')):
+            return False
+
+        is_loop = match.group(1).startswith(b'loop_')
+        if is_loop != expect_loop:
+            return False
+
+        number_loops += is_loop
+        expect_loop = not expect_loop
+
+        # The rest of a label line is its labels
+        position = buffer.find(b'\n', match.end(), end)
+        if position < 0:
+            position = end
+
+    return (number_loops > 0) and expect_loop
+
+
+def _spill_chunksize(buffer, start, end, memory_budget):
+    """Choose the number of rows spilled at a time, so that converting
+       a chunk uses about a quarter of the memory budget
+       This is a private function, not meant for general use.
+
+       Input: bytes or memory map of a ModelFree file, the byte
+              offsets of the data and memory budget in bytes
+
+       Output: number of rows
+    """
+
+    # The length of the lines is estimated from the beginning of the data
+    sample = buffer[start:min(end, start + 65536)]
+    line_bytes = float(len(sample)) / max(sample.count(b'\n'), 1)
+
+    chunksize = int(memory_budget / 4. / (_PARSE_MEMORY_FACTOR * line_bytes))
+
+    return min(max(chunksize, _MIN_SPILL_CHUNKSIZE), _MAX_SPILL_CHUNKSIZE)
+
+
+def _spill_data_tag(mfoutfile, data_key, start, end, filename, chunksize):
+    """Convert the loop in a data tag a chunk at a time and write each
+       chunk to a Parquet file (requires pyarrow)
+       This is a private function, not meant for general use.
+
+       Input: file opened in binary mode, data tag name, the byte offsets
+              of its data, name of the Parquet file and rows per chunk
+
+       Output: SpilledTable, or None if the loop has no rows or the
+               type of a column changes between chunks in a way that
+               only parsing the whole table at once gets right
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    dtypes = None
+    chunk_lengths = list()
+    format_dict = OrderedDict()
+
+    try:
+        for chunk in _iter_data_tag_chunks(mfoutfile, data_key, start, end, chunksize):
+
+            for col, print_format in chunk._print_format.items():
+                format_dict.setdefault(col, list()).append(print_format)
+
+            if dtypes is None:
+                dtypes = chunk.dtypes
+            else:
+                common_dtypes = _common_dtypes(dtypes, chunk.dtypes)
+                if common_dtypes is None:
+                    writer.close()
+                    writer = None
+                    os.remove(filename)
+                    return None
+
+                # The chunks already written are rewritten with any wider types,
+                # e.g. if integers in the first chunk are followed by floats
+                if not common_dtypes.equals(dtypes):
+                    writer.close()
+                    dtypes = common_dtypes
+                    writer = _rewrite_spilled_file(filename, dtypes)
+
+                chunk = chunk.astype(dict(dtypes))
+
+            if writer is None:
+                table = pa.Table.from_pandas(pd.DataFrame(chunk), preserve_index=False)
+                writer = pq.ParquetWriter(filename, table.schema)
+            else:
+                table = pa.Table.from_pandas(pd.DataFrame(chunk), schema=writer.schema,
+                                             preserve_index=False)
+            writer.write_table(table)
+
+            chunk_lengths.append(len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    # A loop without rows is small enough to parse in memory
+    if dtypes is None:
+        return None
+
+    print_format = dict([(col, _merge_print_formats(format_list))
+                         for col, format_list in format_dict.items()])
+
+    return SpilledTable(filename, dtypes.index, chunk_lengths, print_format)
+
+
+def _common_dtypes(dtypes, chunk_dtypes):
+    """Find the types that hold the columns of both the chunks written so far
+       and the next chunk, as parsing the whole table at once would type them
+       This is a private function, not meant for general use.
+
+       Input: types of the chunks written so far and of the next chunk
+
+       Output: series of types, or None if a column is numbers in some
+               chunks and text in others, whose text is only kept when
+               the whole table is parsed at once
+    """
+
+    common_dtypes = dtypes.copy()
+
+    for col in dtypes.index:
+        if chunk_dtypes[col] == dtypes[col]:
+            continue
+
+        # e.g. float values that happen to all be integers in one of the chunks
+        if (dtypes[col].kind in u'iuf') and (chunk_dtypes[col].kind in u'iuf'):
+            common_dtypes[col] = np.promote_types(dtypes[col], chunk_dtypes[col])
+        else:
+            return None
+
+    return common_dtypes
+
+
+def _rewrite_spilled_file(filename, dtypes):
+    """Rewrite the chunks already spilled to a Parquet file with new types
+       This is a private function, not meant for general use.
+
+       Input: name of the Parquet file and the new type of each column
+
+       Output: open ParquetWriter for the rest of the chunks
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    old_filename = filename + u'.old'
+    os.rename(filename, old_filename)
+
+    writer = None
+    try:
+        # The chunks are copied one at a time, so the table is never all in memory
+        parquet_file = pq.ParquetFile(old_filename)
+        for chunk in range(parquet_file.num_row_groups):
+            dataframe = parquet_file.read_row_group(chunk).to_pandas().astype(dict(dtypes))
+            table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+            if writer is None:
+                writer = pq.ParquetWriter(filename, table.schema)
+            writer.write_table(table)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        raise
+    finally:
+        os.remove(old_filename)
+
+    return writer
@@ -0,0 +1,107 @@
+# coding: utf-8
+import time
+from collections import OrderedDict
+
+
+# The most precise clock available
+_clock = getattr(time, 'perf_counter', time.time)
+
+# Counts recorded for each stage, which are None when they don't apply
+_COUNT_NAMES = [u'lines', u'rows', u'columns', u'bytes']
+
+
+### Timing of each stage of parsing
+
+
+class ParseStats(object):
+    """A record of the time spent in each stage of parsing a ModelFree
+       output file. Pass an instance to `parse_mfout` as `stats` to use it:
+
+       stats = mf.ParseStats()
+       tag_dict, loop_dict = mf.parse_mfout('mfout', stats=stats)
+       stats.summary()
+
+       The stages are 'index' (finding the data tags in the file, which
+       is recorded once for the whole file), 'read' (reading the data for
+       a data tag), 'classify' (finding the tags and loops in the lines,
+       which is skipped for loops laid out as a registered schema),
+       'extract' (building the loop tables), 'clean_up' (naming the tables
+       and columns), 'coerce' (converting columns to numbers) and 'spill'
+       (writing a table to disk with a `memory_budget`, in place of the
+       other stages). One
+       record is made for each stage of each data tag, and each record
+       is a dictionary of:
+
+       stage, block (the data tag name), seconds, lines, rows, columns, bytes
+
+       Counts that don't apply to a stage are None. If a `callback` is
+       given, it is called with each record as soon as it is made, e.g. to
+       send it to a metrics service. When no stats are passed to
+       `parse_mfout`, no timing is done at all.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.records = list()
+        return
+
+
+    def start(self):
+        """Return the current time, to be passed to `record` when the stage ends"""
+        return _clock()
+
+
+    def record(self, stage, block, start, **counts):
+        """Record a stage that began at `start` and return the current time,
+           so consecutive stages can be timed without another call
+        """
+
+        stop = _clock()
+
+        record = OrderedDict([(u'stage', stage), (u'block', block),
+                              (u'seconds', stop - start)])
+        for name in _COUNT_NAMES:
+            record[name] = counts.get(name)
+
+        self.records.append(record)
+
+        if self.callback is not None:
+            self.callback(record)
+
+        return stop
+
+
+    @property
+    def seconds(self):
+        """The total time of all recorded stages"""
+        return sum(record[u'seconds'] for record in self.records)
+
+
+    def summary(self, by=u'stage'):
+        """Return the total time and counts for each stage (or each block
+           if `by` is 'block') as a dictionary of dictionaries
+        """
+
+        summary = OrderedDict()
+
+        for record in self.records:
+            total = summary.setdefault(record[by], OrderedDict([(u'seconds', 0.0), (u'records', 0)]))
+            total[u'seconds'] += record[u'seconds']
+            total[u'records'] += 1
+
+            for name in _COUNT_NAMES:
+                if record[name] is not None:
+                    total[name] = total.get(name, 0) + record[name]
+
+        return summary
+
+
+    def clear(self):
+        """Remove all records"""
+        del self.records[:]
+        return
+
+
+    def __repr__(self):
+        return '{:s}({:d} records, {:.4f} seconds)'.format(type(self).__name__,
+                                                           len(self.records), self.seconds)
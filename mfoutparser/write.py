@@ -1,46 +1,172 @@
 # coding: utf-8
+import os
+import time
+import tarfile
+import zipfile
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from .correlation import correlation_tensor_to_matrices
 
 
 ### Export data to file
 
 
-def _write_tag_loop_dict_to_file(tag_loop_dict, filename_prefix=u'', preserve_format=True, 
-                                 sep='\t', na_rep=u'', index=True, *args, **kwargs):
-    """Write a tag or loop dictionary to a file
+def _table_filenames(tag_loop_dict, filename_prefix=u''):
+    """Make the file name for each table in a tag or loop dictionary
        This is a private function, not meant for general use.
 
        Input: dictionary of dataframes, prefix for file name
 
-       Output: tab-separated file for each dictionary
+       Output: list of (file name, key) pairs
     """
 
     extension = '.tsv'
-    
-    # Write all the dataframes to separate files with the key name appended
+
+    filename_list = list()
     for key in tag_loop_dict.keys():
 
         # Make the filename
-        if filename_prefix is u'':
+        if filename_prefix == u'':
             filename = key
         else:
             filename = u'_'.join([filename_prefix, key])
 
         filename += extension
 
-        dataframe = tag_loop_dict[key]
+        filename_list.append((filename, key))
+
+    return filename_list
+
+
+class _TableArchive(object):
+    """A zip or tar archive that tables are written to as members
+       This is a private class, not meant for general use.
+    """
+
+    def __init__(self, filename):
+        # The type of archive is determined by the extension
+        self.filename = filename
+
+        if filename.endswith(u'.zip'):
+            self._archive = zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED)
+        elif filename.endswith((u'.tar.gz', u'.tgz')):
+            self._archive = tarfile.open(filename, 'w:gz')
+        elif filename.endswith((u'.tar.bz2', u'.tbz2')):
+            self._archive = tarfile.open(filename, 'w:bz2')
+        elif filename.endswith(u'.tar'):
+            self._archive = tarfile.open(filename, 'w')
+        else:
+            raise ValueError("The archive must be a file name ending in one of the following: "
+                             "['.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2']")
+
+        return
+
+
+    def add(self, name, data):
+        # Add a member to the archive from a bytes string
+        if isinstance(self._archive, zipfile.ZipFile):
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            self._archive.addfile(info, BytesIO(data))
+
+        return
+
+
+    def close(self):
+        self._archive.close()
+        return
+
+
+def _format_table(dataframe, preserve_format=True, sep='\t', na_rep=u'',
+                  index=True, *args, **kwargs):
+    """Write a table to a string in memory
+       This is a private function, not meant for general use.
+
+       Input: dataframe
+
+       Output: bytes string containing the tab-separated table
+    """
+
+    buffer = StringIO()
+    dataframe.to_csv(buffer, preserve_format=preserve_format,
+                     sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
+
+    return buffer.getvalue().encode(u'utf-8')
+
+
+def _write_tag_loop_dict_to_file(tag_loop_dict, filename_prefix=u'', preserve_format=True,
+                                 sep='\t', na_rep=u'', index=True, workers=1, archive=None,
+                                 *args, **kwargs):
+    """Write a tag or loop dictionary to a file
+       This is a private function, not meant for general use.
+
+       Input: dictionary of dataframes, prefix for file name,
+              number of threads and an optional open archive
+
+       Output: tab-separated file for each dictionary
+    """
+
+    filename_list = _table_filenames(tag_loop_dict, filename_prefix)
+
+    if archive is not None:
+        # Tables are formatted (concurrently if requested) and
+        # then added to the archive one at a time
+        def write_table(filename_key):
+            filename, key = filename_key
+            return filename, _format_table(tag_loop_dict[key], preserve_format=preserve_format,
+                                           sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
+    else:
+        # Write all the dataframes to separate files with the key name appended
+        def write_table(filename_key):
+            filename, key = filename_key
+            dataframe = tag_loop_dict[key]
+            dataframe.to_csv(filename, preserve_format=preserve_format,
+                             sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
+            return filename, None
+
+    # Without threads each table is written (or added to the 
+    # archive) before the next one is formatted
+    if workers == 1:
+        result_list = (write_table(filename_key) for filename_key in filename_list)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            result_list = list(executor.map(write_table, filename_list))
+
+    for filename, data in result_list:
+        if archive is not None:
+            # Members are named without the directory of the prefix, so
+            # they are extracted where the archive is extracted
+            archive.add(os.path.basename(filename), data)
 
-        dataframe.to_csv(filename, preserve_format=preserve_format, 
-                         sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
-        
     return
 
 
 def write_all_to_file(tag_dict, loop_dict, filename_prefix=u'', preserve_format=True, 
-                      sep='\t', na_rep=u'', index=True, *args, **kwargs):
+                      sep='\t', na_rep=u'', index=True, workers=1, archive=None, 
+                      *args, **kwargs):
     """Write ModelFree parsed data to tab-separated files
 
        Input: dictionaries created by parse_mfout and optional
-              filename prefix
+              filename prefix, number of threads and archive name
+
+              workers is the number of threads used to write the
+              tables concurrently, the default (1) writes them one
+              at a time
+
+              archive is None (default) to write each table to a
+              separate file or the name of a single zip or tar file
+              (ending in '.zip', '.tar', '.tar.gz' or '.tar.bz2') that
+              will contain all of the tables, named as the separate
+              files would be but without the directory of the prefix
 
        Output: tab-separated files
     """
@@ -51,14 +177,23 @@ def write_all_to_file(tag_dict, loop_dict, filename_prefix=u'', preserve_format=
     tag_prefix = u'tag'
     loop_prefix = u'loop'
     
-    if filename_prefix is not '':
+    if filename_prefix != u'':
         tag_prefix = u'_'.join([filename_prefix, tag_prefix])
         loop_prefix = u'_'.join([filename_prefix, loop_prefix])
         
-    _write_tag_loop_dict_to_file(tag_dict, tag_prefix, preserve_format=preserve_format, 
-                                 sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
-    _write_tag_loop_dict_to_file(loop_dict, loop_prefix, preserve_format=preserve_format, 
-                                 sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
+    if archive is not None:
+        archive = _TableArchive(archive)
+
+    try:
+        _write_tag_loop_dict_to_file(tag_dict, tag_prefix, preserve_format=preserve_format, 
+                                     sep=sep, na_rep=na_rep, index=index, workers=workers, 
+                                     archive=archive, *args, **kwargs)
+        _write_tag_loop_dict_to_file(loop_dict, loop_prefix, preserve_format=preserve_format, 
+                                     sep=sep, na_rep=na_rep, index=index, workers=workers, 
+                                     archive=archive, *args, **kwargs)
+    finally:
+        if archive is not None:
+            archive.close()
     
     return
 
@@ -67,9 +202,10 @@ def write_correlation_matrix_to_file(dataframe, filename_prefix=u'', preserve_fo
                                     sep='\t', na_rep=u'', index=True, *args, **kwargs):
     """Write pivoted correlation matrix to file
 
-       Input: dataframe created by `make_correlation_matrices`, optional
-              filename prefix, and the value to use for undefined entries 
-              (left empty by default)
+       Input: dataframe created by `make_correlation_matrices` or the
+              (tensor, residues, parameters, print_format) created by 
+              `make_correlation_tensor`, optional filename prefix, and the 
+              value to use for undefined entries (left empty by default)
 
        Output: tab-separated file named with `filename_prefix` 
                and 'correlation_matrix_pivot'
@@ -78,11 +214,15 @@ def write_correlation_matrix_to_file(dataframe, filename_prefix=u'', preserve_fo
     extension='.tsv'
 
     filename = u'correlation_matrix_pivot'
-    if filename_prefix is not '':
+    if filename_prefix != u'':
         filename = '_'.join([filename_prefix, filename])
 
     filename += extension
 
+    # Lay out the matrices from the dense array as a table
+    if isinstance(dataframe, tuple):
+        dataframe = correlation_tensor_to_matrices(*dataframe)
+
     dataframe.to_csv(filename, preserve_format=preserve_format, 
                      sep=sep, na_rep=na_rep, index=index, *args, **kwargs)
 
@@ -1,5 +1,6 @@
 #! /usr/bin/env python
 
+import sys
 from mfoutparser import DOCSTRING, VERSION
 
 DESCRIPTION = 'mfoutparser: efficient and convenient parsing of ModelFree output files.'
@@ -36,6 +37,16 @@ def check_dependencies():
         install_requires.append('pandas')
 
 
+    # concurrent.futures (used to parse and write files in parallel)
+    # is only part of the standard library on python 3
+    if sys.version_info[0] == 2:
+        try:
+            import concurrent.futures
+
+        except ImportError:
+            install_requires.append('futures')
+
+
     return install_requires
 
 
@@ -56,6 +67,7 @@ if __name__ == "__main__":
         download_url=DOWNLOAD_URL,
         install_requires=install_requires,
         packages=['mfoutparser'],
+        entry_points={'console_scripts': ['mfoutparser-convert = mfoutparser.cli:main']},
         include_package_data = True,
         classifiers=[
                      'Intended Audience :: Science/Research',
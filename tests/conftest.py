@@ -0,0 +1,31 @@
+# coding: utf-8
+import os
+import sys
+import pytest
+
+
+# The asyncio tests use syntax that is only available on python >= 3.5
+collect_ignore = [u'test_aio.py'] if sys.version_info < (3, 5) else list()
+
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           u'mfoutparser', u'examples', u'input_data')
+
+
+@pytest.fixture(params=[u'singlefield', u'multifield', u'compare'])
+def mfoutfilename(request):
+    """Each of the example ModelFree output files"""
+    return os.path.join(EXAMPLE_DIR, u'mfout.' + request.param)
+
+
+@pytest.fixture
+def write_mfout(tmpdir):
+    """Write text to a ModelFree output file and return its name"""
+
+    def write(text, name=u'mfout'):
+        filename = str(tmpdir.join(name))
+        with open(filename, 'w') as mfoutfile:
+            mfoutfile.write(text)
+        return filename
+
+    return write
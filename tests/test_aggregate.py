@@ -0,0 +1,80 @@
+# coding: utf-8
+import numpy as np
+import pandas as pd
+
+import mfoutparser as mf
+from conftest import EXAMPLE_DIR
+
+
+EXAMPLES = [EXAMPLE_DIR + u'/mfout.' + x for x in [u'compare', u'singlefield', u'multifield']]
+
+RUN_1 = u'''data_x
+loop_
+     _Residue   _Value   _Flag
+     1          0.50     1
+     2          0.25     0
+stop_
+'''
+
+RUN_2 = u'''data_x
+loop_
+     _Residue   _Value
+     3          1.2345E-01
+stop_
+'''
+
+RUN_3 = u'''data_x
+loop_
+     _Residue   _Value   _Flag
+     4          2        1
+stop_
+'''
+
+
+def test_each_run_is_its_parsed_table():
+    results, errors = mf.parse_mfout_many(EXAMPLES, workers=1)
+    tag_dict, loop_dict = mf.aggregate_runs(results)
+
+    model = loop_dict[u'model_1']
+    assert model.index.names[0] == u'run'
+    assert list(model.index.levels[0]) == sorted(EXAMPLES)
+
+    for run, (run_tag_dict, run_loop_dict) in results.items():
+        table = model.xs(run, level=u'run')
+        expected = run_loop_dict[u'model_1']
+
+        assert np.array_equal(table.index.values, expected.index.values)
+        for col in expected.columns:
+            assert table[col].tolist() == expected[col].tolist()
+
+
+def test_types_and_print_formats_are_merged(write_mfout):
+    results = [mf.parse_mfout(write_mfout(text, name=u'mfout_{}'.format(number)))
+               for number, text in enumerate([RUN_1, RUN_2, RUN_3])]
+    tag_dict, loop_dict = mf.aggregate_runs(results, run_name=u'number')
+
+    table = loop_dict[u'x']
+
+    assert list(table.index.names) == [u'number', None]
+    assert table.index.get_level_values(u'number').tolist() == [0, 0, 1, 2]
+    assert table[u'residue'].dtype == np.int64
+    assert table[u'value'].tolist() == [0.5, 0.25, 0.12345, 2.]
+    assert table[u'value'].dtype == np.float64
+
+    # The run without flags has missing values, so the flags are floats
+    assert table[u'flag'].dtype == np.float64
+    assert np.isnan(table[u'flag'].iloc[2])
+
+    assert table._print_format == {u'value': u'{:.4E}'}
+
+
+def test_a_list_of_runs_with_strings(mfoutfilename):
+    parsed = mf.parse_mfout(mfoutfilename)
+    tag_dict, loop_dict = mf.aggregate_runs([parsed, parsed])
+
+    model = loop_dict[u'model_1']
+    assert len(model) == 2 * len(parsed[1][u'model_1'])
+    assert model[u'model_free_name'].dtype == object
+    assert model._print_format == parsed[1][u'model_1']._print_format
+    pd.testing.assert_frame_equal(pd.DataFrame(model.xs(1, level=u'run')),
+                                  pd.DataFrame(parsed[1][u'model_1']))
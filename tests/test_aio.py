@@ -0,0 +1,108 @@
+# coding: utf-8
+import asyncio
+
+import pytest
+
+import mfoutparser as mf
+from mfoutparser import aio
+from conftest import EXAMPLE_DIR
+
+
+EXAMPLES = [EXAMPLE_DIR + u'/mfout.' + x for x in [u'compare', u'singlefield', u'multifield']]
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+class FakeParser(object):
+    """Stands in for parse_mfout_async, taking the time given for each
+       file and recording how many files are parsed at once
+    """
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.max_active = 0
+        self.cancelled = list()
+
+    async def __call__(self, mfoutfilename, executor=None, cache=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays[mfoutfilename])
+        except asyncio.CancelledError:
+            self.cancelled.append(mfoutfilename)
+            raise
+        finally:
+            self.active -= 1
+
+        if mfoutfilename.startswith(u'bad'):
+            raise IOError(mfoutfilename)
+
+        return mfoutfilename, None
+
+
+def test_results_match_parse_mfout_and_errors_are_collected(tmpdir):
+    missing = str(tmpdir.join(u'missing_mfout'))
+    results, errors = run(mf.parse_mfout_many_async(EXAMPLES[:1] + [missing] + EXAMPLES[1:]))
+
+    assert list(results.keys()) == EXAMPLES
+    assert list(errors.keys()) == [missing]
+
+    for mfoutfilename, (tag_dict, loop_dict) in results.items():
+        expected_tag_dict, expected_loop_dict = mf.parse_mfout(mfoutfilename)
+        assert list(loop_dict.keys()) == list(expected_loop_dict.keys())
+        for key, table in loop_dict.items():
+            assert table.equals(expected_loop_dict[key])
+            assert table._print_format == expected_loop_dict[key]._print_format
+
+
+@pytest.mark.parametrize(u'ordered, expected', [(True, [u'a', u'b', u'c']),
+                                                (False, [u'c', u'a', u'b'])])
+def test_result_order(monkeypatch, ordered, expected):
+    monkeypatch.setattr(aio, u'parse_mfout_async', FakeParser({u'a': 0.02, u'b': 0.04,
+                                                               u'c': 0.0, u'bad': 0.01}))
+
+    results, errors = run(aio.parse_mfout_many_async([u'a', u'b', u'bad', u'c', u'a'],
+                                                     ordered=ordered))
+
+    assert list(results.keys()) == expected
+    assert list(errors.keys()) == [u'bad']
+    assert isinstance(errors[u'bad'], IOError)
+
+
+def test_concurrency_is_limited(monkeypatch):
+    names = [u'file_{}'.format(x) for x in range(10)]
+    parser = FakeParser(dict([(x, 0.01) for x in names]))
+    monkeypatch.setattr(aio, u'parse_mfout_async', parser)
+
+    results, errors = run(aio.parse_mfout_many_async(names, concurrency=3))
+
+    assert list(results.keys()) == names
+    assert parser.max_active == 3
+
+
+def test_cancelling_stops_every_file(monkeypatch):
+    names = [u'file_{}'.format(x) for x in range(6)]
+    parser = FakeParser(dict([(x, 10.) for x in names]))
+    monkeypatch.setattr(aio, u'parse_mfout_async', parser)
+
+    async def cancel_soon():
+        task = asyncio.ensure_future(aio.parse_mfout_many_async(names, concurrency=2))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(cancel_soon())
+
+    # Only the files being parsed had started, and none are still running
+    assert sorted(parser.cancelled) == names[:2]
+    assert parser.active == 0
@@ -0,0 +1,66 @@
+# coding: utf-8
+import os
+
+import pytest
+
+import mfoutparser as mf
+
+
+def assert_same_tables(tables, expected):
+    assert list(tables.keys()) == list(expected.keys())
+    for key in expected:
+        assert tables[key].equals(expected[key])
+        assert tables[key]._print_format == expected[key]._print_format
+
+
+def test_hdf5_round_trip(mfoutfilename, tmpdir):
+    pytest.importorskip(u'tables')
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    prefix = str(tmpdir.join(u'mfout'))
+
+    mf.write_all_to_binary(tag_dict, loop_dict, prefix, file_format=u'hdf5')
+    read_tag_dict, read_loop_dict = mf.read_all_from_binary(prefix, file_format=u'hdf5')
+
+    assert_same_tables(read_tag_dict, tag_dict)
+    assert_same_tables(read_loop_dict, loop_dict)
+
+
+def test_parquet_round_trip(mfoutfilename, tmpdir):
+    pytest.importorskip(u'pyarrow')
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    prefix = str(tmpdir.join(u'mfout'))
+
+    mf.write_all_to_binary(tag_dict, loop_dict, prefix, file_format=u'parquet')
+    read_tag_dict, read_loop_dict = mf.read_all_from_binary(prefix, file_format=u'parquet')
+
+    assert_same_tables(read_tag_dict, tag_dict)
+    assert_same_tables(read_loop_dict, loop_dict)
+
+
+def test_parquet_files_from_an_earlier_write_are_ignored(mfoutfilename, tmpdir):
+    pytest.importorskip(u'pyarrow')
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    prefix = str(tmpdir.join(u'mfout'))
+
+    mf.write_all_to_binary(tag_dict, loop_dict, prefix, file_format=u'parquet')
+    number_files = len(os.listdir(str(tmpdir)))
+
+    # The same prefix is written again with one table fewer
+    del loop_dict[u'model_1']
+    mf.write_all_to_binary(tag_dict, loop_dict, prefix, file_format=u'parquet')
+    read_tag_dict, read_loop_dict = mf.read_all_from_binary(prefix, file_format=u'parquet')
+
+    assert len(os.listdir(str(tmpdir))) == number_files
+    assert_same_tables(read_loop_dict, loop_dict)
+
+
+def test_compact_hdf5_round_trip(mfoutfilename, tmpdir):
+    pytest.importorskip(u'tables')
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename, compact=True)
+    prefix = str(tmpdir.join(u'mfout'))
+
+    mf.write_all_to_binary(tag_dict, loop_dict, prefix, file_format=u'hdf5')
+    read_tag_dict, read_loop_dict = mf.read_all_from_binary(prefix, file_format=u'hdf5')
+
+    assert_same_tables(read_tag_dict, tag_dict)
+    assert_same_tables(read_loop_dict, loop_dict)
@@ -0,0 +1,95 @@
+# coding: utf-8
+import os
+import pickle
+import shutil
+
+import mfoutparser as mf
+
+
+def copy_mfout(mfoutfilename, tmpdir):
+    filename = str(tmpdir.join(u'mfout'))
+    shutil.copy(mfoutfilename, filename)
+    return filename
+
+
+def test_cached_data_are_reused(mfoutfilename, tmpdir):
+    filename = copy_mfout(mfoutfilename, tmpdir)
+    cache = mf.ParseCache(str(tmpdir.join(u'cache')))
+
+    tag_dict, loop_dict = mf.parse_mfout(filename, cache=cache)
+    cached = cache.get(filename)
+
+    assert cached is not None
+    for key, table in loop_dict.items():
+        assert cached[1][key].equals(table)
+        assert cached[1][key]._print_format == table._print_format
+
+
+def test_changed_file_is_not_reused(mfoutfilename, tmpdir):
+    filename = copy_mfout(mfoutfilename, tmpdir)
+    cache = mf.ParseCache(str(tmpdir.join(u'cache')))
+    mf.parse_mfout(filename, cache=cache)
+
+    with open(filename, 'a') as mfoutfile:
+        mfoutfile.write(u'\n')
+
+    assert cache.get(filename) is None
+
+
+def test_data_are_stored_under_the_key_from_before_parsing(mfoutfilename, tmpdir):
+    filename = copy_mfout(mfoutfilename, tmpdir)
+    cache = mf.ParseCache(str(tmpdir.join(u'cache')))
+
+    # The file changes while it is being parsed
+    key = cache.key(filename)
+    tag_dict, loop_dict = mf.parse_mfout(filename)
+    with open(filename, 'a') as mfoutfile:
+        mfoutfile.write(u'\n')
+    cache.put(filename, tag_dict, loop_dict, key=key)
+
+    assert cache.get(filename) is None
+
+
+def test_unloadable_entry_is_a_miss_and_removed(mfoutfilename, tmpdir):
+    filename = copy_mfout(mfoutfilename, tmpdir)
+    cache = mf.ParseCache(str(tmpdir.join(u'cache')))
+    mf.parse_mfout(filename, cache=cache)
+
+    # Data pickled with a class that can no longer be imported
+    entry = cache._entry_path(filename)
+    with open(entry, 'wb') as entryfile:
+        pickle.dump(cache.key(filename), entryfile)
+        entryfile.write(b'cmfoutparser_missing_module\nMissing\n.')
+
+    assert cache.get(filename) is None
+    assert not os.path.exists(entry)
+
+    # The file is parsed again and cached
+    tag_dict, loop_dict = mf.parse_mfout(filename, cache=cache)
+    assert cache.get(filename) is not None
+
+
+def test_least_recently_used_entries_are_evicted(tmpdir):
+    cache = mf.ParseCache(str(tmpdir.join(u'cache')), max_size=None)
+
+    filename_dict = dict()
+    for name in [u'a', u'b', u'c']:
+        filename_dict[name] = str(tmpdir.join(name))
+        with open(filename_dict[name], 'w') as mfoutfile:
+            mfoutfile.write(u'data_x\n_Tag 1\n')
+
+    mf.parse_mfout(filename_dict[u'a'], cache=cache)
+    mf.parse_mfout(filename_dict[u'b'], cache=cache)
+
+    # The cache holds two entries but not three, and a was cached before b
+    cache.max_size = cache.size() * 5 // 4
+    for mtime, name in [(100, u'a'), (200, u'b')]:
+        os.utime(cache._entry_path(filename_dict[name]), (mtime, mtime))
+
+    # Using a makes b the least recently used entry
+    assert cache.get(filename_dict[u'a']) is not None
+    mf.parse_mfout(filename_dict[u'c'], cache=cache)
+
+    cached = [name for name in [u'a', u'b', u'c']
+              if os.path.exists(cache._entry_path(filename_dict[name]))]
+    assert cached == [u'a', u'c']
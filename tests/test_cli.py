@@ -0,0 +1,70 @@
+# coding: utf-8
+import os
+import shutil
+
+import pytest
+
+from mfoutparser import cli
+
+
+# The optional library needed to write each binary format
+BACKENDS = {u'hdf5': u'tables', u'parquet': u'pyarrow'}
+
+
+@pytest.fixture
+def mfout_tree(mfoutfilename, tmpdir):
+    """A directory containing a copy of an example file"""
+    shutil.copy(mfoutfilename, str(tmpdir.join(u'mfout')))
+    return tmpdir
+
+
+def converted_files(tmpdir):
+    return sorted(x for x in os.listdir(str(tmpdir)) if x != u'mfout')
+
+
+@pytest.mark.parametrize(u'file_format', [u'tsv', u'hdf5', u'parquet'])
+def test_unchanged_files_are_skipped(mfout_tree, file_format, capsys):
+    if file_format in BACKENDS:
+        pytest.importorskip(BACKENDS[file_format])
+
+    assert cli.main([str(mfout_tree), u'--format', file_format]) == 0
+    files = converted_files(mfout_tree)
+    assert u'mfout.{}.converted'.format(file_format) in files
+
+    assert cli.main([str(mfout_tree), u'--format', file_format]) == 0
+    assert converted_files(mfout_tree) == files
+
+    output = capsys.readouterr()[0].splitlines()
+    assert [x.split(u': ')[-1] for x in output] == [u'converted', u'skipped (unchanged)']
+
+
+def test_changed_files_are_converted_again(mfout_tree):
+    mfoutfilename = str(mfout_tree.join(u'mfout'))
+    prefix = mfoutfilename
+
+    cli.convert_file(mfoutfilename, prefix)
+    assert cli.is_converted(mfoutfilename, prefix)
+
+    mtime = os.path.getmtime(mfoutfilename) + 10
+    os.utime(mfoutfilename, (mtime, mtime))
+    assert not cli.is_converted(mfoutfilename, prefix)
+
+
+def test_an_interrupted_conversion_is_not_converted(mfout_tree, monkeypatch):
+    mfoutfilename = str(mfout_tree.join(u'mfout'))
+    prefix = mfoutfilename
+
+    cli.convert_file(mfoutfilename, prefix)
+
+    # Writing fails after some of the files have been overwritten
+    def write_some(tag_dict, loop_dict, filename_prefix):
+        loop_dict[list(loop_dict.keys())[0]].to_csv(filename_prefix + u'_loop_partial.tsv')
+        raise IOError(u'disk full')
+
+    monkeypatch.setattr(cli, u'write_all_to_file', write_some)
+
+    with pytest.raises(IOError):
+        cli.convert_file(mfoutfilename, prefix)
+
+    assert not cli.is_converted(mfoutfilename, prefix)
+    assert list(cli.convert_files([(mfoutfilename, prefix, u'tsv')])) == [mfoutfilename]
@@ -0,0 +1,56 @@
+# coding: utf-8
+import pytest
+
+import mfoutparser as mf
+
+
+CORRELATION = u'''data_correlation_matrix
+loop_
+     _Residue
+     loop_
+            _Model_free_name_1  _Model_free_name_2         _Covariance
+
+         2
+               S2s            S2s            1.00000E+00
+               S2s            te            -7.51000E-02
+               te             te             1.00000E+00
+     stop_
+stop_
+'''
+
+
+def test_matrices_use_the_covariance_format(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    if u'correlation_matrix' not in loop_dict:
+        pytest.skip(u'no correlation data')
+    correlation = loop_dict[u'correlation_matrix']
+
+    matrices = mf.correlation_tensor_to_matrices(*mf.make_correlation_tensor(correlation))
+
+    assert matrices.equals(mf.make_correlation_matrices(correlation))
+    assert set(matrices._print_format.values()) == {correlation._print_format[u'covariance']}
+
+
+def test_tensor_carries_the_covariance_format(write_mfout, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(write_mfout(CORRELATION))
+    correlation = loop_dict[u'correlation_matrix']
+
+    tensor, residues, parameters, print_format = mf.make_correlation_tensor(correlation)
+    assert print_format == correlation._print_format[u'covariance']
+    assert u'E' in print_format
+
+    prefix = str(tmpdir.join(u'mfout'))
+    mf.write_correlation_matrix_to_file(mf.make_correlation_tensor(correlation), prefix)
+    with open(prefix + u'_correlation_matrix_pivot.tsv') as tsvfile:
+        assert u'-7.51000E-02' in tsvfile.read()
+
+
+def test_matrices_without_a_covariance_format(write_mfout):
+    tag_dict, loop_dict = mf.parse_mfout(write_mfout(CORRELATION))
+    correlation = loop_dict[u'correlation_matrix']
+    correlation._print_format = dict()
+
+    tensor, residues, parameters, print_format = mf.make_correlation_tensor(correlation)
+    matrices = mf.make_correlation_matrices(correlation)
+
+    assert set(matrices._print_format.values()) == {print_format}
@@ -0,0 +1,82 @@
+# coding: utf-8
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mfoutparser as mf
+
+
+def make_dataframe(rows):
+    dataframe = mf.DataFrame({u'residue': np.arange(rows), u'value': np.linspace(0, 1, rows)})
+    dataframe.loc[::2, u'value'] = np.nan
+    dataframe._print_format = {u'value': u'{:.3f}'}
+    return dataframe
+
+
+@pytest.mark.parametrize(u'rows', [5, 200])
+def test_html_shows_the_rows_pandas_shows(rows):
+    dataframe = make_dataframe(rows)
+
+    html = dataframe._repr_html_()
+
+    assert html.count(u'<tr') == pd.DataFrame(dataframe)._repr_html_().count(u'<tr')
+    assert u'nan' not in html.lower()
+
+
+def test_derived_frames_share_the_print_format():
+    dataframe = make_dataframe(10)
+
+    assert dataframe.iloc[2:5]._print_format is dataframe._print_format
+    assert pd.concat([dataframe, dataframe])._print_format == dataframe._print_format
+
+    copy = dataframe.copy()
+    assert copy._print_format == dataframe._print_format
+    assert copy._print_format is not dataframe._print_format
+
+
+def test_frames_made_without_init_get_a_print_format():
+    # Some Pandas versions make results without calling __init__
+    dataframe = mf.DataFrame.__new__(mf.DataFrame)
+    pd.DataFrame.__init__(dataframe, np.ones((3, 2)))
+
+    assert dataframe.copy()._print_format == dict()
+    assert (dataframe + 1)._print_format == dict()
+
+
+def test_shared_print_formats_are_read_only():
+    dataframe = make_dataframe(10)
+    selection = dataframe[dataframe[u'residue'] > 5]
+
+    with pytest.raises(TypeError):
+        selection._print_format[u'value'] = u'{:.1f}'
+    with pytest.raises(TypeError):
+        dataframe._print_format.update(value=u'{:.1f}')
+
+    selection._print_format = dict(selection._print_format, value=u'{:.1f}')
+    assert selection._print_format == {u'value': u'{:.1f}'}
+    assert dataframe._print_format == {u'value': u'{:.3f}'}
+
+    # A deep copy can be changed in place
+    copy = dataframe.copy()
+    copy._print_format[u'value'] = u'{:.1f}'
+    assert dataframe._print_format == {u'value': u'{:.3f}'}
+
+
+def test_shared_print_formats_can_be_pickled():
+    dataframe = make_dataframe(10).iloc[2:5]
+    unpickled = pickle.loads(pickle.dumps(dataframe))
+
+    assert unpickled._print_format == dataframe._print_format
+    assert unpickled.iloc[1:]._print_format == dataframe._print_format
+
+
+def test_concatenated_formats_use_the_most_decimals():
+    dataframe = make_dataframe(10)
+    other = make_dataframe(4)
+    other._print_format = {u'value': u'{:.2E}', u'residue': u'{:.0f}'}
+
+    combined = pd.concat([dataframe, other])
+
+    assert combined._print_format == {u'value': u'{:.3E}', u'residue': u'{:.0f}'}
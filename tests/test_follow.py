@@ -0,0 +1,66 @@
+# coding: utf-8
+import io
+
+import mfoutparser as mf
+
+
+def read_bytes(filename):
+    with io.open(filename, 'rb') as mfoutfile:
+        return mfoutfile.read()
+
+
+def assert_same_tables(tables, expected):
+    assert list(tables.keys()) == list(expected.keys())
+    for key in expected:
+        assert tables[key].equals(expected[key])
+        assert tables[key]._print_format == expected[key]._print_format
+
+
+def test_polling_a_growing_file_matches_parse_mfout(mfoutfilename, tmpdir):
+    data = read_bytes(mfoutfilename)
+    filename = str(tmpdir.join(u'mfout'))
+
+    follower = mf.MfoutFollower(filename)
+    assert follower.poll() == list()
+
+    # The file is written in uneven chunks that split lines and data tags
+    parsed_list = list()
+    chunk_size = len(data) // 7 + 13
+    with io.open(filename, 'wb') as mfoutfile:
+        for start in range(0, len(data), chunk_size):
+            mfoutfile.write(data[start:start + chunk_size])
+            mfoutfile.flush()
+            parsed_list += follower.poll()
+
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+
+    # The last data tag is only parsed once the file is finished
+    assert len(parsed_list) == len(follower.data_tags)
+    assert follower.poll() == list()
+
+    last_list = follower.poll(final=True)
+    assert len(last_list) == 1
+    assert parsed_list + last_list == follower.data_tags
+
+    assert_same_tables(follower.tag_dict, tag_dict)
+    assert_same_tables(follower.loop_dict, loop_dict)
+
+
+def test_a_truncated_file_is_parsed_again(mfoutfilename, write_mfout):
+    filename = write_mfout(read_bytes(mfoutfilename).decode(u'utf-8'))
+
+    follower = mf.MfoutFollower(filename)
+    follower.poll(final=True)
+    assert u'model_1' in follower.loop_dict
+
+    # The file is rewritten in place with less data
+    text = u'data_x\nloop_\n  _Residue  _Value\n  1  0.5\n  2  0.25\nstop_\n'
+    with io.open(filename, 'w') as mfoutfile:
+        mfoutfile.write(text)
+
+    assert follower.poll(final=True) == [u'data_x']
+    assert follower.data_tags == [u'data_x']
+
+    tag_dict, loop_dict = mf.parse_mfout(filename)
+    assert_same_tables(follower.tag_dict, tag_dict)
+    assert_same_tables(follower.loop_dict, loop_dict)
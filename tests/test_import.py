@@ -0,0 +1,42 @@
+# coding: utf-8
+import os
+import sys
+import subprocess
+
+import pytest
+
+import mfoutparser as mf
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(statement, modules):
+    # Run the statement in a fresh interpreter using the package in this tree
+    env = dict(os.environ)
+    env[u'PYTHONPATH'] = os.pathsep.join([ROOT] + [x for x in [env.get(u'PYTHONPATH')] if x])
+
+    script = u'import sys\n{}\nprint(" ".join(x for x in {!r} if x in sys.modules))'
+    output = subprocess.check_output([sys.executable, u'-c', script.format(statement, modules)],
+                                     env=env)
+
+    return output.decode(u'utf-8').split()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason=u'modules can only be lazy on python >= 3.7')
+def test_import_does_not_import_numpy_or_pandas():
+    assert imported_modules(u'import mfoutparser', [u'numpy', u'pandas']) == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason=u'modules can only be lazy on python >= 3.7')
+def test_first_use_imports_only_the_submodule():
+    imported = imported_modules(u'import mfoutparser\nmfoutparser.register_schema',
+                                [u'mfoutparser.schema', u'mfoutparser.read', u'pandas'])
+
+    assert imported == [u'mfoutparser.schema']
+
+
+def test_all_names_can_be_loaded():
+    for name in mf.__all__:
+        assert getattr(mf, name) is not None
+        assert name in dir(mf)
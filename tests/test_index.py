@@ -0,0 +1,49 @@
+# coding: utf-8
+import mfoutparser as mf
+
+
+TEXT = u"""data_first
+_Tag  1
+data_second
+loop_
+     _Residue  _Value
+     1         0.10
+"""
+
+
+def test_index_slices_each_data_tag(write_mfout):
+    filename = write_mfout(TEXT)
+    data_tag_index = mf.index_mfout(filename)
+
+    assert list(data_tag_index.keys()) == [u'data_first', u'data_second']
+
+    with open(filename, 'rb') as mfoutfile:
+        data = mfoutfile.read()
+
+    start, end = data_tag_index[u'data_first']
+    assert data[start:end] == b'_Tag  1\n'
+
+    start, end = data_tag_index[u'data_second']
+    assert data[start:end].startswith(b'loop_\n')
+    assert end == len(data)
+
+
+def test_windows_line_endings_are_normalized(write_mfout, tmpdir):
+    filename = write_mfout(TEXT)
+    crlf_filename = str(tmpdir.join(u'mfout_crlf'))
+    with open(crlf_filename, 'wb') as mfoutfile:
+        mfoutfile.write(TEXT.replace(u'\n', u'\r\n').encode(u'utf-8'))
+
+    tag_dict, loop_dict = mf.parse_mfout(filename)
+    crlf_tag_dict, crlf_loop_dict = mf.parse_mfout(crlf_filename)
+
+    assert list(crlf_tag_dict.keys()) == list(tag_dict.keys())
+    assert crlf_tag_dict[u'first'].equals(tag_dict[u'first'])
+    assert crlf_loop_dict[u'second'].equals(loop_dict[u'second'])
+
+
+def test_empty_file(write_mfout):
+    filename = write_mfout(u'')
+
+    assert len(mf.index_mfout(filename)) == 0
+    assert mf.parse_mfout(filename) == ({}, {})
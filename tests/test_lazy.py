@@ -0,0 +1,66 @@
+# coding: utf-8
+import pytest
+
+import mfoutparser as mf
+from mfoutparser import read
+
+from test_read import MIXED_DEPTH
+
+
+def assert_same_tables(tag_loop_dict, lazy_dict):
+    assert list(lazy_dict.keys()) == list(tag_loop_dict.keys())
+    for key, table in tag_loop_dict.items():
+        assert lazy_dict[key].equals(table)
+        assert lazy_dict[key]._print_format == table._print_format
+
+
+def test_lazy_matches_eager(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    lazy_tag_dict, lazy_loop_dict = mf.parse_mfout(mfoutfilename, lazy=True)
+
+    assert_same_tables(tag_dict, lazy_tag_dict)
+    assert_same_tables(loop_dict, lazy_loop_dict)
+
+
+def test_lazy_mixed_depth_keys(write_mfout):
+    filename = write_mfout(MIXED_DEPTH)
+    lazy_tag_dict, lazy_loop_dict = mf.parse_mfout(filename, lazy=True)
+
+    assert_same_tables(mf.parse_mfout(filename)[1], lazy_loop_dict)
+
+
+def test_lazy_open_converts_nothing(mfoutfilename):
+    lazy_tag_dict, lazy_loop_dict = mf.parse_mfout(mfoutfilename, lazy=True)
+
+    # Nothing, not even the header, is read until a table is used
+    data_tags = lazy_loop_dict._data_tags
+    assert data_tags._tables == dict()
+
+    lazy_loop_dict[u'model_1']
+    assert list(data_tags._tables.keys()) == [u'data_model_1']
+
+
+def test_lazy_detects_changed_file(write_mfout):
+    filename = write_mfout(MIXED_DEPTH)
+    lazy_tag_dict, lazy_loop_dict = mf.parse_mfout(filename, lazy=True)
+
+    with open(filename, 'a') as mfoutfile:
+        mfoutfile.write(u'data_y\n')
+
+    with pytest.raises(IOError):
+        lazy_loop_dict[u'x_1']
+
+
+@pytest.mark.parametrize(u'text', [
+    MIXED_DEPTH,
+    u'_Tag 1\n# _comment\nloop_\n  _A _B\n  1 2\n  _Other 3\n',
+    u'loop_\n\n# comment\n  _A\n  loop_\n  _B\n  1\n  2\n  stop_\n  3\n  4\n  stop_\n',
+    u'loop_\n  A  B\n  1  2\n_Tag value\nloop_\n  _C\n  x_y\n',
+    u'  1 2\nloop_\nstop_\n  1\n',
+    u'',
+])
+def test_count_tags_and_loops_matches_classifier(text):
+    data = text.encode(u'utf-8')
+    expected = read._count_records(read._iter_line_records(text.split(u'\n')))
+
+    assert read._count_tags_and_loops(data, 0, len(data)) == expected
@@ -0,0 +1,62 @@
+# coding: utf-8
+import pytest
+
+import mfoutparser as mf
+from conftest import EXAMPLE_DIR
+
+
+EXAMPLES = [EXAMPLE_DIR + u'/mfout.' + x for x in [u'compare', u'singlefield', u'multifield']]
+
+
+@pytest.fixture
+def mfoutfilenames(tmpdir):
+    """The examples along with a missing file and a directory, which can't be parsed"""
+    return EXAMPLES[:2] + [str(tmpdir.join(u'missing_mfout')), str(tmpdir)] + EXAMPLES[2:]
+
+
+def assert_same_as_parsed(results):
+    for mfoutfilename, (tag_dict, loop_dict) in results.items():
+        expected_tag_dict, expected_loop_dict = mf.parse_mfout(mfoutfilename)
+        assert list(loop_dict.keys()) == list(expected_loop_dict.keys())
+
+        for key, table in loop_dict.items():
+            assert table.equals(expected_loop_dict[key])
+            assert table._print_format == expected_loop_dict[key]._print_format
+
+
+@pytest.mark.parametrize(u'workers', [1, 2])
+def test_results_are_ordered_and_errors_collected(mfoutfilenames, workers):
+    results, errors = mf.parse_mfout_many(mfoutfilenames + EXAMPLES[:1], workers=workers)
+
+    assert list(results.keys()) == EXAMPLES
+    assert list(errors.keys()) == mfoutfilenames[2:4]
+    assert all(isinstance(x, Exception) for x in errors.values())
+
+    # The print formats survive being returned from the worker processes
+    assert_same_as_parsed(results)
+
+
+def test_unordered_results_are_all_returned(mfoutfilenames):
+    results, errors = mf.parse_mfout_many(mfoutfilenames, workers=2, ordered=False)
+
+    assert sorted(results.keys()) == sorted(EXAMPLES)
+    assert sorted(errors.keys()) == sorted(mfoutfilenames[2:4])
+
+
+@pytest.mark.parametrize(u'workers', [1, 2])
+def test_iter_yields_each_file_once(mfoutfilenames, workers):
+    completed = list(mf.iter_mfout_many(mfoutfilenames, workers=workers))
+
+    assert sorted(x[0] for x in completed) == sorted(mfoutfilenames)
+    for mfoutfilename, result, error in completed:
+        assert (result is None) == (mfoutfilename in mfoutfilenames[2:4])
+        assert (error is None) == (result is not None)
+
+
+def test_iter_can_be_closed_early():
+    generator = mf.iter_mfout_many(EXAMPLES, workers=2)
+    mfoutfilename, result, error = next(generator)
+    generator.close()
+
+    assert mfoutfilename in EXAMPLES
+    assert error is None
@@ -0,0 +1,49 @@
+# coding: utf-8
+import mfoutparser as mf
+
+
+MIXED_DEPTH = u"""data_x
+loop_
+     _Residue  _Value
+     1         0.10
+     2         0.20
+
+loop_
+     _Name  _Unit
+     loop_
+          _Residue  _Value
+
+     S2  ()
+          1  0.800
+          2  0.900
+     stop_
+
+     Rex  (s-1)
+          1  1.500
+     stop_
+
+"""
+
+
+def test_mixed_depth_loops_are_split_into_numbered_tables(write_mfout):
+    tag_dict, loop_dict = mf.parse_mfout(write_mfout(MIXED_DEPTH))
+
+    assert list(loop_dict.keys()) == [u'x_1', u'x_2']
+
+    flat = loop_dict[u'x_1']
+    assert list(flat.columns) == [u'residue', u'value']
+    assert flat[u'value'].tolist() == [0.1, 0.2]
+
+    nested = loop_dict[u'x_2']
+    assert list(nested.columns) == [u'name', u'unit', u'residue', u'value']
+    assert nested[u'name'].tolist() == [u'S2', u'S2', u'Rex']
+    assert nested[u'value'].tolist() == [0.8, 0.9, 1.5]
+    assert nested._print_format == {u'value': u'{:.3f}'}
+
+
+def test_examples_keep_their_tables(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+
+    assert u'model_1' in loop_dict
+    assert all(not isinstance(x, list) for x in loop_dict.values())
+    assert list(loop_dict.keys())[-1].startswith(u'header_')
@@ -0,0 +1,50 @@
+# coding: utf-8
+import pandas as pd
+import pytest
+
+import mfoutparser as mf
+
+
+@pytest.mark.parametrize(u'data_tag', [u'model_1', u'data_relaxation', u'sse'])
+def test_chunks_concatenate_to_the_parsed_table(mfoutfilename, data_tag):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    key = data_tag.replace(u'data_', u'')
+    if key not in loop_dict:
+        pytest.skip(u'{} is not in the file'.format(key))
+    table = loop_dict[key]
+
+    chunk_list = list(mf.iter_loop_rows(mfoutfilename, data_tag, chunksize=7))
+
+    assert all(len(x) <= 7 for x in chunk_list)
+    assert sum(len(x) for x in chunk_list) == len(table)
+
+    rows = pd.concat(chunk_list, ignore_index=True)
+    pd.testing.assert_frame_equal(pd.DataFrame(rows), pd.DataFrame(table), check_dtype=False)
+
+    for chunk in chunk_list:
+        for col, print_format in chunk._print_format.items():
+            assert col in table._print_format
+
+
+def test_numpy_records(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    table = loop_dict[u'model_1']
+
+    record_list = list(mf.iter_loop_rows(mfoutfilename, u'model_1', chunksize=50, as_numpy=True))
+
+    assert list(record_list[0].dtype.names) == list(table.columns)
+    assert sum(len(x) for x in record_list) == len(table)
+
+
+def test_missing_data_tag(mfoutfilename):
+    with pytest.raises(KeyError):
+        next(mf.iter_loop_rows(mfoutfilename, u'data_missing'))
+
+
+def test_loop_without_rows(write_mfout):
+    mfoutfilename = write_mfout(u'data_x\nloop_\n  _Residue  _Value\nstop_\n')
+
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    rows = list(mf.iter_loop_rows(mfoutfilename, u'x'))
+
+    assert sum(len(x) for x in rows) == len(loop_dict[u'x']) == 0
@@ -0,0 +1,86 @@
+# coding: utf-8
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import mfoutparser as mf
+from mfoutparser import schema
+
+
+UNTYPED = u'''data_title
+loop_
+     _Title    _Residue
+     abc       1
+     7.5       2
+stop_
+'''
+
+
+@pytest.fixture
+def no_schemas(monkeypatch):
+    """Parse without any registered schemas"""
+    monkeypatch.setattr(schema, u'_SCHEMAS', OrderedDict())
+
+
+def parse_tables(mfoutfilename, stats=None):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename, stats=stats)
+    return OrderedDict(list(tag_dict.items()) + list(loop_dict.items()))
+
+
+def test_schema_tables_match_inferred_tables(mfoutfilename, monkeypatch):
+    tables = parse_tables(mfoutfilename)
+
+    monkeypatch.setattr(schema, u'_SCHEMAS', OrderedDict())
+    inferred_tables = parse_tables(mfoutfilename)
+
+    assert list(tables.keys()) == list(inferred_tables.keys())
+    for key in tables:
+        table, inferred_table = tables[key], inferred_tables[key]
+        assert list(table.columns) == list(inferred_table.columns)
+        assert (table.dtypes == inferred_table.dtypes).all()
+        for col in table.columns:
+            # older pandas may round the inferred floats differently
+            if table[col].dtype == np.float64:
+                assert np.allclose(table[col].values, inferred_table[col].values,
+                                   rtol=1e-15, atol=0, equal_nan=True)
+            else:
+                assert table[col].equals(inferred_table[col])
+        assert tables[key]._print_format == inferred_tables[key]._print_format
+
+
+def test_schema_loops_are_timed_as_extracted(mfoutfilename):
+    stats = mf.ParseStats()
+    parse_tables(mfoutfilename, stats)
+
+    stages = dict()
+    for record in stats.records:
+        stages.setdefault(record[u'block'], set()).add(record[u'stage'])
+
+    assert u'classify' not in stages[u'data_model_1']
+    assert u'extract' in stages[u'data_model_1']
+    assert u'classify' in stages[u'data_header']
+
+
+def test_columns_without_a_type_keep_text_that_is_not_numeric(write_mfout):
+    tag_dict, loop_dict = mf.parse_mfout(write_mfout(UNTYPED))
+    table = loop_dict[u'title']
+
+    assert table[u'title'].tolist() == [u'abc', u'7.5']
+    assert table[u'residue'].dtype == np.int64
+
+
+def test_get_schema_types():
+    assert schema.get_schema_types(u'data_sse', [u'residue', u'sse']) == \
+        {u'residue': schema.INT, u'sse': schema.FLOAT}
+    assert schema.get_schema_types(u'model_12', [u'residue']) == {u'residue': schema.INT}
+    assert schema.get_schema_types(u'sse', [u'sse', u'residue']) is None
+    assert schema.get_schema_types(u'unknown', [u'residue']) is None
+
+
+def test_registered_schema_is_used(write_mfout, no_schemas):
+    mf.register_schema(u'title', [[(u'title', schema.STRING), (u'residue', schema.STRING)]])
+
+    tag_dict, loop_dict = mf.parse_mfout(write_mfout(UNTYPED))
+
+    assert loop_dict[u'title'][u'residue'].tolist() == [u'1', u'2']
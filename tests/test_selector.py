@@ -0,0 +1,113 @@
+# coding: utf-8
+import operator
+
+import numpy as np
+import pytest
+
+import mfoutparser as mf
+
+
+@pytest.fixture
+def model(mfoutfilename):
+    """The model_1 table of an example file"""
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    return loop_dict[u'model_1']
+
+
+def expected_rows(dataframe, mask):
+    table = dataframe[mask].copy()
+    table.reset_index(drop=True, inplace=True)
+    return table
+
+
+def test_criteria_for_several_columns_are_combined(model):
+    residues = sorted(model[u'residue'].unique())
+    low, high = residues[1], residues[-2]
+
+    table = mf.query_data(model, {u'residue': (u'between', (low, high)),
+                                  u'model_free_name': (u'in', [u'S2', u'te']),
+                                  u'fit_value': [(u'>', 0.1), (u'!=', 1.0)]})
+
+    mask = (model[u'residue'] >= low) & (model[u'residue'] <= high) & \
+           model[u'model_free_name'].isin([u'S2', u'te']) & \
+           (model[u'fit_value'] > 0.1) & (model[u'fit_value'] != 1.0)
+
+    assert len(table) > 0
+    assert table.equals(expected_rows(model, mask))
+    assert table._print_format == model._print_format
+
+
+def test_plain_values_select_equal_rows(model):
+    table = mf.query_data(model, {u'model_free_name': u'S2'})
+    assert table.equals(expected_rows(model, model[u'model_free_name'] == u'S2'))
+
+
+@pytest.mark.parametrize(u'selector_type, comparison', [(u'==', operator.eq), (u'<', operator.lt),
+                                                         (u'>', operator.gt), (u'<=', operator.le),
+                                                         (u'>=', operator.ge)])
+def test_get_data_selection(model, selector_type, comparison):
+    residue = int(np.median(model[u'residue']))
+    table = mf.get_data_selection(model, {u'residue': residue}, selector_type=selector_type)
+
+    mask = comparison(model[u'residue'], residue)
+    assert table.equals(expected_rows(model, mask))
+
+
+def test_index_levels_can_be_queried(model):
+    indexed = model.set_index([u'residue', u'model_free_name'])
+    table = mf.query_data(indexed, {u'model_free_name': (u'in', [u'S2'])}, copy=False)
+
+    assert (table.index.get_level_values(u'model_free_name') == u'S2').all()
+    assert len(table) == (model[u'model_free_name'] == u'S2').sum()
+
+
+def test_copies_are_independent(model):
+    table = mf.query_data(model, {u'model_free_name': u'S2'})
+    table[u'fit_value'] = -1.
+
+    assert (model[u'fit_value'] != -1.).all()
+
+
+def test_unknown_selector_types_are_rejected(model):
+    with pytest.raises(SyntaxError):
+        mf.query_data(model, {u'residue': [(u'~', 1)]})
+    with pytest.raises(SyntaxError):
+        mf.get_data_selection(model, {u'residue': 1}, selector_type=u'in')
+
+
+def test_residue_positions_match_boolean_selection(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    residue_index = mf.ResidueIndex(loop_dict)
+
+    assert u'model_1' in residue_index.tables
+    assert not any(u'header' in x for x in residue_index.tables)
+
+    for table in residue_index.tables:
+        residues = loop_dict[table][u'residue'].values
+
+        for residue in residue_index.residues:
+            positions = residue_index.positions(residue, table)
+            assert positions.tolist() == np.flatnonzero(residues == residue).tolist()
+
+    residue = residue_index.residues[0]
+    assert residue in residue_index
+    for table, rows in residue_index[residue].items():
+        assert rows.equals(loop_dict[table][loop_dict[table][u'residue'] == residue])
+
+
+def test_residues_missing_from_a_table(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    residue_index = mf.ResidueIndex(loop_dict)
+
+    assert -1 not in residue_index
+    assert all(len(x) == 0 for x in residue_index.get(-1, tables=[u'model_1']).values())
+
+
+def test_residue_index_levels(mfoutfilename):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    model = loop_dict[u'model_1']
+    residue_index = mf.ResidueIndex({u'model_1': model.set_index(u'residue')})
+
+    residue = residue_index.residues[-1]
+    assert residue_index.positions(residue, u'model_1').tolist() == \
+        np.flatnonzero(model[u'residue'].values == residue).tolist()
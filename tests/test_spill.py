@@ -0,0 +1,157 @@
+# coding: utf-8
+import os
+
+import pytest
+
+import mfoutparser as mf
+
+
+pytest.importorskip(u'pyarrow')
+
+ROWS = 1500
+
+
+def make_loop(values):
+    lines = [u'data_values', u'loop_', u'     _Residue   _Value', u'']
+    lines += [u'     {:d}   {}'.format(residue + 1, value) for residue, value in enumerate(values)]
+    lines += [u'stop_', u'']
+    return u'\n'.join(lines)
+
+
+def assert_spilled_like_memory(mfoutfilename, spill_dir, key=u'values'):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=spill_dir)
+
+    table = spilled_loop_dict[key]
+    assert isinstance(table, mf.SpilledTable)
+
+    dataframe = table.read()
+    assert dataframe.equals(loop_dict[key])
+    assert (dataframe.dtypes == loop_dict[key].dtypes).all()
+    assert dataframe._print_format == loop_dict[key]._print_format
+
+    return table
+
+
+def test_integers_followed_by_floats_are_widened(write_mfout, tmpdir):
+    values = [u'{:d}'.format(x) for x in range(ROWS)] + [u'{:.3f}'.format(x / 7.) for x in range(ROWS)]
+    mfoutfilename = write_mfout(make_loop(values))
+
+    table = assert_spilled_like_memory(mfoutfilename, str(tmpdir.join(u'spill')))
+    assert len(table.chunk_lengths) > 1
+
+
+def test_numbers_followed_by_text_are_parsed_in_memory(write_mfout, tmpdir):
+    values = [u'{:d}'.format(x) for x in range(ROWS)] + [u'n/a'] * ROWS
+    mfoutfilename = write_mfout(make_loop(values))
+    spill_dir = str(tmpdir.join(u'spill'))
+
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=spill_dir)
+
+    assert spilled_loop_dict[u'values'].equals(loop_dict[u'values'])
+    assert os.listdir(spill_dir) == []
+
+
+def test_files_with_the_same_name_are_spilled_separately(tmpdir):
+    values = [u'{:.2f}'.format(x / 3.) for x in range(ROWS)]
+    spill_dir = str(tmpdir.join(u'spill'))
+
+    table_list = list()
+    for directory, scale in [(u'a', 1), (u'b', 2)]:
+        tmpdir.mkdir(directory)
+        mfoutfilename = str(tmpdir.join(directory, u'mfout'))
+        with open(mfoutfilename, 'w') as mfoutfile:
+            mfoutfile.write(make_loop(values[::scale]))
+        table_list.append(assert_spilled_like_memory(mfoutfilename, spill_dir))
+
+    assert table_list[0].filename != table_list[1].filename
+    assert [len(x) for x in table_list] == [ROWS, ROWS // 2]
+
+
+def test_missing_spill_dir_is_made_and_removed_tables_leave_it_empty(write_mfout, tmpdir):
+    mfoutfilename = write_mfout(make_loop([u'{:.2f}'.format(x / 3.) for x in range(ROWS)]))
+    spill_dir = str(tmpdir.join(u'missing', u'spill'))
+
+    with assert_spilled_like_memory(mfoutfilename, spill_dir) as table:
+        assert os.path.exists(table.filename)
+
+    assert not os.path.exists(table.filename)
+    assert os.listdir(spill_dir) == []
+
+
+def test_examples_spill_like_memory(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=str(tmpdir))
+
+    assert list(spilled_loop_dict.keys()) == list(loop_dict.keys())
+    for key, table in spilled_loop_dict.items():
+        if isinstance(table, mf.SpilledTable):
+            table = table.read()
+        assert table.equals(loop_dict[key])
+        assert table._print_format == loop_dict[key]._print_format
+
+
+def test_loops_without_rows_are_parsed_in_memory(write_mfout, tmpdir):
+    mfoutfilename = write_mfout(make_loop([]))
+    spill_dir = str(tmpdir.join(u'spill'))
+
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=spill_dir)
+
+    assert spilled_loop_dict[u'values'].shape == (0, 2)
+    assert spilled_loop_dict[u'values'].equals(loop_dict[u'values'])
+    assert os.listdir(spill_dir) == []
+
+
+def test_spilled_tables_are_removed_on_error(write_mfout, tmpdir, monkeypatch):
+    text = make_loop([u'{:.2f}'.format(x / 3.) for x in range(ROWS)])
+    mfoutfilename = write_mfout(text + text.replace(u'data_values', u'data_header'))
+    spill_dir = str(tmpdir.join(u'spill'))
+
+    # The header is parsed in memory after the loop is spilled
+    def fail(*args):
+        raise RuntimeError(u'conversion failed')
+    monkeypatch.setattr(mf.spill, u'_convert_data_tag', fail)
+
+    with pytest.raises(RuntimeError):
+        mf.parse_mfout(mfoutfilename, memory_budget=1, spill_dir=spill_dir)
+    assert os.listdir(spill_dir) == []
+
+
+def test_spilled_tables_are_written_to_parquet(write_mfout, tmpdir):
+    mfoutfilename = write_mfout(make_loop([u'{:.2f}'.format(x / 3.) for x in range(ROWS)]))
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=str(tmpdir.join(u'spill')))
+    assert len(spilled_loop_dict[u'values'].chunk_lengths) > 1
+
+    filename_prefix = str(tmpdir.join(u'mfout'))
+    mf.write_all_to_binary(spilled_tag_dict, spilled_loop_dict, filename_prefix, u'parquet')
+    read_tag_dict, read_loop_dict = mf.read_all_from_binary(filename_prefix, u'parquet')
+
+    assert read_loop_dict[u'values'].equals(loop_dict[u'values'])
+    assert read_loop_dict[u'values']._print_format == loop_dict[u'values']._print_format
+
+    with pytest.raises(TypeError):
+        mf.write_all_to_binary(spilled_tag_dict, spilled_loop_dict, filename_prefix, u'hdf5')
+
+
+def test_spilled_tables_are_indexed_by_residue(write_mfout, tmpdir):
+    values = [u'{:.2f}'.format(x / 3.) for x in range(ROWS)]
+    mfoutfilename = write_mfout(make_loop(values).replace(u'_Residue', u'_residue'))
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    spilled_tag_dict, spilled_loop_dict = mf.parse_mfout(mfoutfilename, memory_budget=1,
+                                                         spill_dir=str(tmpdir.join(u'spill')))
+
+    residue_index = mf.ResidueIndex(loop_dict)
+    spilled_residue_index = mf.ResidueIndex(spilled_loop_dict)
+
+    assert spilled_residue_index.tables == [u'values']
+    assert spilled_residue_index.residues == residue_index.residues
+    for residue in [1, ROWS // 2, ROWS, ROWS + 1]:
+        assert spilled_residue_index[residue][u'values'].equals(residue_index[residue][u'values'])
@@ -0,0 +1,98 @@
+# coding: utf-8
+import io
+import os
+import gzip
+import tarfile
+import zipfile
+
+import pytest
+
+import mfoutparser as mf
+
+
+def read_text(filename):
+    with io.open(filename, 'rb') as textfile:
+        return textfile.read().decode(u'utf-8')
+
+
+def test_chunks_are_written_as_one_table(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    table = loop_dict[u'model_1']
+
+    table.to_csv(str(tmpdir.join(u'whole.tsv')))
+    table.to_csv(str(tmpdir.join(u'chunked.tsv')), chunksize=7)
+
+    text = read_text(str(tmpdir.join(u'whole.tsv')))
+    assert read_text(str(tmpdir.join(u'chunked.tsv'))) == text
+    assert len(text.splitlines()) == len(table) + 1
+    assert u'\r' not in text
+
+
+def test_without_a_file_the_table_is_returned(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    table = loop_dict[u'model_1']
+
+    table.to_csv(str(tmpdir.join(u'model_1.tsv')))
+
+    assert table.to_csv(None, chunksize=7) == read_text(str(tmpdir.join(u'model_1.tsv')))
+
+
+def test_compressed_file(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    table = loop_dict[u'model_1']
+
+    filename = str(tmpdir.join(u'model_1.tsv.gz'))
+    table.to_csv(filename, compression=u'gzip', chunksize=7)
+
+    with gzip.open(filename, 'rb') as gzipfile:
+        assert gzipfile.read().decode(u'utf-8') == table.to_csv(None)
+
+
+def test_open_handle(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+    table = loop_dict[u'model_1']
+
+    filename = str(tmpdir.join(u'model_1.tsv'))
+    with open(filename, 'w') as handle:
+        table.to_csv(handle, chunksize=7)
+
+    assert read_text(filename) == table.to_csv(None)
+
+
+def written_files(directory):
+    return dict([(name, read_text(os.path.join(directory, name)))
+                 for name in sorted(os.listdir(directory))])
+
+
+def test_threads_write_the_same_files(mfoutfilename, tmpdir):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+
+    for name, workers in [(u'serial', 1), (u'threads', 4)]:
+        tmpdir.mkdir(name)
+        mf.write_all_to_file(tag_dict, loop_dict, str(tmpdir.join(name, u'mfout')), workers=workers)
+
+    assert written_files(str(tmpdir.join(u'threads'))) == written_files(str(tmpdir.join(u'serial')))
+
+
+@pytest.mark.parametrize(u'extension', [u'.zip', u'.tar.gz'])
+@pytest.mark.parametrize(u'workers', [1, 4])
+def test_archive_members_are_named_as_files(mfoutfilename, tmpdir, extension, workers):
+    tag_dict, loop_dict = mf.parse_mfout(mfoutfilename)
+
+    tmpdir.mkdir(u'files')
+    mf.write_all_to_file(tag_dict, loop_dict, str(tmpdir.join(u'files', u'mfout')))
+
+    archive = str(tmpdir.join(u'mfout' + extension))
+    mf.write_all_to_file(tag_dict, loop_dict, str(tmpdir.join(u'files', u'mfout')),
+                         workers=workers, archive=archive)
+
+    if extension == u'.zip':
+        with zipfile.ZipFile(archive) as archivefile:
+            members = dict([(name, archivefile.read(name).decode(u'utf-8'))
+                            for name in archivefile.namelist()])
+    else:
+        with tarfile.open(archive) as archivefile:
+            members = dict([(member.name, archivefile.extractfile(member).read().decode(u'utf-8'))
+                            for member in archivefile.getmembers()])
+
+    assert members == written_files(str(tmpdir.join(u'files')))